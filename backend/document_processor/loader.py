@@ -1,10 +1,29 @@
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from langchain_core.documents import Document
 from docx import Document as DocxDocument
 from pptx import Presentation
 import PyPDF2
+from config.settings import settings
+from backend.metrics import metrics
+
+
+def _load_task(task: Tuple[str, Optional[Tuple[int, int]]]) -> Tuple[List[Document], float]:
+    """Process-pool entry point: load one file or one page range of a PDF, returning its documents and load time"""
+    file_path, page_range = task
+    started = time.perf_counter()
+    try:
+        if page_range is not None:
+            documents = DocumentLoader.load_pdf_document(file_path, page_range=page_range)
+        else:
+            documents = DocumentLoader.load_document(file_path)
+    except Exception as e:
+        print(f"Failed to load {file_path}: {e}")
+        documents = []
+    return documents, time.perf_counter() - started
 
 
 class DocumentLoader:
@@ -12,19 +31,37 @@ class DocumentLoader:
     
     SUPPORTED_EXTENSIONS = {".docx", ".pptx", ".pdf", ".txt"}
     
+    @staticmethod
+    def _docx_parts(doc) -> Iterator[str]:
+        """Yield paragraph texts, then table cell texts, of a Word document"""
+        for para in doc.paragraphs:
+            yield para.text
+        for table in doc.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    yield cell.text
+    
+    @staticmethod
+    def _text_blocks(parts: Iterable[str], max_chars: int) -> Iterator[str]:
+        """Group consecutive text parts into newline-joined blocks of about max_chars"""
+        block, size = [], 0
+        for part in parts:
+            if block and size + len(part) > max_chars:
+                yield "\n".join(block)
+                block, size = [], 0
+            block.append(part)
+            size += len(part) + 1
+        if block:
+            yield "\n".join(block)
+    
     @staticmethod
     def load_word_document(file_path: str) -> List[Document]:
         """Load content from Word documents (.docx)"""
         documents = []
         try:
             doc = DocxDocument(file_path)
-            full_text = "\n".join([para.text for para in doc.paragraphs])
-            
-            # Extract tables if present
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        full_text += "\n" + cell.text
+            # Paragraphs followed by table cells (if present)
+            full_text = "\n".join(DocumentLoader._docx_parts(doc))
             
             file_name = Path(file_path).name
             documents.append(
@@ -43,64 +80,87 @@ class DocumentLoader:
         return documents
     
     @staticmethod
-    def load_powerpoint_document(file_path: str) -> List[Document]:
-        """Load content from PowerPoint documents (.pptx)"""
-        documents = []
+    def iter_word_document(file_path: str, block_chars: Optional[int] = None) -> Iterator[Document]:
+        """Lazily yield a Word document as blocks of paragraphs and table cells"""
+        try:
+            doc = DocxDocument(file_path)
+            file_name = Path(file_path).name
+            parts = DocumentLoader._docx_parts(doc)
+            
+            for block_idx, block in enumerate(DocumentLoader._text_blocks(parts, block_chars or settings.STREAM_BLOCK_CHARS)):
+                yield Document(
+                    page_content=block,
+                    metadata={
+                        "source": file_name,
+                        "file_type": "docx",
+                        "file_path": file_path,
+                        "block_number": block_idx + 1
+                    }
+                )
+        except Exception as e:
+            print(f"Error loading Word document {file_path}: {e}")
+    
+    @staticmethod
+    def iter_powerpoint_document(file_path: str) -> Iterator[Document]:
+        """Lazily yield the slides of a PowerPoint document (.pptx)"""
         try:
             prs = Presentation(file_path)
             file_name = Path(file_path).name
             
             for slide_idx, slide in enumerate(prs.slides):
-                slide_text = f"Slide {slide_idx + 1}:\n"
+                parts = [f"Slide {slide_idx + 1}:\n"]
                 
                 for shape in slide.shapes:
                     if hasattr(shape, "text"):
-                        slide_text += shape.text + "\n"
+                        parts.append(shape.text + "\n")
+                slide_text = "".join(parts)
                 
                 if slide_text.strip():
-                    documents.append(
-                        Document(
-                            page_content=slide_text,
-                            metadata={
-                                "source": file_name,
-                                "file_type": "pptx",
-                                "file_path": file_path,
-                                "slide_number": slide_idx + 1
-                            }
-                        )
+                    yield Document(
+                        page_content=slide_text,
+                        metadata={
+                            "source": file_name,
+                            "file_type": "pptx",
+                            "file_path": file_path,
+                            "slide_number": slide_idx + 1
+                        }
                     )
         except Exception as e:
             print(f"Error loading PowerPoint document {file_path}: {e}")
-        
-        return documents
     
     @staticmethod
-    def load_pdf_document(file_path: str) -> List[Document]:
-        """Load content from PDF documents"""
-        documents = []
+    def load_powerpoint_document(file_path: str) -> List[Document]:
+        """Load content from PowerPoint documents (.pptx)"""
+        return list(DocumentLoader.iter_powerpoint_document(file_path))
+    
+    @staticmethod
+    def iter_pdf_document(file_path: str, page_range: Optional[Tuple[int, int]] = None) -> Iterator[Document]:
+        """Lazily yield the pages of a PDF, optionally only pages [start, end) (0-based)"""
         try:
             file_name = Path(file_path).name
             with open(file_path, "rb") as pdf_file:
                 pdf_reader = PyPDF2.PdfReader(pdf_file)
+                start, end = page_range or (0, len(pdf_reader.pages))
                 
-                for page_idx, page in enumerate(pdf_reader.pages):
-                    page_text = page.extract_text()
+                for page_idx in range(start, min(end, len(pdf_reader.pages))):
+                    page_text = pdf_reader.pages[page_idx].extract_text()
                     
-                    documents.append(
-                        Document(
-                            page_content=page_text,
-                            metadata={
-                                "source": file_name,
-                                "file_type": "pdf",
-                                "file_path": file_path,
-                                "page_number": page_idx + 1
-                            }
-                        )
+                    yield Document(
+                        page_content=page_text,
+                        metadata={
+                            "source": file_name,
+                            "file_type": "pdf",
+                            "file_path": file_path,
+                            "page_number": page_idx + 1
+                        }
                     )
         except Exception as e:
             print(f"Error loading PDF document {file_path}: {e}")
-        
-        return documents
+    
+    @staticmethod
+    def load_pdf_document(file_path: str, page_range: Optional[Tuple[int, int]] = None) -> List[Document]:
+        """Load content from PDF documents, optionally only pages [start, end) (0-based)"""
+        return list(DocumentLoader.iter_pdf_document(file_path, page_range=page_range))
     
     @staticmethod
     def load_text_document(file_path: str) -> List[Document]:
@@ -126,6 +186,27 @@ class DocumentLoader:
         
         return documents
     
+    @staticmethod
+    def iter_text_document(file_path: str, block_chars: Optional[int] = None) -> Iterator[Document]:
+        """Lazily yield a text file as blocks of lines"""
+        try:
+            file_name = Path(file_path).name
+            with open(file_path, "r", encoding="utf-8") as txt_file:
+                lines = (line.rstrip("\n") for line in txt_file)
+                
+                for block_idx, block in enumerate(DocumentLoader._text_blocks(lines, block_chars or settings.STREAM_BLOCK_CHARS)):
+                    yield Document(
+                        page_content=block,
+                        metadata={
+                            "source": file_name,
+                            "file_type": "txt",
+                            "file_path": file_path,
+                            "block_number": block_idx + 1
+                        }
+                    )
+        except Exception as e:
+            print(f"Error loading text document {file_path}: {e}")
+    
     @classmethod
     def load_document(cls, file_path: str) -> List[Document]:
         """Load a document based on its file extension"""
@@ -143,17 +224,97 @@ class DocumentLoader:
             raise ValueError(f"Unsupported file type: {file_ext}. Supported types: {cls.SUPPORTED_EXTENSIONS}")
     
     @classmethod
-    def load_documents_from_directory(cls, directory_path: str) -> List[Document]:
-        """Load all supported documents from a directory"""
+    def iter_document(cls, file_path: str) -> Iterator[Document]:
+        """Lazily yield a document's pages, slides or text blocks based on its file extension
+        
+        Unlike load_document, Word and text files come out as several blocks
+        (block_number metadata) so large files are never held as one string.
+        """
+        file_ext = Path(file_path).suffix.lower()
+        
+        if file_ext == ".docx":
+            return cls.iter_word_document(file_path)
+        elif file_ext == ".pptx":
+            return cls.iter_powerpoint_document(file_path)
+        elif file_ext == ".pdf":
+            return cls.iter_pdf_document(file_path)
+        elif file_ext == ".txt":
+            return cls.iter_text_document(file_path)
+        else:
+            raise ValueError(f"Unsupported file type: {file_ext}. Supported types: {cls.SUPPORTED_EXTENSIONS}")
+    
+    @classmethod
+    def iter_documents(cls, file_paths: Iterable[str]) -> Iterator[Document]:
+        """Lazily yield the documents of many files, one file at a time"""
+        for file_path in file_paths:
+            try:
+                yield from cls.iter_document(file_path)
+            except Exception as e:
+                print(f"Failed to load {file_path}: {e}")
+    
+    @staticmethod
+    def _pdf_page_count(file_path: str) -> int:
+        """Return the number of pages in a PDF, or 0 if it cannot be read"""
+        try:
+            with open(file_path, "rb") as pdf_file:
+                return len(PyPDF2.PdfReader(pdf_file).pages)
+        except Exception as e:
+            print(f"Error reading PDF page count {file_path}: {e}")
+            return 0
+    
+    @classmethod
+    def _plan_tasks(cls, file_paths: List[str]) -> List[Tuple[str, Optional[Tuple[int, int]]]]:
+        """Split the input into load tasks, breaking large PDFs into page ranges"""
+        tasks = []
+        pages_per_task = max(1, settings.PDF_PAGES_PER_TASK)
+        for file_path in file_paths:
+            if Path(file_path).suffix.lower() == ".pdf":
+                page_count = cls._pdf_page_count(file_path)
+                if page_count > pages_per_task:
+                    for start in range(0, page_count, pages_per_task):
+                        tasks.append((file_path, (start, start + pages_per_task)))
+                    continue
+            tasks.append((file_path, None))
+        return tasks
+    
+    @classmethod
+    def load_documents(cls, file_paths: List[str], max_workers: Optional[int] = None) -> List[Document]:
+        """Load many files, in parallel worker processes when more than one worker is available
+        
+        Output order follows the input order (and page order within PDFs), and a
+        file that fails to load only drops its own documents.
+        """
+        workers = max_workers if max_workers is not None else settings.LOADER_WORKERS
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+        
+        tasks = cls._plan_tasks(file_paths) if workers > 1 else [(path, None) for path in file_paths]
+        workers = min(workers, len(tasks))
+        
         documents = []
-        directory = Path(directory_path)
         
-        for file_path in directory.iterdir():
-            if file_path.suffix.lower() in cls.SUPPORTED_EXTENSIONS:
-                try:
-                    loaded_docs = cls.load_document(str(file_path))
-                    documents.extend(loaded_docs)
-                except Exception as e:
-                    print(f"Failed to load {file_path}: {e}")
+        def collect(results):
+            # Load times are measured where the task ran and recorded here
+            for loaded_docs, seconds in results:
+                metrics.observe("loader.task", seconds)
+                documents.extend(loaded_docs)
         
+        with metrics.timer("loader.load_documents"):
+            if workers <= 1:
+                collect(map(_load_task, tasks))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    collect(executor.map(_load_task, tasks))
+        metrics.increment("loader.files", len(file_paths))
+        metrics.increment("loader.documents", len(documents))
         return documents
+    
+    @classmethod
+    def load_documents_from_directory(cls, directory_path: str, max_workers: Optional[int] = None) -> List[Document]:
+        """Load all supported documents from a directory"""
+        directory = Path(directory_path)
+        file_paths = [
+            str(file_path) for file_path in sorted(directory.iterdir())
+            if file_path.suffix.lower() in cls.SUPPORTED_EXTENSIONS
+        ]
+        return cls.load_documents(file_paths, max_workers=max_workers)
@@ -1,15 +1,28 @@
-from typing import List
+import hashlib
+from typing import Iterable, Iterator, List, Optional
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from config.settings import settings
+from backend.metrics import metrics
+
+
+def document_id(document: Document) -> str:
+    """Content-addressed ID of a loaded document (one page, slide or text block of a file)"""
+    metadata = document.metadata
+    position = metadata.get("page_number", metadata.get("slide_number", metadata.get("block_number", "")))
+    key = "\x1f".join([str(metadata.get("source", "")), str(position), document.page_content])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
 
 
 class DocumentProcessor:
     """Process documents by chunking them into smaller pieces"""
     
-    def __init__(self, chunk_size: int = None, chunk_overlap: int = None):
+    def __init__(self, chunk_size: int = None, chunk_overlap: int = None, document_store=None):
+        """document_store (a DocumentStore) receives the full text of every chunked document,
+        so chunks can be stored as offsets into it and expanded at search time"""
         self.chunk_size = chunk_size or settings.CHUNK_SIZE
         self.chunk_overlap = chunk_overlap or settings.CHUNK_OVERLAP
+        self.document_store = document_store
         
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size,
@@ -17,22 +30,51 @@ class DocumentProcessor:
             separators=["\n\n", "\n", " ", ""]
         )
     
-    def process_documents(self, documents: List[Document]) -> List[Document]:
-        """Split documents into chunks"""
-        chunked_docs = []
+    def _offsets(self, text: str, chunks: List[str]) -> List[Optional[int]]:
+        """Locate each chunk in the source text, scanning forward past the previous chunk's overlap
+
+        A chunk not found at or after the cursor gets None rather than an earlier identical
+        passage, and is stored with its text inline.
+        """
+        starts = []
+        cursor = 0
+        for chunk in chunks:
+            start = text.find(chunk, cursor)
+            starts.append(start if start != -1 else None)
+            if start != -1:
+                cursor = max(cursor, start + len(chunk) - self.chunk_overlap)
+        return starts
+    
+    def iter_chunks(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Lazily split documents into chunks as they arrive
         
+        Each chunk records doc_id and its start_offset/end_offset in the document text.
+        """
         for doc in documents:
-            chunks = self.text_splitter.split_text(doc.page_content)
+            with metrics.timer("processor.split"):
+                chunks = self.text_splitter.split_text(doc.page_content)
+                starts = self._offsets(doc.page_content, chunks)
+            metrics.increment("processor.chunks", len(chunks))
+            if not chunks:
+                continue
             
-            for chunk_idx, chunk in enumerate(chunks):
+            doc_id = document_id(doc)
+            if self.document_store is not None:
+                self.document_store.put_document(doc_id, doc)
+            
+            for chunk_idx, (chunk, start) in enumerate(zip(chunks, starts)):
                 metadata = doc.metadata.copy()
                 metadata["chunk_index"] = chunk_idx
+                metadata["doc_id"] = doc_id
+                if start is not None:
+                    metadata["start_offset"] = start
+                    metadata["end_offset"] = start + len(chunk)
                 
-                chunked_docs.append(
-                    Document(
-                        page_content=chunk,
-                        metadata=metadata
-                    )
+                yield Document(
+                    page_content=chunk,
+                    metadata=metadata
                 )
-        
-        return chunked_docs
+    
+    def process_documents(self, documents: List[Document]) -> List[Document]:
+        """Split documents into chunks"""
+        return list(self.iter_chunks(documents))
@@ -0,0 +1,4 @@
+from .jobs import IngestionWorker, JobQueue
+from .sync import DirectorySync
+
+__all__ = ["DirectorySync", "IngestionWorker", "JobQueue"]
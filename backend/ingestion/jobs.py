@@ -0,0 +1,427 @@
+"""Persistent background ingestion jobs
+
+Usage (from the project root):
+    python -m backend.ingestion.jobs submit file1.pdf file2.docx
+    python -m backend.ingestion.jobs worker              # process queued jobs until interrupted
+    python -m backend.ingestion.jobs list
+    python -m backend.ingestion.jobs cancel 3
+    python -m backend.ingestion.jobs resume 3
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional, Union
+
+from config.settings import settings
+from backend.metrics import metrics
+from .sync import DirectorySync
+
+if TYPE_CHECKING:
+    from backend.vector_store import ChromaVectorStore, ShardedVectorStore
+
+JOB_STATUSES = ("queued", "running", "done", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job when cancellation was requested"""
+
+
+class JobLost(Exception):
+    """Raised inside a running job when another worker has taken it over"""
+
+
+class JobQueue:
+    """Ingestion jobs and their files in SQLite, shared by the UI and any worker process
+
+    A job is a list of files. Each file is checkpointed when it has been ingested, so a
+    cancelled, failed or interrupted job resumes with the files that are still pending.
+    A running job records the worker that claimed it and that worker's last heartbeat;
+    only jobs whose heartbeat is older than JOB_STALE_AFTER are taken over by others.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = str(db_path or Path(settings.CHROMA_DB_PATH) / f"{settings.VECTOR_STORE_COLLECTION}_jobs.sqlite3")
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                current_file TEXT,
+                current_chunks INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                worker_id TEXT,
+                heartbeat_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS job_files (
+                job_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                chunks INTEGER NOT NULL DEFAULT 0,
+                seconds REAL NOT NULL DEFAULT 0,
+                error TEXT,
+                PRIMARY KEY (job_id, position)
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+        """)
+        # Queues created before jobs had owners
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, column_type in (("worker_id", "TEXT"), ("heartbeat_at", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+        self._conn.commit()
+
+    def submit(self, paths: Iterable[str]) -> int:
+        """Queue a job ingesting the given files; returns its ID"""
+        paths = [str(Path(path).resolve()) for path in paths]
+        if not paths:
+            raise ValueError("A job needs at least one file")
+        with self._lock, self._conn:
+            job_id = self._conn.execute(
+                "INSERT INTO jobs (status, created_at) VALUES ('queued', ?)", (time.time(),)
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT INTO job_files (job_id, position, path) VALUES (?, ?, ?)",
+                [(job_id, position, path) for position, path in enumerate(paths)],
+            )
+        return job_id
+
+    def claim(self, worker_id: str) -> Optional[int]:
+        """Mark the oldest queued job as running by worker_id and return its ID, or None when the queue is empty"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = COALESCE(started_at, ?), error = NULL, "
+                "worker_id = ?, heartbeat_at = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1) AND status = 'queued' "
+                "RETURNING id",
+                (now, worker_id, now),
+            ).fetchone()
+        return row["id"] if row else None
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """Record that worker_id is still running the job; False when it no longer owns it"""
+        with self._lock, self._conn:
+            return bool(self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running' AND worker_id = ?",
+                (time.time(), job_id, worker_id),
+            ).rowcount)
+
+    def pending_files(self, job_id: int) -> List[tuple]:
+        """(position, path) of the files of a job not yet ingested, in submission order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT position, path FROM job_files WHERE job_id = ? AND status = 'pending' ORDER BY position",
+                (job_id,),
+            ).fetchall()
+        return [(row["position"], row["path"]) for row in rows]
+
+    def set_current(self, job_id: int, path: Optional[str], chunks: int = 0):
+        """Record the file being ingested and how many of its chunks have been processed"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET current_file = ?, current_chunks = ? WHERE id = ?", (path, chunks, job_id)
+            )
+
+    def file_finished(self, job_id: int, position: int, chunks: int, seconds: float, error: Optional[str] = None):
+        """Checkpoint one file as done, or as failed with error"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE job_files SET status = ?, chunks = ?, seconds = seconds + ?, error = ? "
+                "WHERE job_id = ? AND position = ?",
+                ("failed" if error else "done", chunks, seconds, error, job_id, position),
+            )
+
+    def finish(self, job_id: int, status: str, error: Optional[str] = None, worker_id: Optional[str] = None):
+        """Record a job's final status; with worker_id, only if that worker still owns the job"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ?, current_file = NULL, current_chunks = 0, "
+                "cancel_requested = 0, heartbeat_at = NULL WHERE id = ? AND (? IS NULL OR worker_id = ?)",
+                (status, time.time(), error, job_id, worker_id, worker_id),
+            )
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued job at once, or ask a running one to stop after its current batch"""
+        with self._lock, self._conn:
+            cancelled = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            ).rowcount
+            if not cancelled:
+                cancelled = self._conn.execute(
+                    "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,)
+                ).rowcount
+        return bool(cancelled)
+
+    def cancel_requested(self, job_id: int) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def resume(self, job_id: int) -> bool:
+        """Queue a cancelled or failed job again; its failed files are retried, done files are kept"""
+        with self._lock, self._conn:
+            resumed = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', finished_at = NULL, error = NULL, cancel_requested = 0 "
+                "WHERE id = ? AND status IN ('cancelled', 'failed', 'done')",
+                (job_id,),
+            ).rowcount
+            if resumed:
+                self._conn.execute(
+                    "UPDATE job_files SET status = 'pending', error = NULL WHERE job_id = ? AND status = 'failed'",
+                    (job_id,),
+                )
+        return bool(resumed)
+
+    def recover(self, stale_after: Optional[float] = None) -> int:
+        """Queue again the running jobs whose worker stopped sending heartbeats (e.g. the app was restarted)
+
+        Jobs of live workers, in this or another process, are left alone.
+        """
+        stale_after = settings.JOB_STALE_AFTER if stale_after is None else stale_after
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "UPDATE jobs SET status = 'queued', current_file = NULL, current_chunks = 0, worker_id = NULL, "
+                "heartbeat_at = NULL WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (time.time() - stale_after,),
+            ).rowcount
+
+    def _summary(self, job: sqlite3.Row) -> dict:
+        files = self._conn.execute(
+            "SELECT status, COUNT(*) AS files, SUM(chunks) AS chunks, SUM(seconds) AS seconds "
+            "FROM job_files WHERE job_id = ? GROUP BY status",
+            (job["id"],),
+        ).fetchall()
+        by_status = {row["status"]: row for row in files}
+        total = sum(row["files"] for row in files)
+        done = by_status["done"]["files"] if "done" in by_status else 0
+        failed = by_status["failed"]["files"] if "failed" in by_status else 0
+        chunks = sum(row["chunks"] or 0 for row in files)
+        seconds = sum(row["seconds"] or 0 for row in files)
+        # Throughput over the time spent ingesting, so pauses between resumes do not count
+        return {
+            "id": job["id"],
+            "status": job["status"],
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+            "files_total": total,
+            "files_done": done,
+            "files_failed": failed,
+            "progress": round((done + failed) / total, 4) if total else 1.0,
+            "chunks_added": chunks,
+            "current_file": Path(job["current_file"]).name if job["current_file"] else None,
+            "current_chunks": job["current_chunks"],
+            "files_per_sec": round((done + failed) / seconds, 3) if seconds else None,
+            "chunks_per_sec": round(chunks / seconds, 2) if seconds else None,
+            "cancel_requested": bool(job["cancel_requested"]),
+            "worker_id": job["worker_id"],
+            "error": job["error"],
+        }
+
+    def get(self, job_id: int, include_files: bool = True) -> Optional[dict]:
+        """Return a job's progress summary (and its files), or None for an unknown ID"""
+        with self._lock:
+            job = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            summary = self._summary(job)
+            if include_files:
+                summary["files"] = [
+                    {"file": Path(row["path"]).name, "status": row["status"], "chunks": row["chunks"],
+                     "seconds": round(row["seconds"], 3), "error": row["error"]}
+                    for row in self._conn.execute(
+                        "SELECT * FROM job_files WHERE job_id = ? ORDER BY position", (job_id,)
+                    )
+                ]
+        return summary
+
+    def list_jobs(self, limit: int = 20) -> List[dict]:
+        """Most recent jobs first, without their file lists"""
+        with self._lock:
+            jobs = self._conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+            return [self._summary(job) for job in jobs]
+
+    def active_count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class IngestionWorker:
+    """Runs queued ingestion jobs on a background thread, outside any UI request
+
+    Files are ingested one at a time through DirectorySync.ingest_file, so the sync
+    manifest stays current and a later folder sync does not ingest them again.
+    Cancellation is checked after every embedded batch; chunk IDs are content-addressed,
+    so a file interrupted half-way is cheap to ingest again on resume. While a job runs,
+    a heartbeat every JOB_HEARTBEAT_INTERVAL seconds keeps other workers from taking it
+    over; a worker that finds its job taken over stops working on it.
+    """
+
+    def __init__(
+        self,
+        vector_store: Union["ChromaVectorStore", "ShardedVectorStore"],
+        queue: Optional[JobQueue] = None,
+        poll_interval: Optional[float] = None,
+    ):
+        self.vector_store = vector_store
+        self.queue = queue or JobQueue()
+        self.poll_interval = settings.JOB_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _check(self, job_id: int):
+        """Stop the job if it was cancelled or another worker took it over"""
+        if not self.queue.heartbeat(job_id, self.worker_id):
+            raise JobLost(f"Job {job_id} was taken over by another worker")
+        if self.queue.cancel_requested(job_id):
+            raise JobCancelled(f"Job {job_id} cancelled")
+
+    def _send_heartbeats(self, job_id: int, job_over: threading.Event):
+        """Heartbeat between progress reports, e.g. while a large file is parsed or a batch embedded"""
+        while not job_over.wait(settings.JOB_HEARTBEAT_INTERVAL):
+            try:
+                if not self.queue.heartbeat(job_id, self.worker_id):
+                    return
+            except sqlite3.Error as e:
+                print(f"Error sending heartbeat for job {job_id}: {e}")
+
+    def run_job(self, job_id: int) -> str:
+        """Ingest the pending files of a job claimed by this worker and return its final status"""
+        directory_sync = DirectorySync(self.vector_store)
+        job_over = threading.Event()
+        threading.Thread(
+            target=self._send_heartbeats, args=(job_id, job_over), name=f"job-{job_id}-heartbeat", daemon=True
+        ).start()
+        try:
+            for position, path in self.queue.pending_files(job_id):
+                self._check(job_id)
+                self.queue.set_current(job_id, path)
+
+                def report_progress(done: int, total: Optional[int]):
+                    self.queue.set_current(job_id, path, done)
+                    self._check(job_id)
+
+                started = time.perf_counter()
+                try:
+                    with metrics.timer("jobs.file"):
+                        chunks = directory_sync.ingest_file(path, progress_callback=report_progress)
+                except (JobCancelled, JobLost):
+                    raise
+                except Exception as e:
+                    # One unreadable file does not fail the whole job
+                    print(f"Error ingesting {path}: {e}")
+                    self.queue.file_finished(job_id, position, 0, time.perf_counter() - started, error=str(e))
+                    continue
+                self.queue.file_finished(job_id, position, chunks, time.perf_counter() - started)
+        except JobLost as e:
+            print(e)
+            return "lost"
+        except JobCancelled:
+            self.queue.finish(job_id, "cancelled", worker_id=self.worker_id)
+            return "cancelled"
+        except Exception as e:
+            print(f"Error running ingestion job {job_id}: {e}")
+            self.queue.finish(job_id, "failed", error=str(e), worker_id=self.worker_id)
+            return "failed"
+        finally:
+            job_over.set()
+        self.queue.finish(job_id, "done", worker_id=self.worker_id)
+        return "done"
+
+    def run_pending(self) -> int:
+        """Run queued jobs until the queue is empty; returns how many ran"""
+        count = 0
+        while not self._stop.is_set():
+            job_id = self.queue.claim(self.worker_id)
+            if job_id is None:
+                break
+            print(f"Ingestion job {job_id}: {self.run_job(job_id)}")
+            count += 1
+        return count
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                # Also picks up jobs of workers that stopped while this one was running
+                recovered = self.queue.recover()
+                if recovered:
+                    print(f"Resuming {recovered} interrupted ingestion jobs")
+                self.run_pending()
+            except Exception as e:
+                print(f"Error in ingestion worker: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def start(self) -> "IngestionWorker":
+        """Start polling on a daemon thread; jobs interrupted by a restart are queued again once stale"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="ingestion-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Submit and run background ingestion jobs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    submit = subparsers.add_parser("submit", help="Queue files for ingestion")
+    submit.add_argument("paths", nargs="+")
+    subparsers.add_parser("worker", help="Process queued jobs until interrupted")
+    subparsers.add_parser("list", help="Show recent jobs")
+    for command in ("status", "cancel", "resume"):
+        subparsers.add_parser(command).add_argument("job_id", type=int)
+    args = parser.parse_args(argv)
+
+    queue = JobQueue()
+    if args.command == "submit":
+        print(f"Queued job {queue.submit(args.paths)}")
+    elif args.command == "list":
+        print(json.dumps(queue.list_jobs(), indent=2))
+    elif args.command == "status":
+        print(json.dumps(queue.get(args.job_id), indent=2))
+    elif args.command == "cancel":
+        print("Cancellation requested" if queue.cancel(args.job_id) else "Job is not queued or running")
+    elif args.command == "resume":
+        print("Job queued again" if queue.resume(args.job_id) else "Only cancelled, failed or finished jobs can be resumed")
+    else:
+        from backend.vector_store import ShardedVectorStore
+
+        worker = IngestionWorker(ShardedVectorStore(), queue).start()
+        print("Ingestion worker running (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            worker.stop()
+            print("Stopped ingestion worker")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
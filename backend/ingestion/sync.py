@@ -0,0 +1,309 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from langchain_core.documents import Document
+from config.settings import settings
+from backend.document_processor import DocumentLoader, DocumentProcessor
+
+if TYPE_CHECKING:
+    from backend.vector_store import ChromaVectorStore, ShardedVectorStore
+
+
+def file_sha256(file_path: str, block_size: int = 1 << 20) -> str:
+    """Hash a file's content without reading it into memory at once"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class SyncManifest:
+    """Size, mtime and content hash of every ingested file, keyed by absolute path, in SQLite
+
+    Every change is written as its own row, so sync runs and ingestion jobs working at
+    the same time (UI, job worker, sync CLI) do not overwrite each other's entries.
+    """
+
+    def __init__(self, db_path: str, legacy_json_path: Optional[str] = None):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                chunked INTEGER NOT NULL DEFAULT 1
+            );
+        """)
+        self._conn.commit()
+        if legacy_json_path and Path(legacy_json_path).exists():
+            self._import_json(Path(legacy_json_path))
+
+    def _import_json(self, json_path: Path):
+        """Take over the entries of a JSON manifest written by earlier versions, then remove it"""
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                self.put(json.load(f).items())
+            os.remove(json_path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error importing sync manifest {json_path}: {e}")
+
+    @staticmethod
+    def _record(row: tuple) -> dict:
+        source, size, mtime_ns, sha256, chunked = row
+        return {"source": source, "size": size, "mtime_ns": mtime_ns, "sha256": sha256, "chunked": bool(chunked)}
+
+    def get(self, path_key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT source, size, mtime_ns, sha256, chunked FROM files WHERE path = ?", (path_key,)
+            ).fetchone()
+        return self._record(row) if row else None
+
+    def entries(self) -> Dict[str, dict]:
+        """Every recorded file, read afresh so other processes' changes are included"""
+        with self._lock:
+            rows = self._conn.execute("SELECT path, source, size, mtime_ns, sha256, chunked FROM files").fetchall()
+        return {row[0]: self._record(row[1:]) for row in rows}
+
+    def put(self, items: Iterable[tuple]):
+        """Record (path_key, record) pairs"""
+        rows = [
+            (path_key, record["source"], record["size"], record["mtime_ns"], record["sha256"], int(record.get("chunked", True)))
+            for path_key, record in items
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (path, source, size, mtime_ns, sha256, chunked) VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def remove(self, path_keys: Iterable[str]):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM files WHERE path = ?", [(path_key,) for path_key in path_keys])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class DirectorySync:
+    """Keeps the vector store in sync with a directory of documents
+
+    A manifest (SyncManifest) next to the Chroma data records size, mtime and content hash of every
+    ingested file. A sync only loads and embeds new or changed files and deletes the
+    chunks of files that were removed. Files whose source is no longer in the store (e.g.
+    after the collection was cleared) are ingested again even if unchanged.
+    """
+
+    def __init__(
+        self,
+        vector_store: Union["ChromaVectorStore", "ShardedVectorStore"],
+        processor: Optional[DocumentProcessor] = None,
+        manifest_path: Optional[str] = None,
+    ):
+        self.vector_store = vector_store
+        self.processor = processor or DocumentProcessor(document_store=vector_store.document_store)
+        default_path = Path(settings.CHROMA_DB_PATH) / f"{settings.VECTOR_STORE_COLLECTION}_sync_manifest.sqlite3"
+        self.manifest_path = Path(manifest_path or default_path)
+        self.manifest = SyncManifest(
+            self.manifest_path, legacy_json_path=None if manifest_path else default_path.with_suffix(".json")
+        )
+
+    @staticmethod
+    def _scan(directory: Path, recursive: bool) -> Dict[str, Path]:
+        """Return supported files keyed by absolute path, skipping duplicate file names"""
+        pattern = directory.rglob("*") if recursive else directory.iterdir()
+        files: Dict[str, Path] = {}
+        names: Dict[str, Path] = {}
+        for file_path in sorted(pattern):
+            if not file_path.is_file() or file_path.suffix.lower() not in DocumentLoader.SUPPORTED_EXTENSIONS:
+                continue
+            # Chunks are keyed by file name (source metadata), so names must be unique
+            if file_path.name in names:
+                print(f"Skipping {file_path}: same file name as {names[file_path.name]}")
+                continue
+            names[file_path.name] = file_path
+            files[str(file_path.resolve())] = file_path
+        return files
+
+    @staticmethod
+    def _track_sources(chunks: Iterable[Document], sources: set) -> Iterator[Document]:
+        """Pass chunks through while recording their sources"""
+        for chunk in chunks:
+            sources.add(chunk.metadata.get("source"))
+            yield chunk
+
+    def _ingest_batch(
+        self,
+        batch: List[tuple],
+        streamed: bool = False,
+        progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+    ) -> tuple:
+        """Load, chunk and embed (path_key, record) files, then checkpoint the manifest
+
+        Returns (chunks_added, chunks_removed).
+        """
+        if streamed:
+            documents = DocumentLoader.iter_document(batch[0][0])
+        else:
+            documents = DocumentLoader.load_documents([path_key for path_key, _ in batch])
+
+        chunked_sources = set()
+        chunks = self._track_sources(self.processor.iter_chunks(documents), chunked_sources)
+        # replace_sources drops the chunks of the previous version of modified files
+        chunks_added = len(self.vector_store.add_documents(
+            chunks, replace_sources=True, progress_callback=progress_callback
+        ))
+
+        # Modified files that now produce no chunks still need their old chunks removed
+        chunks_removed = 0
+        emptied = [record["source"] for path_key, record in batch
+                   if record["source"] not in chunked_sources and self.manifest.get(path_key) is not None]
+        if emptied:
+            chunks_removed = self.vector_store.delete_sources(emptied)
+
+        for path_key, record in batch:
+            # Files without chunks are not in the store's source list, which sync() checks
+            record["chunked"] = record["source"] in chunked_sources
+        # Checkpoint after every batch so an interrupted sync resumes where it stopped
+        self.manifest.put(batch)
+        return chunks_added, chunks_removed
+
+    def ingest_file(
+        self, file_path: str, progress_callback: Optional[Callable[[int, Optional[int]], None]] = None
+    ) -> int:
+        """Ingest one file (replacing its previous version) and record it in the manifest
+
+        The file is always loaded (the store may have been cleared since the manifest
+        entry was written); chunks already stored are skipped by add_documents.
+        progress_callback is passed to add_documents. Returns the number of chunks added.
+        """
+        path = Path(file_path).resolve()
+        path_key = str(path)
+        stat = path.stat()
+        record = {"source": path.name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_sha256(path_key)}
+        streamed = stat.st_size >= settings.STREAM_THRESHOLD_MB * 1024 * 1024
+        chunks_added, _ = self._ingest_batch([(path_key, record)], streamed, progress_callback)
+        return chunks_added
+
+    def sync(self, directory: Optional[str] = None, recursive: bool = False) -> dict:
+        """Bring the vector store in line with the directory and return a summary"""
+        directory = Path(directory or settings.UPLOAD_DOCS_PATH).resolve()
+        started = time.perf_counter()
+        files = self._scan(directory, recursive)
+
+        added, updated, unchanged = [], [], 0
+        manifest = self.manifest.entries()
+        stored_sources = {source["source"] for source in self.vector_store.list_sources()}
+        for path_key, file_path in files.items():
+            stat = file_path.stat()
+            entry = manifest.get(path_key)
+            if entry and entry["chunked"] and entry["source"] not in stored_sources:
+                # Recorded but no longer stored: the collection was cleared or the source deleted
+                added.append((path_key, {"source": file_path.name, "size": stat.st_size,
+                                         "mtime_ns": stat.st_mtime_ns, "sha256": file_sha256(str(file_path))}))
+                continue
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                unchanged += 1
+                continue
+
+            digest = file_sha256(str(file_path))
+            if entry and entry["sha256"] == digest:
+                # Touched but identical: only refresh the manifest
+                self.manifest.put([(path_key, dict(entry, size=stat.st_size, mtime_ns=stat.st_mtime_ns))])
+                unchanged += 1
+                continue
+
+            record = {"source": file_path.name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+            (updated if entry else added).append((path_key, record))
+
+        # Files that disappeared from the directory (or moved out of scope)
+        prefix = str(directory) + os.sep
+        removed = [
+            path_key for path_key in manifest
+            if path_key.startswith(prefix) and path_key not in files
+            and (recursive or os.path.dirname(path_key) == str(directory))
+        ]
+
+        chunks_removed = 0
+        if removed:
+            chunks_removed += self.vector_store.delete_sources(manifest[key]["source"] for key in removed)
+            self.manifest.remove(removed)
+
+        chunks_added = 0
+        changed = added + updated
+        batch_files = max(1, settings.SYNC_BATCH_FILES)
+
+        # Very large files are streamed one at a time; the rest are parsed in parallel batches
+        stream_bytes = settings.STREAM_THRESHOLD_MB * 1024 * 1024
+        large = [item for item in changed if item[1]["size"] >= stream_bytes]
+        small = [item for item in changed if item[1]["size"] < stream_bytes]
+        batches = [(True, [item]) for item in large]
+        batches += [(False, small[i:i + batch_files]) for i in range(0, len(small), batch_files)]
+
+        for streamed, batch in batches:
+            batch_added, batch_removed = self._ingest_batch(batch, streamed)
+            chunks_added += batch_added
+            chunks_removed += batch_removed
+
+        summary = {
+            "directory": str(directory),
+            "added": [files[key].name for key, _ in added],
+            "updated": [files[key].name for key, _ in updated],
+            "removed": [Path(key).name for key in removed],
+            "unchanged": unchanged,
+            "chunks_added": chunks_added,
+            "chunks_removed": chunks_removed,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        print(f"Sync of {directory}: {len(added)} added, {len(updated)} updated, "
+              f"{len(removed)} removed, {unchanged} unchanged")
+        return summary
+
+    def watch(self, directory: Optional[str] = None, interval: float = 30.0, recursive: bool = False):
+        """Poll the directory and sync it every interval seconds until interrupted"""
+        print(f"Watching {directory or settings.UPLOAD_DOCS_PATH} every {interval}s (Ctrl+C to stop)")
+        try:
+            while True:
+                try:
+                    self.sync(directory, recursive=recursive)
+                except Exception as e:
+                    print(f"Error syncing directory: {e}")
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print("Stopped watching")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Incrementally sync a document directory into the vector store")
+    parser.add_argument("directory", nargs="?", default=settings.UPLOAD_DOCS_PATH, help="Directory to sync (default: UPLOAD_DOCS_PATH)")
+    parser.add_argument("--recursive", action="store_true", help="Include subdirectories")
+    parser.add_argument("--watch", action="store_true", help="Keep polling the directory for changes")
+    parser.add_argument("--interval", type=float, default=settings.SYNC_WATCH_INTERVAL, help="Polling interval in seconds")
+    args = parser.parse_args(argv)
+
+    from backend.vector_store import ShardedVectorStore
+
+    directory_sync = DirectorySync(ShardedVectorStore())
+    if args.watch:
+        directory_sync.watch(args.directory, interval=args.interval, recursive=args.recursive)
+    else:
+        print(json.dumps(directory_sync.sync(args.directory, recursive=args.recursive), indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,36 @@
-from .chroma_store import ChromaVectorStore
+from .bm25_index import BM25Index
+from .cache import LRUCache
+from .centroid_index import CentroidIndex
+from .chroma_store import ChromaVectorStore, fuse_rankings, make_chunk_id
+from .document_store import DocumentStore
+from .embedding_backends import OnnxEmbeddings, create_embeddings
+from .embedding_cache import CachedEmbeddings, EmbeddingCache
+from .numpy_store import NumpyCollection, NumpyVectorStore, create_vector_store
+from .quantization import VectorCodec
+from .sharded_store import ShardedVectorStore
+from .snapshot import export_snapshot, import_snapshot, verify_snapshot
+from .source_registry import SourceRegistry, build_where
 
-__all__ = ["ChromaVectorStore"]
+__all__ = [
+    "BM25Index",
+    "CachedEmbeddings",
+    "CentroidIndex",
+    "ChromaVectorStore",
+    "DocumentStore",
+    "EmbeddingCache",
+    "LRUCache",
+    "NumpyCollection",
+    "NumpyVectorStore",
+    "OnnxEmbeddings",
+    "ShardedVectorStore",
+    "SourceRegistry",
+    "VectorCodec",
+    "build_where",
+    "create_embeddings",
+    "create_vector_store",
+    "export_snapshot",
+    "fuse_rankings",
+    "import_snapshot",
+    "make_chunk_id",
+    "verify_snapshot",
+]
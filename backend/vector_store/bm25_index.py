@@ -0,0 +1,138 @@
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+# Compound identifiers (user_accounts, db.pool.size, ERR-4012) are kept whole
+_TOKEN_RE = re.compile(r"\w+(?:[.\-:/]\w+)*")
+_PART_RE = re.compile(r"[A-Za-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase tokens; compound identifiers also contribute their alphanumeric parts"""
+    tokens = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = match.group(0)
+        tokens.append(token)
+        parts = _PART_RE.findall(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class BM25Index:
+    """On-disk inverted index scored with Okapi BM25, stored in SQLite"""
+
+    def __init__(self, db_path: str, k1: float = 1.2, b: float = 0.75):
+        self.db_path = str(db_path)
+        self.k1 = k1
+        self.b = b
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS docs (id TEXT PRIMARY KEY, length INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+        """)
+        self._conn.commit()
+
+    def _delete_locked(self, ids: List[str]):
+        self._conn.executemany("DELETE FROM postings WHERE doc_id = ?", [(i,) for i in ids])
+        self._conn.executemany("DELETE FROM docs WHERE id = ?", [(i,) for i in ids])
+
+    def _add_locked(self, ids: List[str], texts: List[str]):
+        rows, postings = [], []
+        for doc_id, text in zip(ids, texts):
+            counts = Counter(tokenize(text))
+            rows.append((doc_id, sum(counts.values())))
+            postings.extend((term, doc_id, tf) for term, tf in counts.items())
+        self._delete_locked(list(ids))
+        self._conn.executemany("INSERT INTO docs (id, length) VALUES (?, ?)", rows)
+        self._conn.executemany("INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)", postings)
+
+    def add(self, ids: List[str], texts: List[str]):
+        """Index (or re-index) chunks by ID"""
+        with self._lock, self._conn:
+            self._add_locked(ids, texts)
+
+    def delete(self, ids: Iterable[str]):
+        """Remove chunks from the index"""
+        with self._lock, self._conn:
+            self._delete_locked(list(ids))
+
+    def clear(self):
+        """Remove every chunk from the index"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM docs")
+
+    def rebuild(self, expected_count: int, batches: Iterable[Tuple[List[str], List[str]]]) -> bool:
+        """Replace the index with batches of (ids, texts), unless it already holds expected_count chunks
+
+        The count is checked again under SQLite's write lock, so concurrent rebuilds (from
+        other threads or processes) index the collection once. Returns whether it rebuilt.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0] == expected_count:
+                    self._conn.rollback()
+                    return False
+                self._conn.execute("DELETE FROM postings")
+                self._conn.execute("DELETE FROM docs")
+                for ids, texts in batches:
+                    self._add_locked(ids, texts)
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return True
+
+    def count(self) -> int:
+        """Number of indexed chunks"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Return up to k (chunk_id, bm25_score) pairs, best first"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            doc_count, total_length = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs"
+            ).fetchone()
+            if not doc_count:
+                return []
+            avg_length = total_length / doc_count
+
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._conn.execute(
+                    "SELECT p.doc_id, p.tf, d.length FROM postings p JOIN docs d ON d.id = p.doc_id "
+                    "WHERE p.term = ?",
+                    (term,)
+                ).fetchall()
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf, length in postings:
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
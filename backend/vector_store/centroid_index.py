@@ -0,0 +1,218 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .quantization import kmeans
+
+
+class CentroidIndex:
+    """Mean chunk embedding of every loaded document (page, slide or text block), stored in SQLite
+
+    Used as the first stage of hierarchical search: the query is compared with the
+    centroids to pick a few candidate documents, and only their chunks are searched.
+    Sums and counts are stored, so chunks can be added incrementally.
+
+    With probe > 0 and at least MIN_CLUSTERED_DOCUMENTS documents, the centroids are
+    themselves grouped into about sqrt(n) k-means clusters, and a search scores only the
+    centroids of the probe clusters closest to the query, so both stages scan a fraction
+    of the collection. Cluster centers are refitted when the document count has doubled
+    since the last fit; otherwise changed centroids are only reassigned.
+    """
+
+    MIN_CLUSTERED_DOCUMENTS = 1024
+    # Centroids per cluster used to fit the cluster centers
+    TRAIN_PER_CLUSTER = 64
+
+    def __init__(self, db_path: str, probe: int = 0):
+        self.db_path = str(db_path)
+        self.probe = probe
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS centroids (
+                doc_id TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                chunk_count INTEGER NOT NULL,
+                vector_sum BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS centroids_source ON centroids (source);
+        """)
+        self._conn.commit()
+        # Normalized centroid matrix, rebuilt on the first search after a change
+        self._matrix: Optional[np.ndarray] = None
+        self._doc_ids: List[str] = []
+        self._data_version = None
+        # Cluster centers (normalized) and the centroid rows of each cluster
+        self._centers: Optional[np.ndarray] = None
+        self._members: Optional[List[np.ndarray]] = None
+        self._fitted_count = 0
+
+    @staticmethod
+    def _group(metadatas: Iterable[Optional[dict]], embeddings: Sequence[Sequence[float]]) -> Dict[str, list]:
+        """Sum embeddings per doc_id: {doc_id: [source, count, sum]}"""
+        groups: Dict[str, list] = {}
+        for metadata, embedding in zip(metadatas, embeddings):
+            metadata = metadata or {}
+            doc_id = metadata.get("doc_id")
+            if doc_id is None:
+                continue
+            vector = np.asarray(embedding, dtype=np.float32)
+            entry = groups.get(doc_id)
+            if entry is None:
+                groups[doc_id] = [metadata.get("source", ""), 1, vector.copy()]
+            else:
+                entry[1] += 1
+                entry[2] += vector
+        return groups
+
+    def _invalidate(self):
+        self._matrix = None
+
+    def _add_locked(self, groups: Dict[str, list]):
+        doc_ids = list(groups)
+        for start in range(0, len(doc_ids), 500):
+            batch = doc_ids[start:start + 500]
+            for doc_id, count, blob in self._conn.execute(
+                f"SELECT doc_id, chunk_count, vector_sum FROM centroids WHERE doc_id IN ({','.join('?' * len(batch))})",
+                batch,
+            ):
+                groups[doc_id][1] += count
+                groups[doc_id][2] += np.frombuffer(blob, dtype=np.float32)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO centroids (doc_id, source, chunk_count, vector_sum) VALUES (?, ?, ?, ?)",
+            [(doc_id, source, count, vector.tobytes()) for doc_id, (source, count, vector) in groups.items()],
+        )
+
+    def add(self, metadatas: Iterable[Optional[dict]], embeddings: Sequence[Sequence[float]]):
+        """Record newly stored chunks"""
+        groups = self._group(metadatas, embeddings)
+        if not groups:
+            return
+        with self._lock, self._conn:
+            self._add_locked(groups)
+            self._invalidate()
+
+    def replace_source(self, source: str, metadatas: Iterable[Optional[dict]], embeddings: Sequence[Sequence[float]]):
+        """Recompute the centroids of one source from its current chunks (none removes the source)"""
+        groups = self._group(metadatas, embeddings)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM centroids WHERE source = ?", (source,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO centroids (doc_id, source, chunk_count, vector_sum) VALUES (?, ?, ?, ?)",
+                [(doc_id, entry_source, count, vector.tobytes()) for doc_id, (entry_source, count, vector) in groups.items()],
+            )
+            self._invalidate()
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM centroids")
+            self._invalidate()
+            self._centers = None
+
+    def rebuild(self, expected_chunks: int, batches: Iterable[Tuple[List[Optional[dict]], Sequence[Sequence[float]]]]) -> bool:
+        """Replace the centroids with batches of (metadatas, embeddings), unless they already count expected_chunks
+
+        The count is checked again under SQLite's write lock, so concurrent rebuilds (from
+        other threads or processes) sum each chunk once. Returns whether it rebuilt.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                total = self._conn.execute("SELECT COALESCE(SUM(chunk_count), 0) FROM centroids").fetchone()[0]
+                if total == expected_chunks:
+                    self._conn.rollback()
+                    return False
+                self._conn.execute("DELETE FROM centroids")
+                for metadatas, embeddings in batches:
+                    groups = self._group(metadatas, embeddings)
+                    if groups:
+                        self._add_locked(groups)
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._invalidate()
+            self._centers = None
+        return True
+
+    def total_chunks(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(chunk_count), 0) FROM centroids").fetchone()[0]
+
+    def count(self) -> int:
+        """Number of documents with a centroid"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM centroids").fetchone()[0]
+
+    def _cluster_locked(self, matrix: np.ndarray):
+        """Assign every centroid to its closest cluster center, refitting the centers when needed"""
+        clusters = int(np.sqrt(len(matrix)))
+        if self._centers is None or len(matrix) >= 2 * self._fitted_count:
+            rng = np.random.default_rng(0)
+            sample = matrix[rng.choice(len(matrix), size=min(len(matrix), clusters * self.TRAIN_PER_CLUSTER), replace=False)]
+            centers = kmeans(sample, clusters, 10, rng)
+            self._centers = centers / np.maximum(np.linalg.norm(centers, axis=1, keepdims=True), 1e-12)
+            self._fitted_count = len(matrix)
+        assignment = np.concatenate([
+            (matrix[start:start + 65536] @ self._centers.T).argmax(axis=1) for start in range(0, len(matrix), 65536)
+        ])
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.searchsorted(assignment[order], np.arange(len(self._centers) + 1))
+        self._members = [order[bounds[c]:bounds[c + 1]] for c in range(len(self._centers))]
+
+    def _load_locked(self) -> Tuple[Optional[np.ndarray], List[str], Optional[tuple]]:
+        # Other processes' writes are picked up through SQLite's data_version
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._matrix is not None and data_version == self._data_version:
+            return self._matrix, self._doc_ids, self._clusters()
+        rows = self._conn.execute("SELECT doc_id, chunk_count, vector_sum FROM centroids ORDER BY doc_id").fetchall()
+        self._data_version = data_version
+        self._doc_ids = [doc_id for doc_id, _, _ in rows]
+        self._members = None
+        if not rows:
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+            return self._matrix, self._doc_ids, None
+        matrix = np.stack([np.frombuffer(blob, dtype=np.float32) / count for _, count, blob in rows])
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        self._matrix = matrix
+        if self.probe > 0 and len(matrix) >= self.MIN_CLUSTERED_DOCUMENTS:
+            self._cluster_locked(matrix)
+        return self._matrix, self._doc_ids, self._clusters()
+
+    def _clusters(self) -> Optional[tuple]:
+        return (self._centers, self._members) if self._members is not None else None
+
+    def search(self, embedding: Sequence[float], n: int) -> List[Tuple[str, float]]:
+        """Return up to n (doc_id, cosine similarity) pairs for the documents closest to embedding
+
+        When clustered, only centroids in the probe closest clusters are scored (more
+        clusters are taken if those hold fewer than n documents), so results are approximate.
+        """
+        with self._lock:
+            matrix, doc_ids, clusters = self._load_locked()
+        if not doc_ids or n <= 0:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        if clusters is None:
+            rows, scores = np.arange(len(doc_ids)), matrix @ query
+        else:
+            centers, members = clusters
+            ranked = np.argsort(-(centers @ query), kind="stable")
+            sizes = np.cumsum([len(members[c]) for c in ranked])
+            probe = max(self.probe, int(np.searchsorted(sizes, min(n, len(doc_ids)))) + 1)
+            rows = np.concatenate([members[c] for c in ranked[:probe]])
+            scores = matrix[rows] @ query
+        n = min(n, len(rows))
+        top = np.argpartition(-scores, n - 1)[:n] if n < len(rows) else np.arange(len(rows))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(doc_ids[rows[idx]], float(scores[idx])) for idx in top]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,7 +1,13 @@
-from typing import List
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, List, Dict, Iterable, Iterator, Optional, Callable
 from pathlib import Path
+import copy
+import hashlib
+import itertools
+import json
 import os
 import ssl
+import threading
 
 # MUST be set BEFORE importing anything from transformers/sentence_transformers
 # os.environ['HF_HUB_OFFLINE'] = '1'  # Force offline mode - use only local cached models
@@ -11,86 +17,761 @@ import ssl
 ssl._create_default_https_context = ssl._create_unverified_context
 
 from langchain_core.documents import Document
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
 from langchain_community.vectorstores import Chroma
 from config.settings import settings
+from backend.metrics import metrics
+from .bm25_index import BM25Index
+from .centroid_index import CentroidIndex
+from .cache import LRUCache
+from .embedding_backends import create_embeddings, resolve_model_name
+from .document_store import DocumentStore
+from .compaction import CompactSearchMixin, expand_hits
+from .embedding_cache import CachedEmbeddings, EmbeddingCache, model_cache_directory
+from .source_registry import SourceRegistry, build_where
 
 
-class ChromaVectorStore:
+_client_lock = threading.Lock()
+
+
+def _private_client() -> tuple:
+    """Open CHROMA_DB_PATH on a newly started Chroma system, returning (client, system)
+
+    Chroma shares one system per path within a process, and its public API offers no way
+    around that: PersistentClient returns the shared system, and clear_system_cache()
+    orphans the systems of every open client. The shared one is therefore set aside in
+    Chroma's system registry while the new system starts, then put back for every other
+    store. The registry is internal to Chroma, so requirements.txt pins the versions this
+    was tested with. Stop the returned system to release its indexes.
+    """
+    import chromadb
+    from chromadb.api.client import SharedSystemClient
+    systems = getattr(SharedSystemClient, "_identifier_to_system", None)
+    if not isinstance(systems, dict):
+        raise RuntimeError(
+            f"chromadb {chromadb.__version__} does not keep its systems where reopen() expects them; "
+            "install the chromadb version pinned in requirements.txt"
+        )
+    path = settings.CHROMA_DB_PATH
+    with _client_lock:
+        shared = systems.pop(path, None)
+        try:
+            client = chromadb.Client(chromadb.config.Settings(is_persistent=True, persist_directory=path))
+            system = systems[path]
+        finally:
+            if shared is not None:
+                systems[path] = shared
+            else:
+                systems.pop(path, None)
+    return client, system
+
+
+def make_chunk_id(document: Document, model_name: str) -> str:
+    """Build a deterministic chunk ID from source, chunk position, content and embedding model"""
+    metadata = document.metadata
+    position = metadata.get("page_number", metadata.get("slide_number", metadata.get("block_number", "")))
+    key = "\x1f".join([
+        model_name,
+        str(metadata.get("source", "")),
+        str(position),
+        str(metadata.get("chunk_index", "")),
+        document.page_content,
+    ])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace so trivially different spellings of a query share cache entries"""
+    return " ".join(query.split())
+
+
+def _filters_key(filters: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(filters or {}, sort_keys=True, default=str)
+
+
+def fuse_rankings(rankings: List[List[tuple]], k: int) -> List[tuple]:
+    """Merge ranked (chunk_id, Document, score) lists with reciprocal rank fusion, deduplicating by ID"""
+    fused: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for hits in rankings:
+        for rank, (chunk_id, doc, _) in enumerate(hits):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (settings.RRF_K + rank + 1)
+            docs.setdefault(chunk_id, doc)
+    ranked = sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:k]
+    return [(chunk_id, docs[chunk_id], score) for chunk_id, score in ranked]
+
+
+class StoreRetriever(BaseRetriever):
+    """LangChain retriever over a store's search_documents, so chunk text comes from the DocumentStore
+
+    collections selects shards when the store is a ShardedVectorStore.
+    """
+
+    store: Any
+    k: int = 5
+    mode: str = "vector"
+    filters: Optional[Dict[str, Any]] = None
+    collections: Optional[List[str]] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        kwargs = {"collections": self.collections} if self.collections is not None else {}
+        return self.store.search_documents(query, k=self.k, mode=self.mode, filters=self.filters, **kwargs)
+
+
+class ChromaVectorStore(CompactSearchMixin):
     """Manages Chroma vector database for document storage and retrieval"""
     
-    def __init__(self):
-        """Initialize embeddings and vector store"""
-        # Use HuggingFace embeddings from locally saved model files
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={"device": "cpu"}
+    # Upper bound on IDs sent to Chroma in a single get/delete call
+    ID_LOOKUP_BATCH_SIZE = 1000
+    
+    SEARCH_MODES = ("vector", "lexical", "hybrid", "hierarchical")
+    # Modes whose scores are distances (lower is closer)
+    DISTANCE_MODES = ("vector", "hierarchical")
+    
+    VECTOR_BACKEND = "chroma"
+    
+    # Set by reopen(): a Chroma client and system of this store's own instead of the shared ones
+    _client = None
+    _system = None
+    
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings] = None,
+        model_name: Optional[str] = None,
+        collection_name: Optional[str] = None,
+    ):
+        """Initialize embeddings and vector store
+        
+        By default EMBEDDING_MODEL is loaded from locally saved model files with the
+        EMBEDDING_BACKEND runtime. embeddings overrides it (e.g. a fake model for benchmarks);
+        model_name identifies it in chunk IDs and cache keys. collection_name defaults to
+        VECTOR_STORE_COLLECTION.
+        """
+        if embeddings is not None:
+            self.model_name = model_name or type(embeddings).__name__
+            self.embeddings = embeddings
+        else:
+            self.model_name = resolve_model_name(settings.EMBEDDING_MODEL)
+            self.embeddings = create_embeddings(model_name=self.model_name)
+        
+        # Queries bypass the on-disk document cache and go straight to the model
+        self.query_model = self.embeddings
+        
+        # Document embeddings are looked up on disk by content hash before running the model
+        self.embedding_cache = None
+        if settings.EMBEDDING_CACHE_ENABLED:
+            self.embedding_cache = EmbeddingCache(
+                model_cache_directory(settings.EMBEDDING_CACHE_PATH, self.model_name),
+                max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+                dtype=settings.EMBEDDING_CACHE_DTYPE
+            )
+            self.embeddings = CachedEmbeddings(self.embeddings, self.model_name, self.embedding_cache)
+        
+        # Query embeddings depend only on the model, so they are shared by every collection
+        self.query_embedding_cache = LRUCache(settings.QUERY_CACHE_SIZE, settings.SEARCH_CACHE_TTL)
+        self._init_collection(collection_name or settings.VECTOR_STORE_COLLECTION)
+    
+    def _init_collection(self, collection_name: str):
+        """Open the Chroma collection and its sidecar indexes"""
+        self.collection_name = collection_name
+        # Search results are keyed by collection version
+        self.result_cache = LRUCache(settings.RESULT_CACHE_SIZE, settings.SEARCH_CACHE_TTL)
+        
+        # Lexical (BM25) index kept alongside the Chroma collection
+        self.lexical_index = BM25Index(
+            Path(settings.CHROMA_DB_PATH) / f"{collection_name}_bm25.sqlite3"
+        )
+        # Per-source summary used to validate and expand search filters
+        self.source_registry = SourceRegistry(
+            Path(settings.CHROMA_DB_PATH) / f"{collection_name}_sources.sqlite3"
+        )
+        # Full text of each loaded page/slide/block; chunks point into it by offset
+        self.document_store = DocumentStore(
+            Path(settings.CHROMA_DB_PATH) / f"{collection_name}_documents.sqlite3"
         )
+        # Mean embedding of each page/slide/block for the first stage of hierarchical search
+        self.centroid_index = CentroidIndex(
+            Path(settings.CHROMA_DB_PATH) / f"{collection_name}_centroids.sqlite3",
+            probe=settings.HIERARCHICAL_PROBE
+        )
+        self._centroids_checked_version = None
         
         self.vector_store = None
         self._initialize_store()
     
+    def open_collection(self, collection_name: str) -> "ChromaVectorStore":
+        """Return a store for another collection that shares this one's embedding model and caches"""
+        other = copy.copy(self)
+        other._client = other._system = None
+        other._init_collection(collection_name)
+        return other
+    
+    def reopen(self) -> "ChromaVectorStore":
+        """Return a store for this collection that reads it from disk afresh
+        
+        Chroma keeps the HNSW indexes of collections opened through its shared client in
+        memory, and they do not see writes made by other processes. The returned store
+        opens only this collection, on a Chroma system of its own that close() releases.
+        This store stays usable.
+        """
+        other = copy.copy(self)
+        other._client, other._system = _private_client()
+        other._init_collection(self.collection_name)
+        return other
+    
+    def close(self):
+        """Release the Chroma system opened by reopen(); stores on the shared client hold nothing to release"""
+        if self._system is not None:
+            self._system.stop()
+            self._system = None
+    
     def _initialize_store(self):
         """Initialize or load existing Chroma vector store"""
         self.vector_store = Chroma(
-            collection_name=settings.VECTOR_STORE_COLLECTION,
+            collection_name=self.collection_name,
             embedding_function=self.embeddings,
             persist_directory=settings.CHROMA_DB_PATH,
-            client_settings=None  # Use default settings for local Chroma
+            client_settings=None,  # Use default settings for local Chroma
+            client=self._client
         )
     
-    def add_documents(self, documents: List[Document]) -> List[str]:
-        """Add documents to the vector store"""
-        if not documents:
-            print("No documents to add")
-            return []
+    @property
+    def collection(self):
+        """The Chroma collection holding this store's vectors, texts and metadata"""
+        return self.vector_store._collection
+    
+    def _drop_collection(self):
+        """Delete the collection and recreate it empty"""
+        self.vector_store._client.delete_collection(name=self.collection_name)
+        self._initialize_store()
+    
+    def _persist(self):
+        self.vector_store.persist()
+    
+    def list_collection_names(self) -> List[str]:
+        """Names of every collection in the database at CHROMA_DB_PATH"""
+        return [getattr(collection, "name", collection) for collection in self.vector_store._client.list_collections()]
+    
+    @property
+    def _version_path(self) -> Path:
+        return Path(settings.CHROMA_DB_PATH) / f"{self.collection_name}.version"
+    
+    def collection_version(self) -> int:
+        """Return the collection version counter, shared on disk with other processes"""
+        try:
+            return int(self._version_path.read_text().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+    
+    def _bump_version(self):
+        """Mark the collection as changed so every process drops its cached results"""
+        try:
+            self._version_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._version_path.with_suffix(".version.tmp")
+            tmp_path.write_text(str(self.collection_version() + 1))
+            os.replace(tmp_path, self._version_path)
+        except OSError as e:
+            print(f"Error updating collection version: {e}")
+        self.result_cache.clear()
+    
+    @metrics.timed("store.existing_ids")
+    def _existing_ids(self, ids: List[str]) -> set:
+        """Return the subset of ids already stored in the collection"""
+        collection = self.collection
+        existing = set()
+        for start in range(0, len(ids), self.ID_LOOKUP_BATCH_SIZE):
+            batch = ids[start:start + self.ID_LOOKUP_BATCH_SIZE]
+            result = collection.get(ids=batch, include=[])
+            existing.update(result.get("ids", []))
+        return existing
+    
+    def _prune_stale_chunks(self, sources: Iterable[str], keep_ids: set) -> int:
+        """Delete chunks of the given sources whose IDs are not in keep_ids, and documents no chunk points to"""
+        collection = self.collection
+        stale_ids, stale_sources = [], []
+        for source in sources:
+            result = collection.get(where={"source": source}, include=["metadatas", "embeddings"])
+            ids = [i for i in result.get("ids", []) if i not in keep_ids]
+            stale_ids.extend(ids)
+            stale_sources.extend([source] * len(ids))
+            kept = [
+                (metadata, embedding)
+                for chunk_id, metadata, embedding in zip(result["ids"], result["metadatas"], result["embeddings"])
+                if chunk_id in keep_ids
+            ]
+            self.document_store.retain(source, {(metadata or {}).get("doc_id") for metadata, _ in kept})
+            if ids:
+                self.centroid_index.replace_source(
+                    source, [metadata for metadata, _ in kept], [embedding for _, embedding in kept]
+                )
+        for start in range(0, len(stale_ids), self.ID_LOOKUP_BATCH_SIZE):
+            collection.delete(ids=stale_ids[start:start + self.ID_LOOKUP_BATCH_SIZE])
+        self.lexical_index.delete(stale_ids)
+        self.source_registry.remove(stale_sources)
+        return len(stale_ids)
+    
+    @staticmethod
+    def _span(metadata: Optional[dict]) -> Optional[tuple]:
+        """Return (doc_id, start, end) when a chunk's text can be sliced from the document store"""
+        metadata = metadata or {}
+        if "doc_id" in metadata and "start_offset" in metadata and "end_offset" in metadata:
+            return metadata["doc_id"], metadata["start_offset"], metadata["end_offset"]
+        return None
+    
+    def _chunk_texts(self, texts: List[Optional[str]], metadatas: List[Optional[dict]]) -> List[str]:
+        """Fill in chunk texts that Chroma holds only as offsets into the document store"""
+        missing = [idx for idx, text in enumerate(texts) if text is None]
+        if not missing:
+            return list(texts)
+        texts = list(texts)
+        spans = [self._span(metadatas[idx]) for idx in missing]
+        sliced = self.document_store.slice_many([span for span in spans if span])
+        sliced_iter = iter(sliced)
+        for idx, span in zip(missing, spans):
+            text = next(sliced_iter) if span else None
+            texts[idx] = text if text is not None else ""
+        return texts
+    
+    @metrics.timed("store.write_batch")
+    def _write_batch(self, ids: List[str], documents: List[Document], embeddings: List[List[float]]):
+        """Write one embedded batch straight to the Chroma collection
+        
+        Unless STORE_CHUNK_TEXT is set, chunks whose document text is in the document
+        store are written without their text; reads slice it back by offset.
+        """
+        texts: List[Optional[str]] = [doc.page_content for doc in documents]
+        if not settings.STORE_CHUNK_TEXT:
+            spans = [self._span(doc.metadata) for doc in documents]
+            stored = self.document_store.contains(span[0] for span in spans if span)
+            texts = [None if span and span[0] in stored else text for span, text in zip(spans, texts)]
+        self.collection.upsert(
+            ids=ids,
+            embeddings=embeddings,
+            documents=texts,
+            metadatas=[doc.metadata or None for doc in documents],
+        )
+        self.lexical_index.add(ids, [doc.page_content for doc in documents])
+        self.source_registry.add(doc.metadata for doc in documents)
+        self.centroid_index.add([doc.metadata for doc in documents], embeddings)
+    
+    @staticmethod
+    def _batched(documents: Iterable[Document], batch_size: int) -> Iterator[List[Document]]:
+        """Yield lists of at most batch_size documents"""
+        iterator = iter(documents)
+        while True:
+            batch = list(itertools.islice(iterator, batch_size))
+            if not batch:
+                return
+            yield batch
+    
+    def add_documents(
+        self,
+        documents: Iterable[Document],
+        replace_sources: bool = False,
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+    ) -> List[str]:
+        """Add documents to the vector store, embedding only chunks not already stored
+        
+        Documents are consumed in batches of batch_size (EMBEDDING_BATCH_SIZE by default):
+        each batch is embedded while the previous one is written to Chroma, so memory stays
+        bounded by two batches whatever the corpus size. Chunk IDs are content-addressed, so
+        re-ingesting unchanged documents is a metadata lookup. With replace_sources, chunks
+        previously stored for the same sources that are not part of this call (e.g. from an
+        older file version) are removed. progress_callback(processed, total) is called after
+        each batch; total is None when documents has no length.
+        Returns the IDs of the newly added chunks.
+        """
+        batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        total = len(documents) if hasattr(documents, "__len__") else None
+        
+        seen_ids = set()
+        new_ids: List[str] = []
+        sources = set()
+        processed = 0
+        pending: Optional[Future] = None
         
         try:
-            doc_ids = self.vector_store.add_documents(
-                documents=documents,
-                ids=None  # Let Chroma generate IDs
-            )
-            print(f"Successfully added {len(doc_ids)} documents to vector store")
-            self.vector_store.persist()  # Persist to disk
-            return doc_ids
+            with ThreadPoolExecutor(max_workers=1) as writer:
+                for batch in self._batched(documents, batch_size):
+                    processed += len(batch)
+                    
+                    # Deduplicate against everything seen so far while keeping input order
+                    batch_ids, batch_docs = [], []
+                    for doc in batch:
+                        doc_id = make_chunk_id(doc, self.model_name)
+                        if doc_id in seen_ids:
+                            continue
+                        seen_ids.add(doc_id)
+                        sources.add(doc.metadata.get("source"))
+                        batch_ids.append(doc_id)
+                        batch_docs.append(doc)
+                    
+                    existing = self._existing_ids(batch_ids) if batch_ids else set()
+                    todo = [(i, d) for i, d in zip(batch_ids, batch_docs) if i not in existing]
+                    metrics.increment("store.chunks_skipped", len(batch_ids) - len(todo))
+                    
+                    if todo:
+                        todo_ids = [doc_id for doc_id, _ in todo]
+                        todo_docs = [doc for _, doc in todo]
+                        with metrics.timer("store.embed_documents"):
+                            embeddings = self.embeddings.embed_documents([doc.page_content for doc in todo_docs])
+                        metrics.increment("store.chunks_embedded", len(todo))
+                        
+                        # Keep at most one write in flight while the next batch is embedded
+                        if pending is not None:
+                            pending.result()
+                        pending = writer.submit(self._write_batch, todo_ids, todo_docs, embeddings)
+                        new_ids.extend(todo_ids)
+                    
+                    if progress_callback:
+                        progress_callback(processed, total)
+                
+                if pending is not None:
+                    pending.result()
+            
+            if not processed:
+                print("No documents to add")
+                return []
+            
+            pruned = 0
+            if replace_sources:
+                pruned = self._prune_stale_chunks(sorted(s for s in sources if s), seen_ids)
+                if pruned:
+                    print(f"Removed {pruned} stale chunks from previous versions")
+            
+            if new_ids or pruned:
+                self._bump_version()
+            
+            if not new_ids:
+                print(f"All {len(seen_ids)} chunks already in vector store, nothing to embed")
+                return []
+            
+            print(f"Successfully added {len(new_ids)} documents to vector store "
+                  f"({len(seen_ids) - len(new_ids)} unchanged chunks skipped)")
+            self._persist()  # Persist to disk
+            return new_ids
         except Exception as e:
             print(f"Error adding documents to vector store: {e}")
             raise
     
-    def search_documents(self, query: str, k: int = 5) -> List[Document]:
+    def delete_sources(self, sources: Iterable[str]) -> int:
+        """Delete every chunk whose source metadata matches one of the given sources"""
+        try:
+            deleted = self._prune_stale_chunks(sources, keep_ids=set())
+            if deleted:
+                self._bump_version()
+            return deleted
+        except Exception as e:
+            print(f"Error deleting sources from vector store: {e}")
+            raise
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query, reusing the cached embedding for repeated queries"""
+        return self.embed_queries([query])[0]
+    
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries, running uncached ones through the model in one batch"""
+        keys = [(self.model_name, normalize_query(query)) for query in queries]
+        embeddings = [self.query_embedding_cache.get(key) for key in keys]
+        # Identical queries in one batch are embedded once
+        missing: Dict[tuple, str] = {}
+        for key, query, embedding in zip(keys, queries, embeddings):
+            if embedding is None:
+                missing.setdefault(key, query)
+        if missing:
+            with metrics.timer("store.embed_queries"):
+                computed = dict(zip(missing, self.query_model.embed_documents(list(missing.values()))))
+            metrics.increment("store.query_cache_misses", len(missing))
+            for key, embedding in computed.items():
+                self.query_embedding_cache.put(key, embedding)
+            embeddings = [computed.get(key, embedding) for key, embedding in zip(keys, embeddings)]
+        return embeddings
+    
+    def _query_by_vectors(self, embeddings: List[List[float]], k: int, where: Optional[dict] = None) -> List[List[tuple]]:
+        """Return (chunk_id, Document, distance) for the k nearest chunks of each query, in one Chroma call"""
+        collection = self.collection
+        if not embeddings:
+            return []
+        if k <= 0 or collection.count() == 0:
+            return [[] for _ in embeddings]
+        with metrics.timer("store.vector_query"):
+            result = collection.query(
+                query_embeddings=embeddings,
+                n_results=k,
+                where=where,
+                include=["documents", "metadatas", "distances"],
+            )
+        return [
+            [
+                (chunk_id, Document(page_content=text, metadata=metadata or {}), distance)
+                for chunk_id, text, metadata, distance in zip(
+                    ids, self._chunk_texts(texts, metadatas), metadatas, distances
+                )
+            ]
+            for ids, texts, metadatas, distances in zip(
+                result["ids"], result["documents"], result["metadatas"], result["distances"]
+            )
+        ]
+    
+    def _query_by_vector(self, embedding: List[float], k: int, where: Optional[dict] = None) -> List[tuple]:
+        """Return (chunk_id, Document, distance) for the k nearest chunks"""
+        return self._query_by_vectors([embedding], k, where)[0]
+    
+    def _get_by_ids(self, ids: List[str], where: Optional[dict] = None) -> Dict[str, Document]:
+        """Fetch stored chunks by ID, optionally only those matching a where clause"""
+        if not ids:
+            return {}
+        result = self.collection.get(ids=ids, where=where, include=["documents", "metadatas"])
+        return {
+            chunk_id: Document(page_content=text, metadata=metadata or {})
+            for chunk_id, text, metadata in zip(
+                result["ids"], self._chunk_texts(result["documents"], result["metadatas"]), result["metadatas"]
+            )
+        }
+    
+    def _iter_collection(self, include: List[str]) -> Iterator[dict]:
+        """Yield the whole collection in ID_LOOKUP_BATCH_SIZE batches of collection.get results"""
+        collection = self.collection
+        offset = 0
+        while True:
+            result = collection.get(include=include, limit=self.ID_LOOKUP_BATCH_SIZE, offset=offset)
+            if not result["ids"]:
+                return
+            yield result
+            offset += len(result["ids"])
+    
+    def _ensure_lexical_index(self):
+        """Rebuild the BM25 index from the collection if it has fallen out of sync
+        
+        The index re-checks its count inside the rebuild transaction, so searches racing
+        to rebuild it (in this or another process) do not index chunks twice.
+        """
+        count = self.collection.count()
+        if self.lexical_index.count() == count:
+            return
+        print("Rebuilding lexical index from vector store...")
+        self.lexical_index.rebuild(count, (
+            (result["ids"], self._chunk_texts(result["documents"], result["metadatas"]))
+            for result in self._iter_collection(["documents", "metadatas"])
+        ))
+    
+    def _ensure_source_registry(self):
+        """Rebuild the source registry from the collection if it has fallen out of sync"""
+        count = self.collection.count()
+        if self.source_registry.total_chunks() == count:
+            return
+        print("Rebuilding source registry from vector store...")
+        self.source_registry.rebuild(count, (
+            result["metadatas"] for result in self._iter_collection(["metadatas"])
+        ))
+    
+    def _ensure_centroid_index(self):
+        """Rebuild the document centroids from the collection if they have fallen out of sync
+        
+        Checked once per collection version, so chunks stored without a doc_id (which have
+        no centroid) do not trigger a rebuild on every search.
+        """
+        version = self.collection_version()
+        if self._centroids_checked_version == version:
+            return
+        count = self.collection.count()
+        if self.centroid_index.total_chunks() != count:
+            print("Rebuilding document centroids from vector store...")
+            self.centroid_index.rebuild(count, (
+                (result["metadatas"], result["embeddings"])
+                for result in self._iter_collection(["metadatas", "embeddings"])
+            ))
+        self._centroids_checked_version = version
+    
+    def build_where(self, filters: Optional[Dict[str, Any]]) -> Optional[dict]:
+        """Validate search filters against the source registry and translate them to a Chroma where clause"""
+        if not filters:
+            return None
+        self._ensure_source_registry()
+        return build_where(filters, self.source_registry)
+    
+    def list_sources(self) -> List[dict]:
+        """Return every ingested source with its file type, chunk count and page/slide extent"""
+        self._ensure_source_registry()
+        return self.source_registry.list_sources()
+    
+    @metrics.timed("store.lexical_query")
+    def _lexical_hits(self, query: str, k: int, where: Optional[dict] = None) -> List[tuple]:
+        """Return (chunk_id, Document, bm25_score) for the k best lexical matches"""
+        self._ensure_lexical_index()
+        # BM25 has no metadata, so filtered searches oversample and filter in Chroma
+        fetch_k = k if where is None else max(k * settings.LEXICAL_FILTER_OVERSAMPLE, settings.HYBRID_CANDIDATES)
+        scored = self.lexical_index.search(query, k=fetch_k)
+        docs = self._get_by_ids([chunk_id for chunk_id, _ in scored], where)
+        return [(chunk_id, docs[chunk_id], score) for chunk_id, score in scored if chunk_id in docs][:k]
+    
+    def _hybrid_hits(self, query: str, k: int, where: Optional[dict] = None) -> List[tuple]:
+        """Merge vector and lexical candidates with reciprocal rank fusion"""
+        fetch_k = max(k, settings.HYBRID_CANDIDATES)
+        rankings = [
+            self._query_by_vector(self.embed_query(query), fetch_k, where),
+            self._lexical_hits(query, fetch_k, where),
+        ]
+        return fuse_rankings(rankings, k)
+    
+    def _hierarchical_hits(self, query: str, k: int, where: Optional[dict], fan_out: int) -> List[tuple]:
+        """Pick the fan_out documents whose centroids are closest to the query, then search only their chunks"""
+        embedding = self.embed_query(query)
+        self._ensure_centroid_index()
+        with metrics.timer("store.centroid_query"):
+            candidates = self.centroid_index.search(embedding, fan_out)
+        if candidates:
+            doc_filter = {"doc_id": {"$in": [doc_id for doc_id, _ in candidates]}}
+            hits = self._query_by_vector(embedding, k, doc_filter if where is None else {"$and": [where, doc_filter]})
+            if len(hits) >= k:
+                return hits
+        # Too few chunks in the candidate documents (e.g. after filtering): search every chunk
+        metrics.increment("store.hierarchical_fallbacks")
+        return self._query_by_vector(embedding, k, where)
+    
+    def search_hits(
+        self,
+        query: str,
+        k: int = 5,
+        mode: str = "vector",
+        filters: Optional[Dict[str, Any]] = None,
+        fan_out: Optional[int] = None,
+    ) -> List[tuple]:
+        """Return (chunk_id, Document, score) hits for a query
+        
+        mode "vector" scores by embedding distance (lower is closer), "lexical" by BM25 and
+        "hybrid" by reciprocal rank fusion of both (higher is better for the last two).
+        "hierarchical" is a vector search over the chunks of the fan_out pages/slides
+        (HIERARCHICAL_FAN_OUT by default) whose mean embeddings are closest to the query.
+        filters restrict the search to matching chunks (see source_registry.build_where).
+        """
+        if mode not in self.SEARCH_MODES:
+            raise ValueError(f"Unsupported search mode: {mode}. Supported modes: {self.SEARCH_MODES}")
+        fan_out = fan_out or settings.HIERARCHICAL_FAN_OUT
+        
+        cache_mode = f"{mode}:{fan_out}" if mode == "hierarchical" else mode
+        key = (self.collection_version(), cache_mode, normalize_query(query), k, _filters_key(filters))
+        hits = self.result_cache.get(key)
+        if hits is not None:
+            metrics.increment("store.result_cache_hits")
+            return list(hits)
+        
+        with metrics.timer(f"store.search.{mode}"):
+            try:
+                where = self.build_where(filters)
+            except LookupError:
+                return []
+            if mode == "vector":
+                hits = self._query_by_vector(self.embed_query(query), k, where)
+            elif mode == "lexical":
+                hits = self._lexical_hits(query, k, where)
+            elif mode == "hierarchical":
+                hits = self._hierarchical_hits(query, k, where, fan_out)
+            else:
+                hits = self._hybrid_hits(query, k, where)
+        self.result_cache.put(key, hits)
+        return list(hits)
+    
+    def search_many(
+        self, queries: List[str], k: int = 5, fuse: bool = False, filters: Optional[Dict[str, Any]] = None
+    ) -> dict:
+        """Vector search for several queries with one batched embedding pass and one Chroma query
+        
+        Returns {"results": [[(chunk_id, Document, distance), ...] per query]} and, with fuse,
+        "fused": the per-query lists merged by reciprocal rank fusion and deduplicated.
+        filters apply to every query.
+        """
+        try:
+            version = self.collection_version()
+            keys = [(version, "vector", normalize_query(query), k, _filters_key(filters)) for query in queries]
+            results = [self.result_cache.get(key) for key in keys]
+            missing = [idx for idx, hits in enumerate(results) if hits is None]
+            metrics.increment("store.result_cache_hits", len(queries) - len(missing))
+            if missing:
+                with metrics.timer("store.search_many"):
+                    try:
+                        where = self.build_where(filters)
+                    except LookupError:
+                        where, k = None, 0
+                    embeddings = self.embed_queries([queries[idx] for idx in missing])
+                    for idx, hits in zip(missing, self._query_by_vectors(embeddings, k, where)):
+                        results[idx] = hits
+                        self.result_cache.put(keys[idx], hits)
+            
+            response = {"results": [list(hits) for hits in results]}
+            if fuse:
+                response["fused"] = fuse_rankings(response["results"], k)
+            return response
+        except Exception as e:
+            print(f"Error searching multiple queries: {e}")
+            raise
+    
+    def _embeddings_by_ids(self, ids: List[str]) -> Dict[str, List[float]]:
+        """Fetch stored chunk embeddings by ID"""
+        if not ids:
+            return {}
+        result = self.collection.get(ids=ids, include=["embeddings"])
+        return dict(zip(result["ids"], result["embeddings"]))
+    
+    def expand_context_hits(self, hits: List[tuple], mode: str = "window") -> List[tuple]:
+        """Widen hits using the document store: "window" adds CONTEXT_WINDOW_CHARS on each side,
+        "page" returns the whole page, slide or text block the chunk came from"""
+        texts = self.document_store.get_many(
+            doc.metadata["doc_id"] for _, doc, _ in hits if "doc_id" in doc.metadata
+        )
+        return expand_hits(hits, texts, mode, settings.CONTEXT_WINDOW_CHARS)
+    
+    def search_documents(
+        self,
+        query: str,
+        k: int = 5,
+        mode: str = "vector",
+        filters: Optional[Dict[str, Any]] = None,
+        fan_out: Optional[int] = None,
+    ) -> List[Document]:
         """Search for similar documents"""
         try:
-            results = self.vector_store.similarity_search(query, k=k)
-            return results
+            return [doc for _, doc, _ in self.search_hits(query, k=k, mode=mode, filters=filters, fan_out=fan_out)]
         except Exception as e:
             print(f"Error searching documents: {e}")
             raise
     
-    def search_with_scores(self, query: str, k: int = 5) -> List[tuple]:
-        """Search for similar documents with similarity scores"""
+    def search_with_scores(
+        self, query: str, k: int = 5, mode: str = "vector", filters: Optional[Dict[str, Any]] = None
+    ) -> List[tuple]:
+        """Search for similar documents with scores (see search_hits for their meaning per mode)"""
         try:
-            results = self.vector_store.similarity_search_with_score(query, k=k)
-            return results
+            return [(doc, score) for _, doc, score in self.search_hits(query, k=k, mode=mode, filters=filters)]
         except Exception as e:
             print(f"Error searching documents with scores: {e}")
             raise
     
-    def get_retriever(self, k: int = 5):
-        """Get a LangChain retriever from the vector store"""
-        return self.vector_store.as_retriever(search_kwargs={"k": k})
+    def cache_stats(self) -> dict:
+        """Return hit/miss statistics for the query embedding and result caches"""
+        return {
+            "query_embedding_cache": self.query_embedding_cache.stats(),
+            "result_cache": self.result_cache.stats(),
+            "embedding_cache": self.embedding_cache.stats() if self.embedding_cache else None,
+            "collection_version": self.collection_version(),
+        }
+    
+    def get_retriever(self, k: int = 5, mode: str = "vector", filters: Optional[Dict[str, Any]] = None):
+        """Get a LangChain retriever backed by search_documents"""
+        return StoreRetriever(store=self, k=k, mode=mode, filters=filters)
     
     def delete_collection(self):
         """Delete the entire collection"""
         try:
-            # Prefer deleting the collection via the client to ensure a clean reset
-            collection_name = self.vector_store._collection.name
-            client = self.vector_store._client
-
-            # Drop the collection entirely
-            client.delete_collection(name=collection_name)
-
-            # Recreate an empty collection using the same settings
-            self._initialize_store()
+            # Drop the collection entirely and recreate it empty for a clean reset
+            self._drop_collection()
+            self.lexical_index.clear()
+            self.source_registry.clear()
+            self.document_store.clear()
+            self.centroid_index.clear()
+            self.query_embedding_cache.clear()
+            self._bump_version()
             print("Collection deleted and reinitialized successfully")
         except Exception as e:
             print(f"Error deleting collection: {e}")
@@ -98,12 +779,14 @@ class ChromaVectorStore:
     def get_collection_info(self) -> dict:
         """Get information about the current collection"""
         try:
-            collection = self.vector_store._collection
+            collection = self.collection
             count = collection.count()
             return {
-                "collection_name": settings.VECTOR_STORE_COLLECTION,
+                "collection_name": self.collection_name,
                 "document_count": count,
-                "embedding_model": settings.EMBEDDING_MODEL
+                "embedding_model": self.model_name,
+                "embedding_backend": settings.EMBEDDING_BACKEND,
+                "vector_backend": self.VECTOR_BACKEND
             }
         except Exception as e:
             print(f"Error getting collection info: {e}")
@@ -0,0 +1,269 @@
+"""Post-processing that turns ranked (chunk_id, Document, score) hits into fewer, more useful passages"""
+import math
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+from config.settings import settings
+from backend.metrics import metrics
+
+_WORD_RE = re.compile(r"\w+")
+
+# Metadata keys that identify the loaded unit (page, slide, text block) a chunk_index counts within
+_POSITION_KEYS = ("page_number", "slide_number", "block_number")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about four characters per token for English text)"""
+    return math.ceil(len(text) / 4)
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[idx:idx + size]) for idx in range(len(words) - size + 1)}
+
+
+def suppress_near_duplicates(hits: List[tuple], threshold: float) -> List[tuple]:
+    """Drop hits whose word-trigram Jaccard similarity to a better-ranked hit is at least threshold"""
+    if threshold <= 0:
+        return list(hits)
+    kept, kept_shingles = [], []
+    for hit in hits:
+        shingles = _shingles(hit[1].page_content)
+        if any(len(shingles & other) / max(1, len(shingles | other)) >= threshold for other in kept_shingles):
+            continue
+        kept.append(hit)
+        kept_shingles.append(shingles)
+    return kept
+
+
+def mmr_select(
+    query_embedding: Sequence[float],
+    hits: List[tuple],
+    embeddings: Dict[str, Sequence[float]],
+    k: int,
+    lambda_mult: float = 0.5,
+) -> List[tuple]:
+    """Pick k hits by maximal marginal relevance: relevance to the query minus redundancy with picks so far
+
+    lambda_mult 1.0 ranks purely by relevance, 0.0 purely by diversity. Hits without an
+    embedding keep their rank after the selected ones.
+    """
+    candidates = [hit for hit in hits if hit[0] in embeddings]
+    if not candidates:
+        return list(hits[:k])
+    matrix = np.asarray([embeddings[hit[0]] for hit in candidates], dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query /= max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = matrix @ query
+    redundancy = np.full(len(candidates), -np.inf)
+    selected: List[int] = []
+    while len(selected) < min(k, len(candidates)):
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        scores = lambda_mult * relevance - (1 - lambda_mult) * penalty
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        redundancy = np.maximum(redundancy, matrix @ matrix[best])
+
+    picked = [candidates[idx] for idx in selected]
+    rest = [hit for hit in hits if hit[0] not in embeddings]
+    return (picked + rest)[:k]
+
+
+def _join_overlapping(left: str, right: str, max_overlap: int, min_overlap: int = 8) -> str:
+    """Concatenate consecutive chunks, dropping the text the splitter repeated at the boundary"""
+    for size in range(min(max_overlap, len(left), len(right)), min_overlap - 1, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return f"{left} {right}"
+
+
+def _adjacency_key(doc: Document) -> tuple:
+    return (doc.metadata.get("source"),) + tuple(doc.metadata.get(key) for key in _POSITION_KEYS)
+
+
+def merge_adjacent_hits(hits: List[tuple], max_overlap: int = 200) -> List[tuple]:
+    """Merge hits that are consecutive chunks of the same page/slide/block into one passage
+
+    The merged passage takes the place and score of its best-ranked chunk; its metadata
+    gains chunk_index_end when it spans several chunks.
+    """
+    groups: Dict[tuple, List[int]] = {}
+    for idx, (_, doc, _) in enumerate(hits):
+        if doc.metadata.get("chunk_index") is not None:
+            groups.setdefault(_adjacency_key(doc), []).append(idx)
+
+    merged_into: Dict[int, int] = {}
+    runs: Dict[int, List[int]] = {}
+    for members in groups.values():
+        members.sort(key=lambda idx: hits[idx][1].metadata["chunk_index"])
+        run = [members[0]]
+        for idx in members[1:] + [None]:
+            if idx is not None and hits[idx][1].metadata["chunk_index"] == hits[run[-1]][1].metadata["chunk_index"] + 1:
+                run.append(idx)
+                continue
+            if len(run) > 1:
+                head = min(run)
+                runs[head] = run
+                merged_into.update((member, head) for member in run if member != head)
+            if idx is not None:
+                run = [idx]
+
+    result = []
+    for idx, hit in enumerate(hits):
+        if idx in merged_into:
+            continue
+        if idx not in runs:
+            result.append(hit)
+            continue
+        run = runs[idx]
+        text = hits[run[0]][1].page_content
+        for member in run[1:]:
+            text = _join_overlapping(text, hits[member][1].page_content, max_overlap)
+        metadata = dict(hits[run[0]][1].metadata)
+        metadata["chunk_index_end"] = hits[run[-1]][1].metadata["chunk_index"]
+        if "end_offset" in hits[run[-1]][1].metadata:
+            metadata["end_offset"] = hits[run[-1]][1].metadata["end_offset"]
+        chunk_id, _, score = hit
+        result.append((chunk_id, Document(page_content=text, metadata=metadata), score))
+    return result
+
+
+def _snap_to_words(text: str, start: int, end: int) -> tuple:
+    """Move a window inward so it neither starts nor ends in the middle of a word"""
+    if start > 0 and not text[start - 1].isspace():
+        boundary = text.find(" ", start, end)
+        start = boundary + 1 if boundary != -1 else start
+    if end < len(text) and not text[end].isspace():
+        boundary = text.rfind(" ", start, end)
+        end = boundary if boundary != -1 else end
+    return start, end
+
+
+def expand_hits(hits: List[tuple], texts: Dict[str, str], mode: str, window_chars: int) -> List[tuple]:
+    """Widen hits to their surrounding window (mode "window") or whole page/slide/block (mode "page")
+
+    texts maps doc_id to document text. Expanded hits of the same document that overlap
+    are joined into one passage at the position of the better-ranked hit. Hits without
+    offsets into a known document are returned unchanged.
+    """
+    result: List[tuple] = []
+    ranges: Dict[int, tuple] = {}  # result position -> (doc_id, start, end)
+    for chunk_id, doc, score in hits:
+        metadata = doc.metadata
+        doc_id = metadata.get("doc_id")
+        if doc_id not in texts or "start_offset" not in metadata or "end_offset" not in metadata:
+            result.append((chunk_id, doc, score))
+            continue
+        text = texts[doc_id]
+        if mode == "page":
+            start, end = 0, len(text)
+        else:
+            start, end = _snap_to_words(
+                text,
+                max(0, metadata["start_offset"] - window_chars),
+                min(len(text), metadata["end_offset"] + window_chars),
+            )
+        overlapping = next(
+            (pos for pos, (other_id, other_start, other_end) in ranges.items()
+             if other_id == doc_id and start <= other_end and end >= other_start),
+            None,
+        )
+        if overlapping is not None:
+            _, other_start, other_end = ranges[overlapping]
+            start, end = min(start, other_start), max(end, other_end)
+            chunk_id, doc, score = result[overlapping]
+            metadata = doc.metadata
+        passage = Document(
+            page_content=text[start:end],
+            metadata=dict(metadata, start_offset=start, end_offset=end, expanded=mode),
+        )
+        if overlapping is not None:
+            result[overlapping] = (chunk_id, passage, score)
+            ranges[overlapping] = (doc_id, start, end)
+        else:
+            ranges[len(result)] = (doc_id, start, end)
+            result.append((chunk_id, passage, score))
+    return result
+
+
+def apply_token_budget(hits: List[tuple], max_tokens: Optional[int], min_tail_tokens: int = 32) -> List[tuple]:
+    """Keep hits in rank order until their estimated tokens reach max_tokens
+
+    The first passage that does not fit is cut at a word boundary when at least
+    min_tail_tokens remain; later passages are dropped.
+    """
+    if not max_tokens or max_tokens <= 0:
+        return list(hits)
+    result, used = [], 0
+    for chunk_id, doc, score in hits:
+        tokens = estimate_tokens(doc.page_content)
+        if used + tokens <= max_tokens:
+            result.append((chunk_id, doc, score))
+            used += tokens
+            continue
+        remaining = max_tokens - used
+        if remaining >= min_tail_tokens or not result:
+            cut = doc.page_content[:remaining * 4].rsplit(" ", 1)[0].rstrip()
+            metadata = dict(doc.metadata, truncated=True)
+            result.append((chunk_id, Document(page_content=cut + " …", metadata=metadata), score))
+        break
+    return result
+
+
+class CompactSearchMixin:
+    """search_compact for stores that provide search_hits, embed_query,
+    _embeddings_by_ids and expand_context_hits"""
+
+    EXPAND_MODES = ("window", "page")
+
+    def search_compact(
+        self,
+        query: str,
+        k: int = 5,
+        mode: str = "vector",
+        filters: Optional[Dict[str, Any]] = None,
+        mmr: bool = False,
+        dedupe: bool = True,
+        merge_adjacent: Optional[bool] = None,
+        max_tokens: Optional[int] = None,
+        expand_context: Optional[str] = None,
+        **search_options,
+    ) -> List[tuple]:
+        """Return at most k (chunk_id, Document, score) passages with redundant text removed
+
+        Oversamples candidates, drops near-duplicates (DEDUPE_THRESHOLD), optionally
+        re-ranks by maximal marginal relevance (MMR_LAMBDA), merges consecutive chunks of
+        the same page/slide into one passage, optionally widens passages (expand_context,
+        see expand_context_hits) and trims the list to max_tokens estimated tokens
+        (MAX_RESPONSE_TOKENS when not given). Scores are those of search_hits, which
+        also receives any extra search_options.
+        """
+        if expand_context and expand_context not in self.EXPAND_MODES:
+            raise ValueError(f"Unsupported expand_context: {expand_context}. Supported values: {self.EXPAND_MODES}")
+        merge_adjacent = settings.MERGE_ADJACENT_CHUNKS if merge_adjacent is None else merge_adjacent
+        max_tokens = settings.MAX_RESPONSE_TOKENS if max_tokens is None else max_tokens
+
+        oversample = (mmr or (dedupe and settings.DEDUPE_THRESHOLD > 0))
+        fetch_k = k * max(1, settings.COMPACTION_OVERSAMPLE) if oversample else k
+        hits = self.search_hits(query, k=fetch_k, mode=mode, filters=filters, **search_options)
+
+        with metrics.timer("store.compact"):
+            if dedupe:
+                hits = suppress_near_duplicates(hits, settings.DEDUPE_THRESHOLD)
+            if mmr and len(hits) > k:
+                embeddings = self._embeddings_by_ids([chunk_id for chunk_id, _, _ in hits])
+                hits = mmr_select(self.embed_query(query), hits, embeddings, k, settings.MMR_LAMBDA)
+            hits = hits[:k]
+            if merge_adjacent:
+                hits = merge_adjacent_hits(hits, max_overlap=settings.CHUNK_OVERLAP * 2)
+            if expand_context:
+                hits = self.expand_context_hits(hits, expand_context)
+            return apply_token_budget(hits, max_tokens)
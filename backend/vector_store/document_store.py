@@ -0,0 +1,136 @@
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .cache import LRUCache
+
+
+class DocumentStore:
+    """Full text of every loaded document (page, slide or text block), stored once and compressed in SQLite
+
+    Chunks reference their text as (doc_id, start_offset, end_offset) metadata, so the
+    overlapping chunk copies need not be kept in Chroma and a hit can be widened to its
+    surrounding window or whole page without another search.
+    """
+
+    def __init__(self, db_path: str, cache_size: int = 256):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._cache = LRUCache(cache_size)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                text BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS documents_source ON documents (source);
+        """)
+        self._conn.commit()
+
+    def put(self, doc_id: str, source: str, text: str):
+        """Store a document's text; IDs are content-addressed, so existing entries are left alone"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO documents (doc_id, source, length, text) VALUES (?, ?, ?, ?)",
+                (doc_id, source, len(text), zlib.compress(text.encode("utf-8"))),
+            )
+
+    def put_many(self, rows: Iterable[Tuple[str, str, str]]):
+        """Store (doc_id, source, text) rows in one transaction"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO documents (doc_id, source, length, text) VALUES (?, ?, ?, ?)",
+                [(doc_id, source, len(text), zlib.compress(text.encode("utf-8"))) for doc_id, source, text in rows],
+            )
+
+    def put_document(self, doc_id: str, document):
+        """Store a loaded langchain Document under doc_id"""
+        self.put(doc_id, document.metadata.get("source", ""), document.page_content)
+
+    def get_many(self, doc_ids: Iterable[str]) -> Dict[str, str]:
+        """Return the texts of the given documents that are stored"""
+        texts: Dict[str, str] = {}
+        missing: List[str] = []
+        for doc_id in dict.fromkeys(doc_ids):
+            text = self._cache.get(doc_id)
+            if text is None:
+                missing.append(doc_id)
+            else:
+                texts[doc_id] = text
+        for start in range(0, len(missing), 500):
+            batch = missing[start:start + 500]
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT doc_id, text FROM documents WHERE doc_id IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+            for doc_id, blob in rows:
+                texts[doc_id] = zlib.decompress(blob).decode("utf-8")
+                self._cache.put(doc_id, texts[doc_id])
+        return texts
+
+    def get(self, doc_id: str) -> Optional[str]:
+        return self.get_many([doc_id]).get(doc_id)
+
+    def contains(self, doc_ids: Iterable[str]) -> set:
+        """Return the subset of doc_ids that are stored"""
+        doc_ids = list(dict.fromkeys(doc_ids))
+        found = set()
+        for start in range(0, len(doc_ids), 500):
+            batch = doc_ids[start:start + 500]
+            with self._lock:
+                found.update(row[0] for row in self._conn.execute(
+                    f"SELECT doc_id FROM documents WHERE doc_id IN ({','.join('?' * len(batch))})", batch
+                ))
+        return found
+
+    def slice_many(self, spans: List[Tuple[str, int, int]]) -> List[Optional[str]]:
+        """Return text[start:end] for each (doc_id, start, end), or None when the document is missing"""
+        texts = self.get_many(doc_id for doc_id, _, _ in spans)
+        return [
+            texts[doc_id][start:end] if doc_id in texts else None
+            for doc_id, start, end in spans
+        ]
+
+    def retain(self, source: str, keep_doc_ids: Iterable[str]) -> int:
+        """Delete the documents of source that are not in keep_doc_ids (e.g. older file versions)"""
+        keep = set(keep_doc_ids)
+        with self._lock, self._conn:
+            stored = [row[0] for row in self._conn.execute("SELECT doc_id FROM documents WHERE source = ?", (source,))]
+            stale = [doc_id for doc_id in stored if doc_id not in keep]
+            self._conn.executemany("DELETE FROM documents WHERE doc_id = ?", [(doc_id,) for doc_id in stale])
+        self._cache.clear()
+        return len(stale)
+
+    def iter_documents(self, batch_size: int = 500) -> Iterator[Tuple[str, str, str]]:
+        """Yield every stored (doc_id, source, text)"""
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT doc_id, source, text FROM documents WHERE doc_id > ? ORDER BY doc_id LIMIT ?",
+                    (last, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for doc_id, source, blob in rows:
+                yield doc_id, source, zlib.decompress(blob).decode("utf-8")
+            last = rows[-1][0]
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM documents")
+        self._cache.clear()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
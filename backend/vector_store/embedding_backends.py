@@ -0,0 +1,191 @@
+"""Embedding backends selectable with EMBEDDING_BACKEND
+
+"huggingface" runs sentence-transformers on PyTorch (the reference backend), "onnx"
+runs the model's ONNX export on ONNX Runtime and "onnx-int8" runs a dynamically
+int8-quantized copy of that export. All three read the same locally cached model and
+produce vectors that agree within the tolerance checked by benchmarks/parity.py, so
+chunk IDs and cached embeddings are shared between them.
+"""
+import json
+import os
+import re
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config.settings import settings
+
+EMBEDDING_BACKENDS = ("huggingface", "onnx", "onnx-int8")
+
+# Quantized copies of ONNX exports are written here once and reused
+QUANTIZED_MODELS_DIR = settings.DATA_DIR / "onnx_models"
+
+
+def resolve_model_name(name: str) -> str:
+    """Expand a bare sentence-transformers model name (e.g. all-MiniLM-L6-v2) to its hub ID"""
+    if "/" in name or os.path.isdir(name):
+        return name
+    return f"sentence-transformers/{name}"
+
+
+def _model_dir(model_name: str) -> Path:
+    """Return the local directory of a model: a path as-is, or the cached hub snapshot"""
+    if os.path.isdir(model_name):
+        return Path(model_name)
+    from huggingface_hub import snapshot_download
+    try:
+        return Path(snapshot_download(
+            model_name,
+            allow_patterns=["*.json", "*.txt", "onnx/model.onnx", "1_Pooling/*"],
+        ))
+    except Exception as e:
+        raise RuntimeError(
+            f"ONNX files for {model_name} are not available locally ({e}). "
+            f"Download them once with network access or point EMBEDDING_MODEL at a local model directory."
+        ) from e
+
+
+def _read_json(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def quantize_model(source: Path, target: Path) -> Path:
+    """Write a dynamically int8-quantized copy of an ONNX model (weights int8, activations quantized at run time)"""
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError as e:
+        raise ImportError("onnx-int8 needs the onnx and onnxruntime packages: pip install onnx onnxruntime") from e
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_suffix(".tmp.onnx")
+    quantize_dynamic(str(source), str(tmp_path), weight_type=QuantType.QInt8, per_channel=True)
+    os.replace(tmp_path, target)
+    return target
+
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence-transformers model served by ONNX Runtime
+
+    Reproduces the sentence-transformers pipeline (tokenize, transformer, pooling,
+    optional L2 normalization) from the model's own config files. Texts are sorted by
+    length before batching so each batch pads to a similar length.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        quantize: bool = False,
+        threads: int = 0,
+        batch_size: int = 32,
+        onnx_path: Optional[str] = None,
+    ):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        model_dir = _model_dir(model_name)
+
+        model_path = Path(onnx_path) if onnx_path else model_dir / "onnx" / "model.onnx"
+        if not model_path.exists():
+            raise FileNotFoundError(f"ONNX model not found: {model_path}")
+        if quantize:
+            target = QUANTIZED_MODELS_DIR / re.sub(r"[^\w.-]+", "_", model_name) / f"{model_path.stem}_int8.onnx"
+            if not target.exists() or target.stat().st_mtime < model_path.stat().st_mtime:
+                print(f"Quantizing {model_path} to int8...")
+                quantize_model(model_path, target)
+            model_path = target
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.output_names = [node.name for node in self.session.get_outputs()]
+
+        max_length = _read_json(model_dir / "sentence_bert_config.json").get("max_seq_length", 256)
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id("[PAD]") or 0)
+
+        pooling = _read_json(model_dir / "1_Pooling" / "config.json")
+        self.cls_pooling = bool(pooling.get("pooling_mode_cls_token"))
+        modules = _read_json(model_dir / "modules.json")
+        self.normalize = any(
+            module.get("type", "").endswith("Normalize") for module in (modules if isinstance(modules, list) else [])
+        )
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.asarray([e.type_ids for e in encodings], dtype=np.int64)
+        outputs = dict(zip(self.output_names, self.session.run(None, feeds)))
+
+        if "sentence_embedding" in outputs:
+            vectors = outputs["sentence_embedding"]
+        else:
+            token_embeddings = outputs.get("last_hidden_state", next(iter(outputs.values())))
+            if self.cls_pooling:
+                vectors = token_embeddings[:, 0]
+            else:
+                mask = attention_mask[:, :, None].astype(np.float32)
+                vectors = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        if self.normalize:
+            vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors.astype(np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        order = sorted(range(len(texts)), key=lambda idx: len(texts[idx]))
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for idx, vector in zip(batch, self._embed_batch([texts[idx] for idx in batch])):
+                vectors[idx] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def create_embeddings(
+    backend: Optional[str] = None,
+    model_name: Optional[str] = None,
+    threads: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> Embeddings:
+    """Build the embedding model for a backend; arguments default to the EMBEDDING_* settings"""
+    backend = backend or settings.EMBEDDING_BACKEND
+    model_name = resolve_model_name(model_name or settings.EMBEDDING_MODEL)
+    threads = settings.EMBEDDING_THREADS if threads is None else threads
+    batch_size = batch_size or settings.EMBEDDING_INFERENCE_BATCH_SIZE
+
+    if backend == "huggingface":
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        if threads > 0:
+            import torch
+            torch.set_num_threads(threads)
+        return HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs={"device": "cpu"},
+            encode_kwargs={"batch_size": batch_size},
+        )
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEmbeddings(
+            model_name,
+            quantize=backend == "onnx-int8",
+            threads=threads,
+            batch_size=batch_size,
+            onnx_path=settings.EMBEDDING_ONNX_PATH,
+        )
+    raise ValueError(f"Unsupported embedding backend: {backend}. Supported backends: {EMBEDDING_BACKENDS}")
@@ -0,0 +1,271 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def content_key(model_name: str, text: str) -> str:
+    """Cache key for a text embedded by a given model"""
+    return f"{model_name}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+def model_cache_directory(root: str, model_name: str) -> Path:
+    """Cache directory of one model under root
+
+    Each model gets its own vector file, since the file's row width is fixed by the
+    dimension of the first vectors stored.
+    """
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", model_name).strip("._")[:64]
+    return Path(root) / f"{slug}-{hashlib.sha256(model_name.encode('utf-8')).hexdigest()[:8]}"
+
+
+class EmbeddingCache:
+    """Persistent embedding cache: vectors in a memory-mapped array, keys in a small SQLite index
+
+    Each key owns a fixed slot (row) in the vector file. When the cache holds more than
+    max_entries vectors, the least recently used entries are evicted and their slots reused.
+    Several processes may share a cache directory: writers take SQLite's write lock before
+    choosing slots and wait up to WRITE_TIMEOUT seconds for it.
+    """
+
+    INITIAL_CAPACITY = 1024
+    LOOKUP_BATCH_SIZE = 500
+    WRITE_TIMEOUT = 30
+
+    def __init__(self, directory: str, max_entries: int = 200000, dtype: str = "float16"):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.memmap] = None
+        self._vectors_path = self.directory / "vectors.bin"
+        self._conn = sqlite3.connect(
+            str(self.directory / "index.sqlite3"), check_same_thread=False, timeout=self.WRITE_TIMEOUT
+        )
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                slot INTEGER NOT NULL UNIQUE,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+            CREATE TABLE IF NOT EXISTS free_slots (slot INTEGER PRIMARY KEY);
+        """)
+        self._conn.commit()
+
+        # The vector dtype is fixed when the cache is created
+        stored_dtype = self._meta("dtype")
+        self.dtype = np.dtype(stored_dtype or dtype)
+        self.dim = int(self._meta("dim") or 0)
+
+    def _meta(self, name: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name: str, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, str(value)))
+
+    def _open_vectors(self, min_rows: int) -> np.memmap:
+        """Map the vector file, growing it (by doubling) to hold at least min_rows rows"""
+        row_bytes = self.dim * self.dtype.itemsize
+        file_rows = self._vectors_path.stat().st_size // row_bytes if self._vectors_path.exists() else 0
+        if file_rows < min_rows:
+            new_rows = max(self.INITIAL_CAPACITY, file_rows)
+            while new_rows < min_rows:
+                new_rows *= 2
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(new_rows * row_bytes)
+            file_rows = new_rows
+
+        # Remap when this or another process has grown the file
+        if self._vectors is None or self._vectors.shape[0] != file_rows:
+            if self._vectors is not None:
+                self._vectors.flush()
+            self._vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode="r+", shape=(file_rows, self.dim))
+        return self._vectors
+
+    def _lookup_slots(self, keys: List[str]) -> dict:
+        """Map the given keys to their slots, for keys present in the index"""
+        slots = {}
+        for start in range(0, len(keys), self.LOOKUP_BATCH_SIZE):
+            batch = keys[start:start + self.LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            slots.update(self._conn.execute(
+                f"SELECT key, slot FROM entries WHERE key IN ({placeholders})", batch
+            ).fetchall())
+        return slots
+
+    def get_many(self, model_name: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Return cached embeddings (or None) for each text"""
+        keys = [content_key(model_name, text) for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        with self._lock:
+            if not self.dim:
+                self.misses += len(texts)
+                return results
+
+            slots = self._lookup_slots(list(dict.fromkeys(keys)))
+
+            if slots:
+                vectors = self._open_vectors(max(slots.values()) + 1)
+                for idx, key in enumerate(keys):
+                    slot = slots.get(key)
+                    if slot is not None:
+                        results[idx] = vectors[slot].astype(np.float32).tolist()
+                now = time.time()
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE entries SET last_used = ? WHERE key = ?", [(now, key) for key in slots]
+                    )
+
+            hit_count = sum(result is not None for result in results)
+            self.hits += hit_count
+            self.misses += len(texts) - hit_count
+        return results
+
+    def put_many(self, model_name: str, texts: List[str], vectors: List[List[float]]):
+        """Store embeddings for texts, evicting least recently used entries when full
+
+        Raises ValueError when the vectors do not have the cache's dimension.
+        """
+        if not texts or self.max_entries <= 0:
+            return
+        array = np.asarray(vectors, dtype=np.float32)
+        if self.dim and array.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {array.shape[1]} does not match cache dimension {self.dim}")
+        entries = dict(zip((content_key(model_name, text) for text in texts), array))
+
+        with self._lock:
+            # Take SQLite's write lock before choosing slots, so writers in other processes
+            # cannot pick the same free or appended slots
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._put_locked(entries, array.shape[1])
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def _put_locked(self, entries: dict, dim: int):
+        # Another process may have created the cache since it was opened
+        self.dim = int(self._meta("dim") or 0)
+        if not self.dim:
+            self.dim = dim
+            self._set_meta("dim", self.dim)
+            self._set_meta("dtype", self.dtype.name)
+        elif dim != self.dim:
+            raise ValueError(f"Embedding dimension {dim} does not match cache dimension {self.dim}")
+
+        known = self._lookup_slots(list(entries))
+        new_keys = [key for key in entries if key not in known]
+        if not new_keys:
+            return
+        new_keys = new_keys[-self.max_entries:]
+
+        # Evict least recently used entries to make room
+        count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        excess = count + len(new_keys) - self.max_entries
+        if excess > 0:
+            evicted = self._conn.execute(
+                "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?", (excess,)
+            ).fetchall()
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in evicted])
+            self._conn.executemany("INSERT OR IGNORE INTO free_slots (slot) VALUES (?)", [(slot,) for _, slot in evicted])
+            self.evictions += len(evicted)
+
+        # Reuse freed slots first, then append
+        free = [row[0] for row in self._conn.execute(
+            "SELECT slot FROM free_slots ORDER BY slot LIMIT ?", (len(new_keys),)
+        )]
+        self._conn.executemany("DELETE FROM free_slots WHERE slot = ?", [(slot,) for slot in free])
+        next_slot = int(self._meta("next_slot") or 0)
+        appended = list(range(next_slot, next_slot + len(new_keys) - len(free)))
+        self._set_meta("next_slot", next_slot + len(appended))
+        slots = free + appended
+
+        # Vectors are written before the index rows that point at them are committed
+        vectors = self._open_vectors(max(slots) + 1)
+        for key, slot in zip(new_keys, slots):
+            vectors[slot] = entries[key]
+        vectors.flush()
+
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+            [(key, slot, now) for key, slot in zip(new_keys, slots)]
+        )
+
+    def clear(self):
+        """Drop every cached embedding"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM entries")
+                self._conn.execute("DELETE FROM free_slots")
+                self._conn.execute("DELETE FROM meta")
+                self._vectors = None
+                self.dim = 0
+                if self._vectors_path.exists():
+                    os.remove(self._vectors_path)
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def stats(self) -> dict:
+        """Return size, hit/miss and eviction counters"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "dim": self.dim,
+                "dtype": self.dtype.name,
+                "disk_bytes": self._vectors_path.stat().st_size if self._vectors_path.exists() else 0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves document embeddings from an EmbeddingCache"""
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, running the model only for texts not in the cache"""
+        results = self.cache.get_many(self.model_name, texts)
+        missing = [idx for idx, vector in enumerate(results) if vector is None]
+        if missing:
+            computed = self.embeddings.embed_documents([texts[idx] for idx in missing])
+            try:
+                self.cache.put_many(self.model_name, [texts[idx] for idx in missing], computed)
+            except (ValueError, OSError, sqlite3.Error) as e:
+                # A cache that cannot take the vectors must not fail the embedding
+                print(f"Error writing to embedding cache: {e}")
+            for idx, vector in zip(missing, computed):
+                results[idx] = vector
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        """Query embeddings are cached in memory by ChromaVectorStore, not on disk"""
+        return self.embeddings.embed_query(text)
@@ -0,0 +1,587 @@
+import json
+import operator
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config.settings import settings
+from backend.metrics import metrics
+from .cache import LRUCache
+from .chroma_store import ChromaVectorStore
+from .quantization import COMPRESSION_MODES, VectorCodec
+
+VECTOR_BACKENDS = ("chroma", "numpy")
+
+_COMPARISONS = {
+    "$eq": operator.eq,
+    "$ne": operator.ne,
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le,
+    "$in": lambda value, operand: value in operand,
+    "$nin": lambda value, operand: value not in operand,
+}
+
+
+def matches_where(metadata: Optional[dict], where: Optional[dict]) -> bool:
+    """Evaluate a Chroma where clause ($and/$or, $eq, $ne, $gt(e), $lt(e), $in, $nin) against chunk metadata"""
+    if not where:
+        return True
+    metadata = metadata or {}
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        else:
+            # As in Chroma, a chunk without the field matches no condition on it
+            if key not in metadata:
+                return False
+            conditions = condition.items() if isinstance(condition, dict) else [("$eq", condition)]
+            for op, operand in conditions:
+                if op not in _COMPARISONS:
+                    raise ValueError(f"Unsupported where operator: {op}")
+                try:
+                    if not _COMPARISONS[op](metadata[key], operand):
+                        return False
+                except TypeError:
+                    return False
+    return True
+
+
+class NumpyCollection:
+    """Exact nearest-neighbour collection with the subset of Chroma's collection API the stores use
+
+    Vectors live in a memory-mapped float32 file, one slot (row) per chunk; IDs, texts and
+    metadata in a SQLite file beside it. Opening maps the file without copying it, and a
+    query is one matrix product over the slots plus argpartition, so results are exact
+    squared L2 distances (Chroma's default space). Deleted slots are reused. Writes choose
+    slots under SQLite's write lock, so several processes can write to one collection;
+    changes made by another process are picked up on the next call (SQLite data_version).
+
+    With compression (VECTOR_COMPRESSION) and at least COMPRESSION_MIN_VECTORS chunks, a
+    query scans compact in-memory codes instead of the full matrix and re-ranks the best
+    k * COMPRESSION_RERANK candidates with their full vectors, so only those rows of the
+    file are read. The codec is fitted once on a sample and saved beside the vectors;
+    codes are derived from the vector file on first search and kept up to date on writes.
+    """
+
+    INITIAL_CAPACITY = 1024
+    LOOKUP_BATCH_SIZE = 500
+    MASK_CACHE_SIZE = 64
+    metadata = None
+
+    def __init__(self, directory: str, name: str, compression: Optional[str] = None):
+        self.name = name
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.compression = settings.VECTOR_COMPRESSION if compression is None else compression
+        if self.compression not in COMPRESSION_MODES:
+            raise ValueError(f"Unsupported vector compression: {self.compression}. Supported: {COMPRESSION_MODES}")
+        self._vectors_path = self.directory / f"{name}_vectors.bin"
+        self._codec_path = self.directory / f"{name}_codec.npz"
+        self._codec: Optional[VectorCodec] = None
+        self._lock = threading.RLock()
+        self._vectors: Optional[np.memmap] = None
+        self._conn = sqlite3.connect(str(self.directory / f"{name}_vectors.sqlite3"), check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS chunks (
+                id TEXT PRIMARY KEY,
+                slot INTEGER NOT NULL UNIQUE,
+                document TEXT,
+                metadata TEXT
+            );
+        """)
+        self._conn.commit()
+        self._data_version = None
+        self._refresh()
+
+    def _refresh(self):
+        """Reload slot assignments and metadata when another connection has changed the database"""
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        self.dim = int(row[0]) if row else 0
+        rows = self._conn.execute("SELECT id, slot, metadata FROM chunks").fetchall()
+        self._slots: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._metadatas: List[Optional[dict]] = []
+        self._valid = np.zeros(0, dtype=bool)
+        self._mask_cache = LRUCache(self.MASK_CACHE_SIZE)
+        self._field_indexes: Dict[str, Dict[Any, List[int]]] = {}
+        self._vectors = None
+        self._codes: Optional[np.ndarray] = None
+        self._code_norms: Optional[np.ndarray] = None
+        if not rows:
+            self._norms = np.zeros(0, dtype=np.float32)
+            return
+        size = max(slot for _, slot, _ in rows) + 1
+        self._ids = [None] * size
+        self._metadatas = [None] * size
+        self._valid = np.zeros(size, dtype=bool)
+        for chunk_id, slot, metadata in rows:
+            self._slots[chunk_id] = slot
+            self._ids[slot] = chunk_id
+            self._metadatas[slot] = json.loads(metadata) if metadata else None
+            self._valid[slot] = True
+        vectors = self._open_vectors(size)[:size]
+        self._norms = np.einsum("ij,ij->i", vectors, vectors)
+
+    def _open_vectors(self, min_rows: int) -> np.memmap:
+        """Map the vector file, growing it (by doubling) to hold at least min_rows rows"""
+        row_bytes = self.dim * 4
+        file_rows = self._vectors_path.stat().st_size // row_bytes if self._vectors_path.exists() else 0
+        if file_rows < min_rows:
+            new_rows = max(self.INITIAL_CAPACITY, file_rows)
+            while new_rows < min_rows:
+                new_rows *= 2
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(new_rows * row_bytes)
+            file_rows = new_rows
+
+        if self._vectors is None or self._vectors.shape[0] != file_rows:
+            if self._vectors is not None:
+                self._vectors.flush()
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(file_rows, self.dim))
+        return self._vectors
+
+    def _grow(self, size: int):
+        extra = size - len(self._ids)
+        if extra <= 0:
+            return
+        self._ids.extend([None] * extra)
+        self._metadatas.extend([None] * extra)
+        self._valid = np.concatenate([self._valid, np.zeros(extra, dtype=bool)])
+        self._norms = np.concatenate([self._norms, np.zeros(extra, dtype=np.float32)])
+        if self._codes is not None:
+            self._codes = np.concatenate([self._codes, np.zeros((extra,) + self._codes.shape[1:], self._codes.dtype)])
+        if self._code_norms is not None:
+            self._code_norms = np.concatenate([self._code_norms, np.zeros(extra, dtype=np.float32)])
+
+    def _field_index(self, field: str) -> Dict[Any, List[int]]:
+        """Slots of live chunks by the value of one metadata field, built on first use after a write"""
+        index = self._field_indexes.get(field)
+        if index is None:
+            index = {}
+            for slot in np.flatnonzero(self._valid).tolist():
+                value = (self._metadatas[slot] or {}).get(field)
+                if value is not None and not isinstance(value, (list, dict)):
+                    index.setdefault(value, []).append(slot)
+            self._field_indexes[field] = index
+        return index
+
+    def _match_mask(self, where: dict) -> np.ndarray:
+        """Evaluate where into a slot mask; equality and $in conditions are answered from field indexes"""
+        mask = self._valid.copy()
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self._match_mask(clause)
+            elif key == "$or":
+                mask &= np.logical_or.reduce([self._match_mask(clause) for clause in condition])
+            elif not isinstance(condition, dict) or (len(condition) == 1 and next(iter(condition)) in ("$eq", "$in")):
+                if isinstance(condition, dict):
+                    values = [condition["$eq"]] if "$eq" in condition else condition["$in"]
+                else:
+                    values = [condition]
+                index = self._field_index(key)
+                matched = np.zeros(len(self._valid), dtype=bool)
+                for value in values:
+                    matched[index.get(value, [])] = True
+                mask &= matched
+            else:
+                mask &= np.fromiter(
+                    (matches_where(metadata, {key: condition}) for metadata in self._metadatas),
+                    dtype=bool, count=len(self._metadatas),
+                )
+        return mask
+
+    def _where_mask(self, where: Optional[dict]) -> np.ndarray:
+        """Boolean mask of live slots matching where, cached until the next write"""
+        if not where:
+            return self._valid
+        key = json.dumps(where, sort_keys=True, default=str)
+        mask = self._mask_cache.get(key)
+        if mask is None:
+            mask = self._match_mask(where)
+            self._mask_cache.put(key, mask)
+        return mask
+
+    def _documents(self, slots: Sequence[int]) -> List[Optional[str]]:
+        ids = [self._ids[slot] for slot in slots]
+        texts: Dict[str, Optional[str]] = {}
+        for start in range(0, len(ids), self.LOOKUP_BATCH_SIZE):
+            batch = ids[start:start + self.LOOKUP_BATCH_SIZE]
+            texts.update(self._conn.execute(
+                f"SELECT id, document FROM chunks WHERE id IN ({','.join('?' * len(batch))})", batch
+            ).fetchall())
+        return [texts.get(chunk_id) for chunk_id in ids]
+
+    def _result(self, slots: Sequence[int], include: Sequence[str]) -> dict:
+        result: Dict[str, Any] = {"ids": [self._ids[slot] for slot in slots]}
+        if "documents" in include:
+            result["documents"] = self._documents(slots)
+        if "metadatas" in include:
+            result["metadatas"] = [self._metadatas[slot] for slot in slots]
+        if "embeddings" in include:
+            result["embeddings"] = (
+                np.asarray(self._vectors[list(slots)]) if len(slots) else np.zeros((0, self.dim), dtype=np.float32)
+            )
+        return result
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return int(self._valid.sum())
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[List[Optional[str]]] = None,
+        metadatas: Optional[List[Optional[dict]]] = None,
+    ):
+        if not ids:
+            return
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        documents = documents if documents is not None else [None] * len(ids)
+        metadatas = metadatas if metadatas is not None else [None] * len(ids)
+        with self._lock:
+            # Take SQLite's write lock before choosing slots, so writers in other processes
+            # cannot pick the same free or appended slots; state is then re-read under the lock
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh()
+                if not self.dim:
+                    self.dim = matrix.shape[1]
+                    self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('dim', ?)", (str(self.dim),))
+                elif matrix.shape[1] != self.dim:
+                    raise ValueError(
+                        f"Embedding dimension {matrix.shape[1]} does not match collection dimension {self.dim}"
+                    )
+
+                # Reuse the slot of an existing ID, then free slots, then append
+                free = iter(np.flatnonzero(~self._valid).tolist())
+                next_slot = len(self._ids)
+                slots, inserts, updates = [], [], []
+                for chunk_id, document, metadata in zip(ids, documents, metadatas):
+                    row = (document, json.dumps(metadata) if metadata else None, chunk_id)
+                    slot = self._slots.get(chunk_id)
+                    if slot is None:
+                        slot = next(free, None)
+                        if slot is None:
+                            slot, next_slot = next_slot, next_slot + 1
+                        self._slots[chunk_id] = slot
+                        inserts.append((slot,) + row)
+                    else:
+                        updates.append(row)
+                    slots.append(slot)
+                self._grow(next_slot)
+
+                # Vectors are flushed before the rows that point to them are committed
+                vectors = self._open_vectors(len(self._ids))
+                vectors[slots] = matrix
+                vectors.flush()
+                # A plain INSERT, so a slot taken by another writer fails instead of being overwritten
+                self._conn.executemany("INSERT INTO chunks (slot, document, metadata, id) VALUES (?, ?, ?, ?)", inserts)
+                self._conn.executemany("UPDATE chunks SET document = ?, metadata = ? WHERE id = ?", updates)
+                # Read before committing: later changes by other connections must still trigger a refresh
+                data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                # In-memory slot assignments may no longer match the database
+                self._data_version = None
+                self._refresh()
+                raise
+            for chunk_id, slot, metadata in zip(ids, slots, metadatas):
+                self._ids[slot] = chunk_id
+                self._metadatas[slot] = metadata
+                self._valid[slot] = True
+            self._norms[slots] = np.einsum("ij,ij->i", matrix, matrix)
+            if self._codes is not None:
+                codes = self._codec.encode(matrix)
+                self._codes[slots] = codes
+                if self._code_norms is not None:
+                    self._code_norms[slots] = self._codec.code_norms(codes)
+            self._mask_cache.clear()
+            self._field_indexes.clear()
+            self._data_version = data_version
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[dict] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        include: Sequence[str] = ("documents", "metadatas"),
+    ) -> dict:
+        with self._lock:
+            self._refresh()
+            mask = self._where_mask(where)
+            if ids is not None:
+                slots = [self._slots[chunk_id] for chunk_id in dict.fromkeys(ids) if chunk_id in self._slots]
+                slots = [slot for slot in slots if mask[slot]]
+            else:
+                slots = np.flatnonzero(mask).tolist()
+            slots = slots[offset:offset + limit] if limit is not None else slots[offset:]
+            return self._result(slots, include)
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[dict] = None):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh()
+                mask = self._where_mask(where)
+                if ids is not None:
+                    slots = [self._slots[chunk_id] for chunk_id in ids if chunk_id in self._slots]
+                    slots = [slot for slot in slots if mask[slot]]
+                else:
+                    slots = np.flatnonzero(mask).tolist()
+                deleted = [self._ids[slot] for slot in slots]
+                self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(chunk_id,) for chunk_id in deleted])
+                data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+            if not slots:
+                return
+            for chunk_id, slot in zip(deleted, slots):
+                del self._slots[chunk_id]
+                self._ids[slot] = None
+                self._metadatas[slot] = None
+                self._valid[slot] = False
+            self._norms[slots] = 0.0
+            self._mask_cache.clear()
+            self._field_indexes.clear()
+            self._data_version = data_version
+
+    def _exact_top_k(self, queries: np.ndarray, mask: np.ndarray, candidates: np.ndarray, k: int) -> tuple:
+        """(slots, distances) of the k nearest candidates per query, scored against the full vectors"""
+        size = len(self._ids)
+        if len(candidates) * 2 >= size:
+            # Most slots qualify: score the whole mapped matrix and rule out the rest
+            slot_index, vectors, norms = np.arange(size), self._vectors[:size], self._norms
+        else:
+            slot_index, vectors, norms = candidates, self._vectors[candidates], self._norms[candidates]
+        # ||x - q||^2 = ||x||^2 - 2 x.q + ||q||^2
+        distances = norms[None, :] - 2 * (queries @ vectors.T)
+        distances += np.einsum("ij,ij->i", queries, queries)[:, None]
+        np.maximum(distances, 0, out=distances)
+        if len(slot_index) != len(candidates):
+            distances[:, ~mask] = np.inf
+
+        if k < distances.shape[1]:
+            top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(distances.shape[1]), (len(queries), 1))
+        order = np.take_along_axis(distances, top, axis=1).argsort(axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        return slot_index[top], np.take_along_axis(distances, top, axis=1)
+
+    def _compressed_top_k(self, queries: np.ndarray, mask: np.ndarray, candidates: np.ndarray, k: int) -> tuple:
+        """Shortlist candidates by approximate distance to their codes, then re-rank with the full vectors"""
+        size = len(self._ids)
+        if len(candidates) * 2 >= size:
+            slot_index = np.arange(size)
+            approx = self._codec.distances(
+                queries, self._codes[:size], self._code_norms[:size] if self._code_norms is not None else None
+            )
+            approx[:, ~mask] = np.inf
+        else:
+            slot_index = candidates
+            approx = self._codec.distances(
+                queries, self._codes[candidates], self._code_norms[candidates] if self._code_norms is not None else None
+            )
+
+        rerank = settings.COMPRESSION_RERANK
+        shortlist = min(k * rerank if rerank > 0 else k, len(candidates))
+        top = np.argpartition(approx, shortlist - 1, axis=1)[:, :shortlist]
+        slots = slot_index[top]
+        if rerank > 0:
+            # Only the shortlisted rows of the vector file are read
+            vectors = self._vectors[slots.ravel()].reshape(len(queries), shortlist, self.dim)
+            distances = self._norms[slots] - 2 * np.einsum("ijk,ik->ij", vectors, queries)
+            distances += np.einsum("ij,ij->i", queries, queries)[:, None]
+            np.maximum(distances, 0, out=distances)
+        else:
+            distances = np.take_along_axis(approx, top, axis=1)
+        order = distances.argsort(axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(slots, order, axis=1), np.take_along_axis(distances, order, axis=1)
+
+    def _ensure_codes(self):
+        """Load or fit the codec and encode every slot, once the collection is large enough to compress"""
+        if self.compression == "none" or self._codes is not None:
+            return
+        live = np.flatnonzero(self._valid)
+        if len(live) < settings.COMPRESSION_MIN_VECTORS:
+            return
+        train_size = min(settings.COMPRESSION_TRAIN_SIZE, len(live))
+        codec = self._codec
+        if codec is None and self._codec_path.exists():
+            try:
+                codec = VectorCodec.load(self._codec_path)
+            except (OSError, ValueError, KeyError):
+                codec = None
+        # Refit when the settings changed or the collection has far outgrown the fitting sample
+        if (
+            codec is None
+            or not codec.matches(self.compression, settings.COMPRESSION_PCA_DIM, settings.COMPRESSION_PQ_SUBVECTORS)
+            or codec.fitted_count * 2 < train_size
+        ):
+            with metrics.timer("store.compression_fit"):
+                sample = np.sort(np.random.default_rng(0).choice(live, size=train_size, replace=False))
+                codec = VectorCodec(
+                    self.compression, settings.COMPRESSION_PCA_DIM, settings.COMPRESSION_PQ_SUBVECTORS
+                ).fit(self._vectors[sample])
+                codec.save(self._codec_path)
+        started = time.perf_counter()
+        self._codec = codec
+        self._codes = codec.encode(self._vectors[:len(self._ids)])
+        self._code_norms = codec.code_norms(self._codes)
+        metrics.observe("store.compression_encode", time.perf_counter() - started)
+
+    def memory_stats(self) -> dict:
+        """Bytes held for search: full float32 vectors versus compressed codes (None until codes are built)"""
+        with self._lock:
+            self._refresh()
+            count = int(self._valid.sum())
+            return {
+                "compression": self.compression,
+                "vectors": count,
+                "full_bytes": count * self.dim * 4,
+                "code_bytes": count * self._codec.code_bytes if self._codes is not None else None,
+            }
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        where: Optional[dict] = None,
+        include: Sequence[str] = ("documents", "metadatas", "distances"),
+    ) -> dict:
+        """k nearest slots for each query by squared L2 distance, all queries in one matrix product"""
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        with self._lock:
+            self._refresh()
+            mask = self._where_mask(where)
+            candidates = np.flatnonzero(mask)
+            k = min(n_results, len(candidates))
+            if k <= 0:
+                empty = [[] for _ in range(len(queries))]
+                return {"ids": empty, "documents": empty, "metadatas": empty, "distances": empty}
+            self._ensure_codes()
+            shortlist = k * settings.COMPRESSION_RERANK if settings.COMPRESSION_RERANK > 0 else k
+            if self._codes is not None and len(candidates) > shortlist:
+                top, top_distances = self._compressed_top_k(queries, mask, candidates, k)
+            else:
+                top, top_distances = self._exact_top_k(queries, mask, candidates, k)
+
+            result: Dict[str, List[list]] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+            for slots, distances in zip(top, top_distances):
+                hits = self._result(slots.tolist(), include)
+                result["ids"].append(hits["ids"])
+                result["documents"].append(hits.get("documents"))
+                result["metadatas"].append(hits.get("metadatas"))
+                result["distances"].append(distances.tolist())
+            return result
+
+    def flush(self):
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+
+    def clear(self):
+        """Delete every chunk and release the vector file"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM chunks")
+                self._conn.execute("DELETE FROM meta")
+            self._vectors = None
+            self._vectors_path.unlink(missing_ok=True)
+            self._codec_path.unlink(missing_ok=True)
+            self._codec = None
+            self._data_version = None
+            self._refresh()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+
+class NumpyVectorStore(ChromaVectorStore):
+    """ChromaVectorStore with exact search over a memory-mapped matrix instead of Chroma's HNSW index
+
+    Meant for collections up to a few hundred thousand chunks, where a brute-force matrix
+    product is as fast as HNSW and has no recall loss. The BM25 index, source registry,
+    document store and caches are the same as for Chroma. VECTOR_COMPRESSION trades a
+    little recall for a much smaller in-memory footprint (see NumpyCollection).
+    """
+
+    VECTOR_BACKEND = "numpy"
+
+    def _initialize_store(self):
+        self.vector_store = None
+        self._numpy_collection = NumpyCollection(settings.CHROMA_DB_PATH, self.collection_name)
+
+    @property
+    def collection(self) -> NumpyCollection:
+        return self._numpy_collection
+
+    def _drop_collection(self):
+        self._numpy_collection.clear()
+
+    def _persist(self):
+        self._numpy_collection.flush()
+
+    def reopen(self) -> "NumpyVectorStore":
+        """Return a store for this collection with its files opened again
+
+        NumpyCollection already rereads them when another process changes them, so this
+        only gives the store fresh sidecar indexes and caches.
+        """
+        return self.open_collection(self.collection_name)
+
+    def close(self):
+        self._numpy_collection.close()
+
+    def list_collection_names(self) -> List[str]:
+        suffix = "_vectors.sqlite3"
+        return sorted(
+            path.name[:-len(suffix)] for path in Path(settings.CHROMA_DB_PATH).glob(f"*{suffix}")
+        )
+
+    def get_collection_info(self) -> dict:
+        info = super().get_collection_info()
+        if info and self._numpy_collection.compression != "none":
+            info["vector_compression"] = self._numpy_collection.memory_stats()
+        return info
+
+
+def create_vector_store(
+    embeddings: Optional[Embeddings] = None,
+    model_name: Optional[str] = None,
+    collection_name: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> ChromaVectorStore:
+    """Create the store for VECTOR_BACKEND (or backend): "chroma" (HNSW) or "numpy" (exact)"""
+    backend = backend or settings.VECTOR_BACKEND
+    if backend == "chroma":
+        return ChromaVectorStore(embeddings=embeddings, model_name=model_name, collection_name=collection_name)
+    if backend == "numpy":
+        return NumpyVectorStore(embeddings=embeddings, model_name=model_name, collection_name=collection_name)
+    raise ValueError(f"Unsupported vector backend: {backend}. Supported backends: {VECTOR_BACKENDS}")
@@ -0,0 +1,217 @@
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+# "pca" keeps PCA_DIM float32 dimensions; "int8" stores one byte per dimension;
+# "pq" stores one byte per subvector (PQ_SUBVECTORS bytes in total)
+COMPRESSION_MODES = ("none", "int8", "pq", "pca", "pca-int8", "pca-pq")
+
+# Rows encoded or scored per step, bounding temporary float32 copies
+_BLOCK_ROWS = 32768
+
+
+def kmeans(data: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """Lloyd's k-means from random points; empty clusters are restarted on random points"""
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    data_norms = np.einsum("ij,ij->i", data, data)
+    for _ in range(iterations):
+        distances = data_norms[:, None] - 2 * data @ centroids.T + np.einsum("ij,ij->i", centroids, centroids)[None, :]
+        assignment = distances.argmin(axis=1)
+        counts = np.bincount(assignment, minlength=k)
+        sums = np.stack(
+            [np.bincount(assignment, weights=data[:, column], minlength=k) for column in range(data.shape[1])], axis=1
+        )
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        if empty.any():
+            centroids[empty] = data[rng.choice(len(data), size=int(empty.sum()), replace=False)]
+    return centroids
+
+
+class VectorCodec:
+    """Compact codes for vectors, fitted on a sample: optional PCA projection, then int8 or PQ quantization
+
+    distances() scores float32 queries against codes without decoding them into a full
+    matrix (asymmetric distance computation: for PQ, one lookup table of query-to-centroid
+    distances per subvector), giving approximate squared L2 distances for candidate
+    selection. Exact distances come from re-ranking the candidates with the full vectors.
+    """
+
+    def __init__(self, mode: str = "pq", pca_dim: int = 128, pq_subvectors: int = 48):
+        if mode not in COMPRESSION_MODES or mode == "none":
+            raise ValueError(f"Unsupported compression mode: {mode}. Supported modes: {COMPRESSION_MODES[1:]}")
+        self.mode = mode
+        self.pca_dim = pca_dim
+        self.pq_subvectors = pq_subvectors
+        self.fitted_count = 0
+        self.mean: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None
+        self.low: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+        self.codebooks: List[np.ndarray] = []
+        self.splits: List[int] = []
+
+    @property
+    def uses_pca(self) -> bool:
+        return self.mode.startswith("pca")
+
+    @property
+    def quantizer(self) -> str:
+        return self.mode.split("-")[-1] if self.mode != "pca" else "none"
+
+    @property
+    def code_bytes(self) -> int:
+        """Bytes stored per vector, including the float32 norm kept for the non-PQ modes"""
+        if self.quantizer == "pq":
+            return len(self.codebooks)
+        dim = self.components.shape[1] if self.components is not None else len(self.low)
+        return (dim if self.quantizer == "int8" else dim * 4) + 4
+
+    def matches(self, mode: str, pca_dim: int, pq_subvectors: int) -> bool:
+        """Whether this codec was fitted with the given settings"""
+        return (
+            self.mode == mode
+            and (not self.uses_pca or self.pca_dim == pca_dim)
+            and (self.quantizer != "pq" or self.pq_subvectors == pq_subvectors)
+        )
+
+    def _project(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.components is None:
+            return vectors
+        return (vectors - self.mean) @ self.components
+
+    def fit(self, sample: np.ndarray, iterations: int = 20, seed: int = 0) -> "VectorCodec":
+        """Fit the projection and quantizer on sample (n x dim float32)"""
+        sample = np.asarray(sample, dtype=np.float32)
+        rng = np.random.default_rng(seed)
+        self.fitted_count = len(sample)
+        if self.uses_pca:
+            self.mean = sample.mean(axis=0)
+            _, _, vt = np.linalg.svd(sample - self.mean, full_matrices=False)
+            self.components = np.ascontiguousarray(vt[:min(self.pca_dim, vt.shape[0])].T)
+        projected = self._project(sample)
+
+        if self.quantizer == "int8":
+            self.low = projected.min(axis=0)
+            self.scale = np.maximum(projected.max(axis=0) - self.low, 1e-12) / 255
+        elif self.quantizer == "pq":
+            subvectors = min(self.pq_subvectors, projected.shape[1])
+            # Uneven splits are allowed, so the dimension need not be a multiple of the subvector count
+            self.splits = [len(part) for part in np.array_split(np.arange(projected.shape[1]), subvectors)]
+            clusters = min(256, len(projected))
+            self.codebooks = [
+                kmeans(np.ascontiguousarray(part), clusters, iterations, rng)
+                for part in np.split(projected, np.cumsum(self.splits)[:-1], axis=1)
+            ]
+        return self
+
+    def _encode_block(self, vectors: np.ndarray) -> np.ndarray:
+        projected = self._project(vectors)
+        if self.quantizer == "int8":
+            return np.clip(np.rint((projected - self.low) / self.scale), 0, 255).astype(np.uint8)
+        if self.quantizer == "pq":
+            codes = np.empty((len(projected), len(self.codebooks)), dtype=np.uint8)
+            parts = np.split(projected, np.cumsum(self.splits)[:-1], axis=1)
+            for j, (part, codebook) in enumerate(zip(parts, self.codebooks)):
+                distances = -2 * part @ codebook.T + np.einsum("ij,ij->i", codebook, codebook)[None, :]
+                codes[:, j] = distances.argmin(axis=1)
+            return codes
+        return np.ascontiguousarray(projected, dtype=np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Codes for vectors (n x dim), encoded block by block so a memory map is read once"""
+        if len(vectors) <= _BLOCK_ROWS:
+            return self._encode_block(vectors)
+        return np.concatenate([
+            self._encode_block(vectors[start:start + _BLOCK_ROWS]) for start in range(0, len(vectors), _BLOCK_ROWS)
+        ])
+
+    def _decode(self, codes: np.ndarray) -> np.ndarray:
+        if self.quantizer == "int8":
+            return codes.astype(np.float32) * self.scale + self.low
+        return codes
+
+    def code_norms(self, codes: np.ndarray) -> Optional[np.ndarray]:
+        """Squared norms of the decoded vectors, kept beside the codes so searches need not decode them
+
+        None for PQ, whose lookup tables already include them.
+        """
+        if self.quantizer == "pq":
+            return None
+        norms = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), _BLOCK_ROWS):
+            block = self._decode(codes[start:start + _BLOCK_ROWS])
+            norms[start:start + len(block)] = np.einsum("ij,ij->i", block, block)
+        return norms
+
+    def distances(self, queries: np.ndarray, codes: np.ndarray, code_norms: Optional[np.ndarray] = None) -> np.ndarray:
+        """Approximate squared L2 distances (queries x codes) in the projected space
+
+        code_norms (from code_norms()) is required for the non-PQ modes.
+        """
+        projected = self._project(queries)
+        result = np.empty((len(projected), len(codes)), dtype=np.float32)
+        if self.quantizer == "pq":
+            parts = np.split(projected, np.cumsum(self.splits)[:-1], axis=1)
+            # tables[j]: distance from each query's j-th subvector to each of the j-th centroids
+            tables = [
+                np.einsum("ij,ij->i", part, part)[:, None] - 2 * part @ codebook.T
+                + np.einsum("ij,ij->i", codebook, codebook)[None, :]
+                for part, codebook in zip(parts, self.codebooks)
+            ]
+            for start in range(0, len(codes), _BLOCK_ROWS):
+                block = codes[start:start + _BLOCK_ROWS]
+                out = result[:, start:start + len(block)]
+                out[:] = 0
+                for j, table in enumerate(tables):
+                    out += table[:, block[:, j]]
+            return result
+
+        # x = code * scale + low, so q.x = code.(q * scale) + q.low without decoding the codes
+        if self.quantizer == "int8":
+            weights, offsets = (projected * self.scale).T, projected @ self.low
+        else:
+            weights, offsets = projected.T, np.zeros(len(projected), dtype=np.float32)
+        base = (np.einsum("ij,ij->i", projected, projected) - 2 * offsets)[:, None]
+        for start in range(0, len(codes), _BLOCK_ROWS):
+            block = codes[start:start + _BLOCK_ROWS]
+            out = result[:, start:start + len(block)]
+            out[:] = base - 2 * (block.astype(np.float32, copy=False) @ weights).T
+            out += code_norms[start:start + len(block)][None, :]
+        return result
+
+    def save(self, path: str):
+        """Write the fitted parameters to an .npz file (atomically)"""
+        arrays = {
+            "mode": np.array(self.mode),
+            "pca_dim": np.array(self.pca_dim),
+            "pq_subvectors": np.array(self.pq_subvectors),
+            "fitted_count": np.array(self.fitted_count),
+            "splits": np.asarray(self.splits, dtype=np.int64),
+        }
+        for name in ("mean", "components", "low", "scale"):
+            if getattr(self, name) is not None:
+                arrays[name] = getattr(self, name)
+        if self.codebooks:
+            arrays["codebooks"] = np.concatenate(self.codebooks, axis=1)
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "VectorCodec":
+        with np.load(path, allow_pickle=False) as data:
+            codec = cls(str(data["mode"]), int(data["pca_dim"]), int(data["pq_subvectors"]))
+            codec.fitted_count = int(data["fitted_count"])
+            codec.splits = data["splits"].tolist()
+            for name in ("mean", "components", "low", "scale"):
+                if name in data:
+                    setattr(codec, name, data[name])
+            if "codebooks" in data:
+                codec.codebooks = np.split(data["codebooks"], np.cumsum(codec.splits)[:-1], axis=1)
+        return codec
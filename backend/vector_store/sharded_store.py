@@ -0,0 +1,463 @@
+import copy
+import hashlib
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from config.settings import settings
+from backend.metrics import metrics
+from .chroma_store import ChromaVectorStore, StoreRetriever, fuse_rankings, make_chunk_id
+from .compaction import CompactSearchMixin
+from .numpy_store import create_vector_store
+from .source_registry import as_list, is_glob
+
+DEFAULT_SHARD = "default"
+
+
+def shard_key(value: Any) -> str:
+    """Turn a team/project/directory name into a shard key Chroma accepts in collection names"""
+    key = re.sub(r"[^a-z0-9._-]+", "-", str(value).lower()).strip("._-")
+    return key[:64] or DEFAULT_SHARD
+
+
+def make_router(rule: str) -> Callable[[Dict[str, Any]], str]:
+    """Build a function mapping chunk metadata to a shard key
+
+    Rules route whole source files, so every chunk of a file lands in one shard:
+    "none" keeps everything in the default shard, "directory" uses the parent folder
+    of file_path (e.g. uploaded_docs/team-a/x.pdf -> team-a), "hash:<n>" spreads
+    sources over n shards, "metadata:<key>" uses a metadata field such as team.
+    """
+    if rule in ("", "none"):
+        return lambda metadata: DEFAULT_SHARD
+    if rule == "directory":
+        def by_directory(metadata: Dict[str, Any]) -> str:
+            file_path = metadata.get("file_path")
+            parent = Path(file_path).parent if file_path else None
+            if parent is None or parent == Path(settings.UPLOAD_DOCS_PATH) or not parent.name:
+                return DEFAULT_SHARD
+            return shard_key(parent.name)
+        return by_directory
+    if rule.startswith("hash:"):
+        shards = int(rule.split(":", 1)[1])
+        if shards < 1:
+            raise ValueError(f"Invalid shard count in SHARD_ROUTING: {rule}")
+        def by_hash(metadata: Dict[str, Any]) -> str:
+            digest = hashlib.sha1(str(metadata.get("source", "")).encode("utf-8")).digest()
+            return f"shard{int.from_bytes(digest[:4], 'little') % shards:02d}"
+        return by_hash
+    if rule.startswith("metadata:"):
+        field = rule.split(":", 1)[1]
+        return lambda metadata: shard_key(metadata[field]) if metadata.get(field) else DEFAULT_SHARD
+    raise ValueError(f"Unsupported SHARD_ROUTING: {rule}. Use none, directory, hash:<n> or metadata:<key>")
+
+
+class _ShardedDocumentStore:
+    """Routes document texts written by DocumentProcessor to the document store of their shard"""
+
+    def __init__(self, store: "ShardedVectorStore"):
+        self.store = store
+
+    def put_document(self, doc_id: str, document: Document):
+        self.store.shard(self.store.route(document.metadata)).document_store.put_document(doc_id, document)
+
+
+class ShardedVectorStore(CompactSearchMixin):
+    """Several Chroma collections (shards) behind one store interface
+
+    Ingestion is routed to a shard per source file by SHARD_ROUTING; searches fan out to
+    the selected shards in parallel and merge by score. Each shard is a full
+    ChromaVectorStore (own collection, BM25 index, source registry, document store and
+    version counter), so it can be cleared without touching the others. The embedding
+    model and query embedding cache are shared.
+    """
+
+    SEARCH_MODES = ChromaVectorStore.SEARCH_MODES
+
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings] = None,
+        model_name: Optional[str] = None,
+        routing: Optional[str] = None,
+    ):
+        self.base_name = settings.VECTOR_STORE_COLLECTION
+        self.routing = settings.SHARD_ROUTING if routing is None else routing
+        self.route_key = make_router(self.routing)
+        self._lock = threading.Lock()
+        # Read before opening, so changes made while opening are seen as newer
+        self.loaded_versions = self.database_versions()
+        self._default = create_vector_store(embeddings=embeddings, model_name=model_name)
+        self._shards: Dict[str, ChromaVectorStore] = {DEFAULT_SHARD: self._default}
+        self.document_store = _ShardedDocumentStore(self)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.SHARD_SEARCH_WORKERS), thread_name_prefix="shard-search"
+        )
+        self._discover_shards()
+
+    # The embedding model and query cache are shared by every shard
+    @property
+    def model_name(self) -> str:
+        return self._default.model_name
+
+    @property
+    def embeddings(self):
+        return self._default.embeddings
+
+    @property
+    def query_model(self):
+        return self._default.query_model
+
+    @property
+    def query_embedding_cache(self):
+        return self._default.query_embedding_cache
+
+    def collection_name(self, key: str) -> str:
+        return self.base_name if key == DEFAULT_SHARD else f"{self.base_name}-{key}"
+
+    def _discover_shards(self):
+        """Open the shards already present in the Chroma database"""
+        prefix = f"{self.base_name}-"
+        for name in self._default.list_collection_names():
+            if name.startswith(prefix):
+                self.shard(name[len(prefix):])
+
+    def database_versions(self) -> Dict[str, int]:
+        """Version counter of every collection on disk, including shards created by other processes"""
+        versions = {}
+        for path in Path(settings.CHROMA_DB_PATH).glob(f"{self.base_name}*.version"):
+            name = path.name[:-len(".version")]
+            if name == self.base_name or name.startswith(f"{self.base_name}-"):
+                try:
+                    versions[name] = int(path.read_text().strip() or 0)
+                except (OSError, ValueError):
+                    versions[name] = 0
+        return versions
+
+    def is_stale(self) -> bool:
+        """Whether any collection changed on disk since this store was opened"""
+        return self.database_versions() != self.loaded_versions
+
+    def reopen(self) -> "ShardedVectorStore":
+        """Return a store that sees the changes other processes made since this one was opened
+
+        Only collections whose version changed are reopened; the other shards, the
+        embedding model and the caches are shared with this store. This store stays
+        usable, so requests already running on it can finish; close_replaced() then
+        releases the collections it no longer shares.
+        """
+        versions = self.database_versions()
+        store = copy.copy(self)
+        store._lock = threading.Lock()
+        store.loaded_versions = versions
+        store._shards = {
+            key: shard.reopen() if versions.get(shard.collection_name) != self.loaded_versions.get(shard.collection_name)
+            else shard
+            for key, shard in self._shards.items()
+        }
+        store._default = store._shards[DEFAULT_SHARD]
+        store.document_store = _ShardedDocumentStore(store)
+        store._discover_shards()
+        return store
+
+    def close_replaced(self, other: "ShardedVectorStore"):
+        """Close the shards of this store that other does not share"""
+        shared = {id(shard) for shard in other._shards.values()}
+        for shard in self._shards.values():
+            if id(shard) not in shared:
+                shard.close()
+
+    def warm_up(self):
+        """Run one query per shard on the calling thread, loading indexes before the first request"""
+        for key in self.shard_keys():
+            self._shards[key].search_hits("warm-up", k=1)
+
+    def shard(self, key: str) -> ChromaVectorStore:
+        """Return the store of a shard, creating its collection on first use"""
+        key = shard_key(key)
+        with self._lock:
+            store = self._shards.get(key)
+            if store is None:
+                store = self._shards[key] = self._default.open_collection(self.collection_name(key))
+            return store
+
+    def shard_keys(self) -> List[str]:
+        return sorted(self._shards)
+
+    def route(self, metadata: Dict[str, Any]) -> str:
+        return self.route_key(metadata or {})
+
+    def _select(self, collections: Optional[Iterable[str]]) -> List[ChromaVectorStore]:
+        """Return the shards named in collections (all shards when None)"""
+        if not collections:
+            return [self._shards[key] for key in self.shard_keys()]
+        unknown = [key for key in collections if shard_key(key) not in self._shards]
+        if unknown:
+            raise ValueError(f"Unknown collections: {unknown}. Available: {self.shard_keys()}")
+        return [self._shards[shard_key(key)] for key in dict.fromkeys(collections)]
+
+    def _tag(self, hits: List[tuple], store: ChromaVectorStore) -> List[tuple]:
+        """Copy hits with the shard key in their metadata (cached hits are never modified)"""
+        key = next(key for key, shard in self._shards.items() if shard is store)
+        return [
+            (chunk_id, Document(page_content=doc.page_content, metadata=dict(doc.metadata, collection=key)), score)
+            for chunk_id, doc, score in hits
+        ]
+
+    def _fan_out(self, items: List[Any], fn: Callable[[Any], Any]) -> List[Any]:
+        if len(items) == 1:
+            return [fn(items[0])]
+        return list(self.executor.map(fn, items))
+
+    def _shard_filters(
+        self, stores: List[ChromaVectorStore], filters: Optional[Dict[str, Any]]
+    ) -> List[Tuple[ChromaVectorStore, Optional[Dict[str, Any]]]]:
+        """Pair each shard with the part of filters it can answer
+
+        Exact sources and file types are validated once against all the given shards, so
+        a name held by only some of them is not rejected by the others; shards holding
+        none of the requested sources or file types are left out of the search.
+        """
+        if not filters or (filters.get("source") is None and filters.get("file_type") is None):
+            return [(store, filters) for store in stores]
+        catalogs = [(store, store.list_sources()) for store in stores]
+        sources = file_types = None
+        if filters.get("source") is not None:
+            sources = [str(pattern) for pattern in as_list(filters["source"])]
+            known = {entry["source"] for _, entries in catalogs for entry in entries}
+            unknown = [pattern for pattern in sources if not is_glob(pattern) and pattern not in known]
+            if unknown:
+                raise ValueError(f"Unknown source: {unknown[0]}")
+        if filters.get("file_type") is not None:
+            file_types = [str(file_type).lower().lstrip(".") for file_type in as_list(filters["file_type"])]
+            invalid = set(file_types) - {entry["file_type"] for _, entries in catalogs for entry in entries}
+            if invalid:
+                raise ValueError(f"Unknown file types: {sorted(invalid)}")
+
+        pairs = []
+        for store, entries in catalogs:
+            shard_filters = dict(filters)
+            if sources is not None:
+                held = {entry["source"] for entry in entries}
+                shard_filters["source"] = [pattern for pattern in sources if is_glob(pattern) or pattern in held]
+                if not shard_filters["source"]:
+                    continue
+            if file_types is not None:
+                held = {entry["file_type"] for entry in entries}
+                shard_filters["file_type"] = [file_type for file_type in file_types if file_type in held]
+                if not shard_filters["file_type"]:
+                    continue
+            pairs.append((store, shard_filters))
+        return pairs
+
+    def add_documents(
+        self,
+        documents: Iterable[Document],
+        replace_sources: bool = False,
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+    ) -> List[str]:
+        """Add documents, each to the shard its routing rule selects (see ChromaVectorStore.add_documents)
+
+        Documents stream through in runs of consecutive chunks bound for the same shard.
+        With replace_sources, stale chunks are pruned per shard once every run is written.
+        """
+        total = len(documents) if hasattr(documents, "__len__") else None
+        seen: Dict[str, set] = {}
+        sources: Dict[str, set] = {}
+        new_ids: List[str] = []
+        processed = 0
+
+        iterator = iter(documents)
+        pending = next(iterator, None)
+        while pending is not None:
+            key = self.route(pending.metadata)
+            store = self.shard(key)
+            run_start = processed
+
+            def run() -> Iterator[Document]:
+                nonlocal pending, processed
+                while pending is not None and self.route(pending.metadata) == key:
+                    doc = pending
+                    seen.setdefault(key, set()).add(make_chunk_id(doc, self.model_name))
+                    sources.setdefault(key, set()).add(doc.metadata.get("source"))
+                    processed += 1
+                    yield doc
+                    pending = next(iterator, None)
+
+            def report(done: int, _total: Optional[int]):
+                if progress_callback:
+                    progress_callback(run_start + done, total)
+
+            new_ids.extend(store.add_documents(run(), batch_size=batch_size, progress_callback=report))
+
+        if replace_sources:
+            for key, keep_ids in seen.items():
+                store = self.shard(key)
+                removed = store._prune_stale_chunks(sources[key], keep_ids)
+                if removed:
+                    print(f"Removed {removed} stale chunks from previous versions in {store.collection_name}")
+                    store._bump_version()
+        return new_ids
+
+    def delete_sources(self, sources: Iterable[str]) -> int:
+        """Delete every chunk of the given sources from whichever shard holds them"""
+        sources = list(sources)
+        return sum(store.delete_sources(sources) for store in self._select(None))
+
+    def delete_collection(self, collection: Optional[str] = None):
+        """Clear one shard, or every shard when collection is None"""
+        for store in self._select([collection] if collection else None):
+            store.delete_collection()
+
+    def embed_query(self, query: str) -> List[float]:
+        return self._default.embed_query(query)
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        return self._default.embed_queries(queries)
+
+    @staticmethod
+    def _merge(results: List[List[tuple]], mode: str, k: int) -> List[tuple]:
+        """Merge per-shard hits by score: distance ascending for vector modes, descending otherwise"""
+        merged = [hit for hits in results for hit in hits]
+        merged.sort(key=lambda hit: hit[2] if mode in ChromaVectorStore.DISTANCE_MODES else -hit[2])
+        return merged[:k]
+
+    def search_hits(
+        self,
+        query: str,
+        k: int = 5,
+        mode: str = "vector",
+        filters: Optional[Dict[str, Any]] = None,
+        collections: Optional[List[str]] = None,
+        fan_out: Optional[int] = None,
+    ) -> List[tuple]:
+        """Search the selected shards in parallel and merge their (chunk_id, Document, score) hits
+
+        Hit metadata carries the shard key as collection. BM25 scores use per-shard
+        statistics, so lexical and hybrid merges are approximate across shards. In
+        hierarchical mode each shard picks its own fan_out candidate documents.
+        """
+        if mode not in self.SEARCH_MODES:
+            raise ValueError(f"Unsupported search mode: {mode}. Supported modes: {self.SEARCH_MODES}")
+        pairs = self._shard_filters(self._select(collections), filters)
+        if not pairs:
+            return []
+        if mode != "lexical":
+            # Embed once up front; every shard then reads it from the shared query cache
+            self.embed_query(query)
+        with metrics.timer("store.fan_out"):
+            results = self._fan_out(
+                pairs,
+                lambda pair: self._tag(
+                    pair[0].search_hits(query, k=k, mode=mode, filters=pair[1], fan_out=fan_out), pair[0]
+                ),
+            )
+        return self._merge(results, mode, k)
+
+    def search_many(
+        self,
+        queries: List[str],
+        k: int = 5,
+        fuse: bool = False,
+        filters: Optional[Dict[str, Any]] = None,
+        collections: Optional[List[str]] = None,
+    ) -> dict:
+        """Batched vector search across the selected shards (see ChromaVectorStore.search_many)"""
+        pairs = self._shard_filters(self._select(collections), filters)
+        responses = []
+        if pairs:
+            self.embed_queries(queries)
+            with metrics.timer("store.fan_out"):
+                responses = self._fan_out(
+                    pairs, lambda pair: (pair[0], pair[0].search_many(queries, k=k, filters=pair[1]))
+                )
+        results = [
+            self._merge([self._tag(response["results"][idx], store) for store, response in responses], "vector", k)
+            for idx in range(len(queries))
+        ]
+        response = {"results": results}
+        if fuse:
+            response["fused"] = fuse_rankings(results, k)
+        return response
+
+    def search_documents(
+        self, query: str, k: int = 5, mode: str = "vector", filters: Optional[Dict[str, Any]] = None,
+        collections: Optional[List[str]] = None, fan_out: Optional[int] = None,
+    ) -> List[Document]:
+        return [
+            doc for _, doc, _ in self.search_hits(
+                query, k=k, mode=mode, filters=filters, collections=collections, fan_out=fan_out
+            )
+        ]
+
+    def search_with_scores(
+        self, query: str, k: int = 5, mode: str = "vector", filters: Optional[Dict[str, Any]] = None,
+        collections: Optional[List[str]] = None,
+    ) -> List[tuple]:
+        """Search the selected shards with scores (see search_hits for their meaning per mode)"""
+        return [
+            (doc, score) for _, doc, score in self.search_hits(
+                query, k=k, mode=mode, filters=filters, collections=collections
+            )
+        ]
+
+    def get_retriever(
+        self, k: int = 5, mode: str = "vector", filters: Optional[Dict[str, Any]] = None,
+        collections: Optional[List[str]] = None,
+    ) -> StoreRetriever:
+        """Get a LangChain retriever backed by search_documents over the selected shards"""
+        return StoreRetriever(store=self, k=k, mode=mode, filters=filters, collections=collections)
+
+    def _embeddings_by_ids(self, ids: List[str]) -> Dict[str, List[float]]:
+        embeddings: Dict[str, List[float]] = {}
+        for store in self._select(None):
+            embeddings.update(store._embeddings_by_ids(ids))
+        return embeddings
+
+    def expand_context_hits(self, hits: List[tuple], mode: str = "window") -> List[tuple]:
+        """Expand each hit with the document store of the shard it came from"""
+        expanded = {}
+        for key in {doc.metadata.get("collection", DEFAULT_SHARD) for _, doc, _ in hits}:
+            shard_hits = [hit for hit in hits if hit[1].metadata.get("collection", DEFAULT_SHARD) == key]
+            for hit in self.shard(key).expand_context_hits(shard_hits, mode):
+                expanded.setdefault(hit[0], hit)
+        # Expansion may merge hits; keep the surviving ones in their original order
+        return [expanded[chunk_id] for chunk_id, _, _ in hits if chunk_id in expanded]
+
+    def list_sources(self, collections: Optional[List[str]] = None) -> List[dict]:
+        """Every ingested source with the shard that holds it"""
+        sources = []
+        for store in self._select(collections):
+            key = next(key for key, shard in self._shards.items() if shard is store)
+            sources.extend(dict(source, collection=key) for source in store.list_sources())
+        return sources
+
+    def get_collection_info(self) -> dict:
+        collections = {key: self._shards[key].get_collection_info() for key in self.shard_keys()}
+        return {
+            "collection_name": self.base_name,
+            "document_count": sum(info.get("document_count", 0) for info in collections.values()),
+            "embedding_model": self.model_name,
+            "embedding_backend": settings.EMBEDDING_BACKEND,
+            "vector_backend": self._default.VECTOR_BACKEND,
+            "routing": self.routing,
+            "collections": {key: info.get("document_count", 0) for key, info in collections.items()},
+        }
+
+    def cache_stats(self) -> dict:
+        return {
+            "query_embedding_cache": self.query_embedding_cache.stats(),
+            "embedding_cache": self._default.embedding_cache.stats() if self._default.embedding_cache else None,
+            "collections": {
+                key: {
+                    "result_cache": self._shards[key].result_cache.stats(),
+                    "collection_version": self._shards[key].collection_version(),
+                }
+                for key in self.shard_keys()
+            },
+        }
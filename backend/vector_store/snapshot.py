@@ -0,0 +1,229 @@
+"""Portable snapshots of a collection: vectors, IDs, texts and metadata in one checksummed .npz file
+
+Usage (from the project root):
+    python -m backend.vector_store.snapshot export snapshots/kb.npz
+    python -m backend.vector_store.snapshot verify snapshots/kb.npz
+    python -m backend.vector_store.snapshot import snapshots/kb.npz [--collection NAME] [--merge]
+
+Import bulk-loads the stored vectors into Chroma and rebuilds the BM25 index, source
+registry and document store from the snapshot, so the embedding model is never loaded.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config.settings import settings
+from backend.metrics import metrics
+from .chroma_store import ChromaVectorStore
+from .embedding_backends import resolve_model_name
+from .numpy_store import create_vector_store
+
+SNAPSHOT_FORMAT = 1
+# Arrays covered by the manifest checksums, in the order they are written
+_ARRAYS = ("vectors", "ids", "documents", "metadatas", "doc_store")
+
+
+class _NoModel(Embeddings):
+    """Placeholder model for stores opened only to export or import vectors"""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        raise RuntimeError("No embedding model is loaded for snapshot export/import")
+
+    def embed_query(self, text: str) -> List[float]:
+        raise RuntimeError("No embedding model is loaded for snapshot export/import")
+
+
+def open_collection(collection_name: Optional[str] = None, model_name: Optional[str] = None) -> ChromaVectorStore:
+    """Open a collection without loading the embedding model"""
+    return create_vector_store(
+        embeddings=_NoModel(),
+        model_name=model_name or resolve_model_name(settings.EMBEDDING_MODEL),
+        collection_name=collection_name,
+    )
+
+
+def _json_array(value) -> np.ndarray:
+    return np.frombuffer(json.dumps(value, ensure_ascii=False).encode("utf-8"), dtype=np.uint8)
+
+
+def _from_json_array(array: np.ndarray):
+    return json.loads(array.tobytes().decode("utf-8"))
+
+
+def _sha256(array: np.ndarray) -> str:
+    return hashlib.sha256(np.ascontiguousarray(array).tobytes()).hexdigest()
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_snapshot(store: ChromaVectorStore, path: str, dtype: str = "float16") -> dict:
+    """Write every chunk of the store's collection to path; returns the manifest
+
+    A <path>.sha256 file (sha256sum format) is written next to the snapshot.
+    """
+    started = time.perf_counter()
+    collection = store.collection
+    ids: List[str] = []
+    documents: List[Optional[str]] = []
+    metadatas: List[Optional[dict]] = []
+    blocks: List[np.ndarray] = []
+    offset = 0
+    while True:
+        result = collection.get(
+            include=["embeddings", "documents", "metadatas"], limit=store.ID_LOOKUP_BATCH_SIZE, offset=offset
+        )
+        if not result["ids"]:
+            break
+        ids.extend(result["ids"])
+        documents.extend(result["documents"])
+        metadatas.extend(result["metadatas"])
+        blocks.append(np.asarray(result["embeddings"], dtype=np.float32))
+        offset += len(result["ids"])
+
+    vectors = np.concatenate(blocks) if blocks else np.zeros((0, 0), dtype=np.float32)
+    if np.dtype(dtype) == np.float16 and vectors.size and np.abs(vectors).max() > np.finfo(np.float16).max:
+        raise ValueError("Vectors exceed the float16 range; export with dtype float32")
+    arrays = {
+        "vectors": vectors.astype(dtype),
+        "ids": _json_array(ids),
+        "documents": _json_array(documents),
+        "metadatas": _json_array(metadatas),
+        "doc_store": _json_array(list(store.document_store.iter_documents())),
+    }
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "collection": store.collection_name,
+        "collection_metadata": collection.metadata or {},
+        "embedding_model": store.model_name,
+        "count": len(ids),
+        "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+        "dtype": str(np.dtype(dtype)),
+        "checksums": {name: _sha256(arrays[name]) for name in _ARRAYS},
+    }
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez(f, manifest=_json_array(manifest), **arrays)
+    os.replace(tmp_path, path)
+    Path(f"{path}.sha256").write_text(f"{_file_sha256(path)}  {path.name}\n", encoding="utf-8")
+
+    metrics.observe("snapshot.export", time.perf_counter() - started)
+    print(f"Exported {len(ids)} chunks from {store.collection_name} to {path} "
+          f"({path.stat().st_size / 1e6:.1f} MB) in {time.perf_counter() - started:.2f}s")
+    return manifest
+
+
+def verify_snapshot(path: str) -> dict:
+    """Check the file checksum (when a .sha256 file exists) and every array checksum; returns the manifest
+
+    Raises ValueError on any mismatch.
+    """
+    path = Path(path)
+    checksum_path = Path(f"{path}.sha256")
+    if checksum_path.exists():
+        expected = checksum_path.read_text(encoding="utf-8").split()[0]
+        if _file_sha256(path) != expected:
+            raise ValueError(f"Snapshot file checksum mismatch: {path}")
+    with np.load(path, allow_pickle=False) as data:
+        manifest = _from_json_array(data["manifest"])
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format: {manifest.get('format')}")
+        for name in _ARRAYS:
+            if _sha256(data[name]) != manifest["checksums"][name]:
+                raise ValueError(f"Snapshot array checksum mismatch: {name}")
+    return manifest
+
+
+def import_snapshot(store: ChromaVectorStore, path: str, replace: bool = True, force: bool = False) -> dict:
+    """Verify a snapshot and bulk-load it into the store's collection; returns the manifest
+
+    With replace the collection is cleared first, otherwise chunks are upserted by ID and
+    only chunks the collection did not hold yet are counted in the source registry and
+    document centroids. A snapshot made with a different embedding model is refused
+    unless force is set.
+    """
+    started = time.perf_counter()
+    manifest = verify_snapshot(path)
+    if manifest["embedding_model"] != store.model_name and not force:
+        raise ValueError(
+            f"Snapshot was embedded with {manifest['embedding_model']}, this store uses {store.model_name}; "
+            f"re-embed or pass force=True"
+        )
+
+    with np.load(path, allow_pickle=False) as data:
+        vectors = data["vectors"]
+        ids = _from_json_array(data["ids"])
+        documents = _from_json_array(data["documents"])
+        metadatas = _from_json_array(data["metadatas"])
+        doc_store_rows = _from_json_array(data["doc_store"])
+
+    if replace:
+        store.delete_collection()
+    store.document_store.put_many(tuple(row) for row in doc_store_rows)
+
+    collection = store.collection
+    batch_size = store.ID_LOOKUP_BATCH_SIZE
+    for start in range(0, len(ids), batch_size):
+        end = start + batch_size
+        batch_ids = ids[start:end]
+        batch_metadatas = metadatas[start:end]
+        batch_vectors = vectors[start:end].astype(np.float32)
+        # Chunk IDs are content-addressed, so a stored ID is already counted with the same metadata
+        existing = set() if replace else store._existing_ids(batch_ids)
+        collection.upsert(
+            ids=batch_ids,
+            embeddings=batch_vectors,
+            documents=documents[start:end],
+            metadatas=batch_metadatas,
+        )
+        store.lexical_index.add(batch_ids, store._chunk_texts(documents[start:end], batch_metadatas))
+        new = [idx for idx, chunk_id in enumerate(batch_ids) if chunk_id not in existing]
+        store.source_registry.add(batch_metadatas[idx] for idx in new)
+        store.centroid_index.add([batch_metadatas[idx] for idx in new], batch_vectors[new])
+    store._bump_version()
+
+    metrics.observe("snapshot.import", time.perf_counter() - started)
+    print(f"Imported {len(ids)} chunks into {store.collection_name} in {time.perf_counter() - started:.2f}s")
+    return manifest
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Export, verify or import a vector store snapshot")
+    parser.add_argument("command", choices=["export", "verify", "import"])
+    parser.add_argument("path", help="Snapshot file (.npz)")
+    parser.add_argument("--collection", default=None, help="Chroma collection (default: VECTOR_STORE_COLLECTION)")
+    parser.add_argument("--dtype", choices=["float16", "float32"], default="float16", help="Vector precision on export")
+    parser.add_argument("--merge", action="store_true", help="Upsert into the collection instead of replacing it")
+    parser.add_argument("--force", action="store_true", help="Import even if the embedding model differs")
+    args = parser.parse_args(argv)
+
+    if args.command == "verify":
+        manifest = verify_snapshot(args.path)
+        print(json.dumps({key: value for key, value in manifest.items() if key != "checksums"}, indent=2))
+        print("Snapshot OK")
+    elif args.command == "export":
+        export_snapshot(open_collection(args.collection), args.path, dtype=args.dtype)
+    else:
+        import_snapshot(open_collection(args.collection), args.path, replace=not args.merge, force=args.force)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
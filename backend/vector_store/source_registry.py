@@ -0,0 +1,196 @@
+import fnmatch
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# Filter keys accepted by build_where and the metadata fields they map to
+RANGE_FILTERS = {"page": "page_number", "slide": "slide_number", "chunk_index": "chunk_index"}
+FILTER_KEYS = ("source", "file_type") + tuple(RANGE_FILTERS)
+
+
+def is_glob(pattern: str) -> bool:
+    return any(char in pattern for char in "*?[")
+
+
+class SourceRegistry:
+    """Per-source summary of the collection (file type, chunk count, page/slide extent) in SQLite
+
+    Lets search filters be validated and source globs be expanded without scanning Chroma.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS sources (
+                source TEXT PRIMARY KEY,
+                file_type TEXT,
+                chunk_count INTEGER NOT NULL DEFAULT 0,
+                max_page INTEGER,
+                max_slide INTEGER,
+                updated_at REAL NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def _add_locked(self, metadatas: Iterable[Dict[str, Any]]):
+        summary: Dict[str, dict] = {}
+        for metadata in metadatas:
+            metadata = metadata or {}
+            entry = summary.setdefault(metadata.get("source", ""), {
+                "file_type": metadata.get("file_type"), "count": 0, "page": None, "slide": None
+            })
+            entry["count"] += 1
+            for key, field in (("page", "page_number"), ("slide", "slide_number")):
+                value = metadata.get(field)
+                if value is not None and (entry[key] is None or value > entry[key]):
+                    entry[key] = value
+
+        now = time.time()
+        self._conn.executemany("""
+            INSERT INTO sources (source, file_type, chunk_count, max_page, max_slide, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (source) DO UPDATE SET
+                file_type = COALESCE(excluded.file_type, file_type),
+                chunk_count = chunk_count + excluded.chunk_count,
+                max_page = MAX(COALESCE(max_page, 0), COALESCE(excluded.max_page, 0)),
+                max_slide = MAX(COALESCE(max_slide, 0), COALESCE(excluded.max_slide, 0)),
+                updated_at = excluded.updated_at
+        """, [
+            (source, entry["file_type"], entry["count"], entry["page"], entry["slide"], now)
+            for source, entry in summary.items()
+        ])
+
+    def add(self, metadatas: Iterable[Dict[str, Any]]):
+        """Record newly stored chunks"""
+        with self._lock, self._conn:
+            self._add_locked(metadatas)
+
+    def remove(self, sources: Iterable[str]):
+        """Record deleted chunks, one source entry per deleted chunk"""
+        counts = Counter(sources)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE sources SET chunk_count = chunk_count - ? WHERE source = ?",
+                [(count, source) for source, count in counts.items()]
+            )
+            self._conn.execute("DELETE FROM sources WHERE chunk_count <= 0")
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sources")
+
+    def rebuild(self, expected_chunks: int, batches: Iterable[List[Dict[str, Any]]]) -> bool:
+        """Replace the registry with batches of chunk metadata, unless it already counts expected_chunks
+
+        The count is checked again under SQLite's write lock, so concurrent rebuilds (from
+        other threads or processes) count each chunk once. Returns whether it rebuilt.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                total = self._conn.execute("SELECT COALESCE(SUM(chunk_count), 0) FROM sources").fetchone()[0]
+                if total == expected_chunks:
+                    self._conn.rollback()
+                    return False
+                self._conn.execute("DELETE FROM sources")
+                for metadatas in batches:
+                    self._add_locked(metadatas)
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return True
+
+    def total_chunks(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(chunk_count), 0) FROM sources").fetchone()[0]
+
+    def list_sources(self) -> List[dict]:
+        """Return every known source with its summary"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, file_type, chunk_count, max_page, max_slide FROM sources ORDER BY source"
+            ).fetchall()
+        return [
+            {"source": source, "file_type": file_type, "chunk_count": chunks, "pages": pages or None, "slides": slides or None}
+            for source, file_type, chunks, pages, slides in rows
+        ]
+
+    def resolve_sources(self, patterns: List[str]) -> List[str]:
+        """Expand exact names and glob patterns (*, ?, [...]) to known sources"""
+        known = [entry["source"] for entry in self.list_sources()]
+        resolved = []
+        for pattern in patterns:
+            if is_glob(pattern):
+                resolved.extend(source for source in known if fnmatch.fnmatchcase(source, pattern))
+            elif pattern in known:
+                resolved.append(pattern)
+            else:
+                raise ValueError(f"Unknown source: {pattern}")
+        return sorted(set(resolved))
+
+    def file_types(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT file_type FROM sources WHERE file_type IS NOT NULL").fetchall()
+        return sorted(row[0] for row in rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def as_list(value) -> List:
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+def build_where(filters: Optional[Dict[str, Any]], registry: SourceRegistry) -> Optional[dict]:
+    """Translate search filters into a Chroma where clause
+
+    Supported keys: source (name, glob or list of them), file_type (name or list),
+    page, slide and chunk_index (a number or an inclusive [start, end] range).
+    Returns None for no filters. Raises ValueError for unknown keys or values, and
+    LookupError when a source glob matches nothing (so the search can return no hits).
+    """
+    if not filters:
+        return None
+    unknown = set(filters) - set(FILTER_KEYS)
+    if unknown:
+        raise ValueError(f"Unsupported filter keys: {sorted(unknown)}. Supported keys: {list(FILTER_KEYS)}")
+
+    conditions = []
+    if filters.get("source") is not None:
+        sources = registry.resolve_sources([str(pattern) for pattern in as_list(filters["source"])])
+        if not sources:
+            raise LookupError(f"No sources match {filters['source']}")
+        conditions.append({"source": sources[0]} if len(sources) == 1 else {"source": {"$in": sources}})
+
+    if filters.get("file_type") is not None:
+        file_types = [str(file_type).lower().lstrip(".") for file_type in as_list(filters["file_type"])]
+        invalid = set(file_types) - set(registry.file_types())
+        if invalid:
+            raise ValueError(f"Unknown file types: {sorted(invalid)}")
+        conditions.append({"file_type": file_types[0]} if len(file_types) == 1 else {"file_type": {"$in": file_types}})
+
+    for key, field in RANGE_FILTERS.items():
+        value = filters.get(key)
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            if len(value) != 2:
+                raise ValueError(f"Filter {key} must be a number or a [start, end] range")
+            start, end = int(value[0]), int(value[1])
+            conditions.append({field: {"$gte": start}})
+            conditions.append({field: {"$lte": end}})
+        else:
+            conditions.append({field: int(value)})
+
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
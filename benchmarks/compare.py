@@ -0,0 +1,43 @@
+"""Compare two benchmark result files metric by metric
+
+Usage: python -m benchmarks.compare baseline.json candidate.json
+"""
+import json
+import sys
+from typing import Dict
+
+
+def _flatten(data, prefix: str = "") -> Dict[str, float]:
+    """Collect numeric leaves as dotted paths, skipping the run configuration"""
+    metrics = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if key == "config":
+            continue
+        if isinstance(value, dict):
+            metrics.update(_flatten(value, path + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[path] = value
+    return metrics
+
+
+def main(argv=None):
+    argv = argv if argv is not None else sys.argv[1:]
+    if len(argv) != 2:
+        print(__doc__)
+        return 1
+    with open(argv[0], encoding="utf-8") as f:
+        baseline = _flatten(json.load(f))
+    with open(argv[1], encoding="utf-8") as f:
+        candidate = _flatten(json.load(f))
+
+    print(f"{'metric':<50} {'baseline':>12} {'candidate':>12} {'change':>9}")
+    for name in sorted(set(baseline) | set(candidate)):
+        old, new = baseline.get(name), candidate.get(name)
+        change = f"{(new - old) / old * 100:+.1f}%" if old and new is not None else ""
+        print(f"{name:<50} {old if old is not None else '-':>12} {new if new is not None else '-':>12} {change:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""Vector compression report: memory saved against recall@k lost
+
+Stores the same vectors in a NumPy collection once, then searches them with each
+VECTOR_COMPRESSION mode and re-rank depth and compares the results with exact search.
+Reports bytes per vector, memory saved, recall@k, query latency and codec build time.
+
+Usage (from the project root):
+    python -m benchmarks.compression                                  # fake embeddings, synthetic passages
+    python -m benchmarks.compression --embedding minilm --passages 20000
+    python -m benchmarks.compression --collection knowledge_base      # vectors already in CHROMA_DB_PATH
+    python -m benchmarks.compression --modes int8 pca-pq --rerank 0 2 8
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import settings
+from backend.vector_store.numpy_store import NumpyCollection
+from backend.vector_store.quantization import COMPRESSION_MODES
+from benchmarks.corpus import CorpusGenerator
+from benchmarks.fake_embeddings import HashingEmbeddings
+from benchmarks.run import RESULTS_DIR, _latency_summary
+
+
+def _synthetic_vectors(args) -> tuple:
+    """Embed generated passages and queries"""
+    if args.embedding == "fake":
+        embeddings = HashingEmbeddings()
+    else:
+        from backend.vector_store.embedding_backends import create_embeddings
+        embeddings = create_embeddings()
+    generator = CorpusGenerator(seed=args.seed)
+    passages = [generator.paragraph(3) for _ in range(args.passages)]
+    queries = [generator.sentence() for _ in range(args.queries)]
+    return (
+        np.asarray(embeddings.embed_documents(passages), dtype=np.float32),
+        np.asarray([embeddings.embed_query(query) for query in queries], dtype=np.float32),
+    )
+
+
+def _collection_vectors(args) -> tuple:
+    """Stored vectors of a collection; a random sample of them is held out as queries"""
+    from backend.vector_store.snapshot import open_collection
+    collection = open_collection(args.collection).collection
+    blocks, offset = [], 0
+    while True:
+        result = collection.get(include=["embeddings"], limit=1000, offset=offset)
+        if not result["ids"]:
+            break
+        blocks.append(np.asarray(result["embeddings"], dtype=np.float32))
+        offset += len(result["ids"])
+    if not blocks:
+        raise ValueError(f"Collection {args.collection} is empty")
+    vectors = np.concatenate(blocks)
+    rng = np.random.default_rng(args.seed)
+    held_out = rng.choice(len(vectors), size=min(args.queries, len(vectors) // 10), replace=False)
+    keep = np.ones(len(vectors), dtype=bool)
+    keep[held_out] = False
+    return vectors[keep], vectors[held_out]
+
+
+def _search(collection: NumpyCollection, queries: np.ndarray, k: int) -> tuple:
+    """Top-k IDs per query and per-query latencies, one query at a time as the server runs them"""
+    retrieved, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        result = collection.query(query_embeddings=[query], n_results=k, include=[])
+        latencies.append(time.perf_counter() - started)
+        retrieved.append(result["ids"][0])
+    return retrieved, latencies
+
+
+def run(args) -> dict:
+    vectors, queries = _collection_vectors(args) if args.collection else _synthetic_vectors(args)
+    print(f"{len(vectors)} vectors of dimension {vectors.shape[1]}, {len(queries)} queries")
+
+    settings.COMPRESSION_MIN_VECTORS = 0
+    settings.COMPRESSION_PCA_DIM = args.pca_dim
+    settings.COMPRESSION_PQ_SUBVECTORS = args.pq_subvectors
+    work_dir = Path(tempfile.mkdtemp(prefix="rag_compression_"))
+    try:
+        exact_collection = NumpyCollection(str(work_dir), "bench", compression="none")
+        ids = [str(i) for i in range(len(vectors))]
+        for start in range(0, len(ids), 5000):
+            exact_collection.upsert(ids=ids[start:start + 5000], embeddings=vectors[start:start + 5000])
+        exact, latencies = _search(exact_collection, queries, args.k)
+        full_bytes = vectors.shape[1] * 4
+        results = {
+            "none": {
+                "bytes_per_vector": full_bytes,
+                "memory_saved": 0.0,
+                f"recall_at_{args.k}": 1.0,
+                "recall_lost": 0.0,
+                "query_latency": _latency_summary(latencies),
+            }
+        }
+
+        for mode in args.modes:
+            collection = NumpyCollection(str(work_dir), "bench", compression=mode)
+            started = time.perf_counter()
+            # The first search fits the codec and encodes every vector
+            collection.query(query_embeddings=queries[:1], n_results=args.k, include=[])
+            build_seconds = time.perf_counter() - started
+            code_bytes = collection.memory_stats()["code_bytes"] // len(vectors)
+            for rerank in args.rerank:
+                settings.COMPRESSION_RERANK = rerank
+                retrieved, latencies = _search(collection, queries, args.k)
+                recall = float(np.mean([len(set(got) & set(want)) / len(want) for got, want in zip(retrieved, exact)]))
+                name = f"{mode}/rerank{rerank}"
+                results[name] = {
+                    "bytes_per_vector": code_bytes,
+                    "memory_saved": round(1 - code_bytes / full_bytes, 4),
+                    f"recall_at_{args.k}": round(recall, 4),
+                    "recall_lost": round(1 - recall, 4),
+                    "query_latency": _latency_summary(latencies),
+                    "build_seconds": round(build_seconds, 3),
+                }
+            collection.close()
+        exact_collection.close()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{'mode':<22}{'bytes/vec':>10}{'saved':>9}{f'recall@{args.k}':>11}{'p50 ms':>9}")
+    for name, result in results.items():
+        print(f"{name:<22}{result['bytes_per_vector']:>10}{result['memory_saved']:>9.1%}"
+              f"{result[f'recall_at_{args.k}']:>11.4f}{result['query_latency']['p50_ms']:>9.3f}")
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": vars(args),
+        "vectors": len(vectors),
+        "dim": int(vectors.shape[1]),
+        "modes": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Measure memory saved against recall lost for vector compression")
+    parser.add_argument("--modes", nargs="+", choices=COMPRESSION_MODES[1:], default=list(COMPRESSION_MODES[1:]))
+    parser.add_argument("--rerank", nargs="+", type=int, default=[0, settings.COMPRESSION_RERANK],
+                        help="Candidates per result re-scored with full vectors (0 = approximate only)")
+    parser.add_argument("--embedding", choices=["fake", "minilm"], default="fake")
+    parser.add_argument("--collection", default=None, help="Use the vectors of this collection instead of synthetic passages")
+    parser.add_argument("--passages", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--pca-dim", type=int, default=settings.COMPRESSION_PCA_DIM)
+    parser.add_argument("--pq-subvectors", type=int, default=settings.COMPRESSION_PQ_SUBVECTORS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Result JSON path (default: benchmarks/results/compression_<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    output = Path(args.output) if args.output else RESULTS_DIR / f"compression_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
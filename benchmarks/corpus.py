@@ -0,0 +1,110 @@
+"""Deterministic synthetic corpus generator for benchmarks (txt, docx, pptx, pdf)"""
+import random
+from pathlib import Path
+from typing import List
+
+from docx import Document as DocxDocument
+from pptx import Presentation
+from pptx.util import Inches
+
+_WORDS = (
+    "account balance batch cache cluster column config customer dashboard database deploy "
+    "endpoint error event export field index ingest invoice job ledger limit log metric "
+    "migration node order partition payment pipeline policy pool query queue record region "
+    "replica report request retry schema server service session shard snapshot storage table "
+    "tenant timeout token transaction user vendor version warehouse worker"
+).split()
+
+
+class CorpusGenerator:
+    """Generates reproducible documents of configurable size from a fixed seed"""
+
+    def __init__(self, seed: int = 42):
+        self.random = random.Random(seed)
+
+    def sentence(self) -> str:
+        words = self.random.choices(_WORDS, k=self.random.randint(8, 18))
+        # Sprinkle in identifiers like the ones lexical search is meant for
+        if self.random.random() < 0.3:
+            words.insert(self.random.randrange(len(words)), f"{self.random.choice(_WORDS)}_{self.random.choice(_WORDS)}")
+        if self.random.random() < 0.1:
+            words.append(f"ERR-{self.random.randint(1000, 9999)}")
+        return " ".join(words).capitalize() + "."
+
+    def paragraph(self, sentences: int = 5) -> str:
+        return " ".join(self.sentence() for _ in range(sentences))
+
+    def write_txt(self, path: Path, pages: int):
+        path.write_text("\n\n".join(self.paragraph() for _ in range(pages * 4)), encoding="utf-8")
+
+    def write_docx(self, path: Path, pages: int):
+        doc = DocxDocument()
+        for _ in range(pages * 4):
+            doc.add_paragraph(self.paragraph())
+        table = doc.add_table(rows=pages, cols=3)
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text = self.sentence()
+        doc.save(str(path))
+
+    def write_pptx(self, path: Path, pages: int):
+        prs = Presentation()
+        for _ in range(pages):
+            slide = prs.slides.add_slide(prs.slide_layouts[5])
+            slide.shapes.title.text = self.sentence()
+            box = slide.shapes.add_textbox(Inches(0.5), Inches(1.5), Inches(9), Inches(5))
+            box.text_frame.text = self.paragraph(4)
+        prs.save(str(path))
+
+    def write_pdf(self, path: Path, pages: int):
+        _write_text_pdf(path, [[self.sentence() for _ in range(20)] for _ in range(pages)])
+
+    def generate(self, directory: str, files_per_type: int = 5, pages: int = 10, file_types: List[str] = None) -> List[str]:
+        """Write files_per_type files of each type with about pages pages each; return their paths"""
+        out_dir = Path(directory)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        writers = {"txt": self.write_txt, "docx": self.write_docx, "pptx": self.write_pptx, "pdf": self.write_pdf}
+        paths = []
+        for file_type in file_types or list(writers):
+            for idx in range(files_per_type):
+                path = out_dir / f"synthetic_{file_type}_{idx:04d}.{file_type}"
+                writers[file_type](path, pages)
+                paths.append(str(path))
+        return paths
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _write_text_pdf(path: Path, pages: List[List[str]]):
+    """Write a minimal PDF with one Helvetica text line per string (PyPDF2 can extract it)"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for lines in pages:
+        stream = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({_pdf_escape(line[:110])}) Tj T*" for line in lines) + " ET"
+        stream_bytes = stream.encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream_bytes) + stream_bytes + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        page_refs.append(len(objects))
+    kids = " ".join(f"{ref} 0 R" for ref in page_refs).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_refs)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
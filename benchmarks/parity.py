@@ -0,0 +1,136 @@
+"""Embedding backend parity check
+
+Embeds the same synthetic passages and queries with the reference backend and each
+candidate backend, then reports vector agreement (cosine similarity), retrieval agreement
+(recall@k of the candidate's nearest passages against the reference's) and latency.
+Exits non-zero when a candidate falls below --min-cosine or --min-recall.
+
+Usage (from the project root):
+    python -m benchmarks.parity                                 # huggingface vs onnx, onnx-int8
+    python -m benchmarks.parity --candidates onnx-int8 --passages 2000 --threads 4
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import settings
+from backend.vector_store.embedding_backends import EMBEDDING_BACKENDS, create_embeddings
+from benchmarks.corpus import CorpusGenerator
+from benchmarks.run import _latency_summary
+
+
+def _normalized(vectors: List[List[float]]) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def _top_k(queries: np.ndarray, passages: np.ndarray, k: int) -> np.ndarray:
+    return np.argsort(-queries @ passages.T, axis=1)[:, :k]
+
+
+def measure_backend(name: str, passages: List[str], queries: List[str], threads: int, batch_size: int) -> dict:
+    """Embed passages in batches and queries one at a time, timing both"""
+    started = time.perf_counter()
+    embeddings = create_embeddings(backend=name, threads=threads, batch_size=batch_size)
+    load_seconds = time.perf_counter() - started
+
+    embeddings.embed_documents(passages[:batch_size])  # warm-up
+    started = time.perf_counter()
+    passage_vectors = embeddings.embed_documents(passages)
+    passage_seconds = time.perf_counter() - started
+
+    query_vectors, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        query_vectors.append(embeddings.embed_query(query))
+        latencies.append(time.perf_counter() - started)
+
+    return {
+        "load_seconds": round(load_seconds, 3),
+        "passages_per_sec": round(len(passages) / passage_seconds, 2) if passage_seconds else None,
+        "query_latency": _latency_summary(latencies),
+        "_passages": _normalized(passage_vectors),
+        "_queries": _normalized(query_vectors),
+    }
+
+
+def run(args) -> dict:
+    generator = CorpusGenerator(seed=args.seed)
+    passages = [generator.paragraph(3) for _ in range(args.passages)]
+    queries = [generator.sentence() for _ in range(args.queries)]
+
+    reference = measure_backend(args.reference, passages, queries, args.threads, args.batch_size)
+    reference_top = _top_k(reference["_queries"], reference["_passages"], args.k)
+
+    results = {args.reference: reference}
+    failed = []
+    for name in args.candidates:
+        try:
+            candidate = measure_backend(name, passages, queries, args.threads, args.batch_size)
+        except Exception as e:
+            print(f"[{name}] skipped: {e}")
+            results[name] = {"skipped": str(e)}
+            continue
+        cosine = np.concatenate([
+            (candidate["_passages"] * reference["_passages"]).sum(axis=1),
+            (candidate["_queries"] * reference["_queries"]).sum(axis=1),
+        ])
+        candidate_top = _top_k(candidate["_queries"], candidate["_passages"], args.k)
+        recall = float(np.mean([
+            len(set(got) & set(want)) / args.k for got, want in zip(candidate_top, reference_top)
+        ]))
+        candidate["cosine_mean"] = round(float(cosine.mean()), 5)
+        candidate["cosine_min"] = round(float(cosine.min()), 5)
+        candidate[f"recall_at_{args.k}"] = round(recall, 4)
+        candidate["query_speedup"] = round(
+            reference["query_latency"]["p50_ms"] / max(candidate["query_latency"]["p50_ms"], 1e-6), 2
+        )
+        ok = candidate["cosine_min"] >= args.min_cosine and recall >= args.min_recall
+        candidate["passed"] = ok
+        if not ok:
+            failed.append(name)
+        results[name] = candidate
+        print(f"[{name}] cosine mean {candidate['cosine_mean']} min {candidate['cosine_min']}, "
+              f"recall@{args.k} {candidate[f'recall_at_{args.k}']}, "
+              f"query p50 {candidate['query_latency']['p50_ms']} ms ({candidate['query_speedup']}x), "
+              f"{candidate['passages_per_sec']} passages/s -> {'OK' if ok else 'FAILED'}")
+
+    print(f"[{args.reference}] query p50 {reference['query_latency']['p50_ms']} ms, "
+          f"{reference['passages_per_sec']} passages/s")
+    for result in results.values():
+        result.pop("_passages", None)
+        result.pop("_queries", None)
+    return {"model": settings.EMBEDDING_MODEL, "config": vars(args), "backends": results, "failed": failed}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compare embedding backends against the reference backend")
+    parser.add_argument("--reference", choices=EMBEDDING_BACKENDS, default="huggingface")
+    parser.add_argument("--candidates", nargs="+", choices=EMBEDDING_BACKENDS, default=["onnx", "onnx-int8"])
+    parser.add_argument("--passages", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=settings.EMBEDDING_THREADS)
+    parser.add_argument("--batch-size", type=int, default=settings.EMBEDDING_INFERENCE_BATCH_SIZE)
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="Lowest acceptable per-vector cosine similarity")
+    parser.add_argument("--min-recall", type=float, default=0.9, help="Lowest acceptable recall@k against the reference")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Optional JSON result path")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Results written to {args.output}")
+    sys.exit(1 if results["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Ingestion and retrieval benchmark
+
+Usage (from the project root):
+    python -m benchmarks.run                              # fake embeddings, small corpus
+    python -m benchmarks.run --embedding both --files-per-type 20 --pages 50
+    python -m benchmarks.run --vector-backend chroma numpy  # HNSW vs exact search
+    python -m benchmarks.compare benchmarks/results/a.json benchmarks/results/b.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import settings
+from backend.document_processor import DocumentLoader, DocumentProcessor
+from benchmarks.corpus import CorpusGenerator
+from benchmarks.fake_embeddings import HashingEmbeddings
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def _latency_summary(seconds: List[float]) -> dict:
+    ms = np.asarray(seconds) * 1000
+    return {
+        "count": int(ms.size),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=Path(__file__).resolve().parent, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _sample_queries(chunks, count: int, seed: int) -> List[str]:
+    """Pick short word windows from random chunks so every query has relevant matches"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        words = rng.choice(chunks).page_content.split()
+        start = rng.randrange(max(1, len(words) - 8))
+        queries.append(" ".join(words[start:start + 8]))
+    return queries
+
+
+def _exact_top_k(store, query_embeddings: np.ndarray, k: int) -> List[List[str]]:
+    """Brute-force nearest neighbours over every stored vector, in the collection's distance space"""
+    collection = store.collection
+    data = collection.get(include=["embeddings"])
+    ids = np.asarray(data["ids"])
+    matrix = np.asarray(data["embeddings"], dtype=np.float32)
+    space = (collection.metadata or {}).get("hnsw:space", "l2")
+
+    if space == "cosine":
+        matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        queries = query_embeddings / np.maximum(np.linalg.norm(query_embeddings, axis=1, keepdims=True), 1e-12)
+        distances = -queries @ matrix.T
+    elif space == "ip":
+        distances = -query_embeddings @ matrix.T
+    else:
+        distances = (
+            (query_embeddings ** 2).sum(axis=1, keepdims=True) - 2 * query_embeddings @ matrix.T + (matrix ** 2).sum(axis=1)
+        )
+    top = np.argsort(distances, axis=1)[:, :k]
+    return [ids[row].tolist() for row in top]
+
+
+def benchmark_store(
+    name: str,
+    embeddings,
+    chunks,
+    queries: List[str],
+    k: int,
+    batch_size: int,
+    work_dir: Path,
+    vector_backend: str = "chroma",
+    search_mode: str = "vector",
+) -> dict:
+    """Measure add_documents throughput, search latency and recall@k for one embedding and vector backend
+
+    Recall is measured against exact search over every chunk, so it also shows what a
+    search_mode such as "hierarchical" gives up for speed.
+    """
+    from backend.vector_store import create_vector_store
+
+    settings.CHROMA_DB_PATH = str(work_dir / f"{vector_backend}_{name}")
+    settings.VECTOR_STORE_COLLECTION = "benchmark"
+    settings.EMBEDDING_CACHE_ENABLED = False
+
+    started = time.perf_counter()
+    try:
+        store = create_vector_store(
+            embeddings=embeddings, model_name=name if embeddings else None, backend=vector_backend
+        )
+    except Exception as e:
+        print(f"[{name}/{vector_backend}] skipped: {e}")
+        return {"skipped": str(e)}
+    init_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    added = store.add_documents(chunks, batch_size=batch_size)
+    ingest_seconds = time.perf_counter() - started
+
+    # Measure uncached latency: every query runs the model and the index
+    store.query_embedding_cache.max_size = 0
+    store.result_cache.max_size = 0
+    for query in queries[:5]:
+        store.search_documents(query, k=k, mode=search_mode)
+
+    latencies = []
+    retrieved = []
+    for query in queries:
+        started = time.perf_counter()
+        store.search_documents(query, k=k, mode=search_mode)
+        latencies.append(time.perf_counter() - started)
+        retrieved.append([chunk_id for chunk_id, _, _ in store.search_hits(query, k=k, mode=search_mode)])
+
+    query_embeddings = np.asarray(store.embed_queries(queries), dtype=np.float32)
+    exact = _exact_top_k(store, query_embeddings, k)
+    recall = float(np.mean([len(set(got) & set(want)) / max(1, len(want)) for got, want in zip(retrieved, exact)]))
+
+    result = {
+        "init_seconds": round(init_seconds, 3),
+        "chunks_added": len(added),
+        "ingest_seconds": round(ingest_seconds, 3),
+        "ingest_chunks_per_sec": round(len(added) / ingest_seconds, 2) if ingest_seconds else None,
+        "search_latency": _latency_summary(latencies),
+        f"recall_at_{k}": round(recall, 4),
+    }
+    print(f"[{name}/{vector_backend}] {result['ingest_chunks_per_sec']} chunks/s, "
+          f"p50 {result['search_latency']['p50_ms']} ms, p99 {result['search_latency']['p99_ms']} ms, "
+          f"recall@{k} {result[f'recall_at_{k}']}")
+    return result
+
+
+def run(args) -> dict:
+    work_dir = Path(tempfile.mkdtemp(prefix="rag_bench_"))
+    try:
+        paths = CorpusGenerator(seed=args.seed).generate(
+            str(work_dir / "corpus"), files_per_type=args.files_per_type, pages=args.pages, file_types=args.types
+        )
+        corpus_bytes = sum(os.path.getsize(path) for path in paths)
+
+        started = time.perf_counter()
+        documents = DocumentLoader.load_documents(paths, max_workers=args.workers)
+        load_seconds = time.perf_counter() - started
+
+        processor = DocumentProcessor()
+        started = time.perf_counter()
+        chunks = processor.process_documents(documents)
+        chunk_seconds = time.perf_counter() - started
+        print(f"Loaded {len(paths)} files ({len(documents)} documents) in {load_seconds:.2f}s, "
+              f"{len(chunks)} chunks in {chunk_seconds:.2f}s")
+
+        queries = _sample_queries(chunks, args.queries, args.seed)
+        backends = {}
+        for vector_backend in args.vector_backend:
+            # Chroma results keep their historical keys so older result files stay comparable
+            suffix = "" if vector_backend == "chroma" else f"-{vector_backend}"
+            if args.embedding in ("fake", "both"):
+                backends[f"fake{suffix}"] = benchmark_store(
+                    "fake", HashingEmbeddings(), chunks, queries, args.k, args.batch_size, work_dir, vector_backend,
+                    args.search_mode,
+                )
+            if args.embedding in ("minilm", "both"):
+                backends[f"minilm{suffix}"] = benchmark_store(
+                    "minilm", None, chunks, queries, args.k, args.batch_size, work_dir, vector_backend,
+                    args.search_mode,
+                )
+
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": vars(args),
+            "corpus": {"files": len(paths), "bytes": corpus_bytes, "documents": len(documents), "chunks": len(chunks)},
+            "loader": {
+                "seconds": round(load_seconds, 3),
+                "files_per_sec": round(len(paths) / load_seconds, 2) if load_seconds else None,
+                "documents_per_sec": round(len(documents) / load_seconds, 2) if load_seconds else None,
+            },
+            "processor": {
+                "seconds": round(chunk_seconds, 3),
+                "chunks_per_sec": round(len(chunks) / chunk_seconds, 2) if chunk_seconds else None,
+            },
+            "backends": backends,
+        }
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark ingestion and retrieval on a synthetic corpus")
+    parser.add_argument("--files-per-type", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=10, help="Pages (slides, paragraph groups) per file")
+    parser.add_argument("--types", nargs="+", default=["txt", "docx", "pptx", "pdf"], choices=["txt", "docx", "pptx", "pdf"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--embedding", choices=["fake", "minilm", "both"], default="fake")
+    parser.add_argument("--embedding-backend", choices=["huggingface", "onnx", "onnx-int8"], default=None,
+                        help="Runtime for the minilm model (default: EMBEDDING_BACKEND)")
+    parser.add_argument("--vector-backend", nargs="+", choices=["chroma", "numpy"], default=[settings.VECTOR_BACKEND],
+                        help="Vector index(es) to benchmark (default: VECTOR_BACKEND)")
+    parser.add_argument("--search-mode", choices=["vector", "hierarchical"], default="vector",
+                        help="Vector search mode to time (recall is always against exact search)")
+    parser.add_argument("--fan-out", type=int, default=None, help="Candidate pages for --search-mode hierarchical")
+    parser.add_argument("--workers", type=int, default=None, help="Loader processes (default: LOADER_WORKERS)")
+    parser.add_argument("--batch-size", type=int, default=settings.EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Result JSON path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated corpus and databases")
+    args = parser.parse_args(argv)
+    if args.embedding_backend:
+        settings.EMBEDDING_BACKEND = args.embedding_backend
+    if args.fan_out:
+        settings.HIERARCHICAL_FAN_OUT = args.fan_out
+
+    results = run(args)
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,10 @@ class Settings:
     
     # Models
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "huggingface")  # Options: "huggingface", "onnx", "onnx-int8"
+    EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))  # Inference threads, 0 = runtime default
+    EMBEDDING_INFERENCE_BATCH_SIZE = int(os.getenv("EMBEDDING_INFERENCE_BATCH_SIZE", "32"))  # Texts per model forward pass
+    EMBEDDING_ONNX_PATH = os.getenv("EMBEDDING_ONNX_PATH") or None  # Custom .onnx file instead of the model's onnx/model.onnx
     LLM_MODEL = os.getenv("LLM_MODEL", "gpt2")
     LLM_SOURCE = os.getenv("LLM_SOURCE", "transformers")  # Options: "transformers", "ollama"
     
@@ -29,12 +33,77 @@ class Settings:
         "txt": ".txt"
     }
     
+    # Loading settings
+    LOADER_WORKERS = int(os.getenv("LOADER_WORKERS", "0"))  # 0 = one process per CPU core
+    PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "50"))  # Large PDFs are split into page ranges
+    STREAM_BLOCK_CHARS = int(os.getenv("STREAM_BLOCK_CHARS", "20000"))  # Text block size for streamed Word/text files
+    STREAM_THRESHOLD_MB = float(os.getenv("STREAM_THRESHOLD_MB", "20"))  # Files this large are streamed, not loaded whole
+    
+    # Directory sync settings
+    SYNC_BATCH_FILES = int(os.getenv("SYNC_BATCH_FILES", "64"))  # Files ingested per manifest checkpoint
+    SYNC_WATCH_INTERVAL = float(os.getenv("SYNC_WATCH_INTERVAL", "30"))  # Seconds between polls in watch mode
+    
+    # Background ingestion job settings
+    UI_INGESTION_WORKER = os.getenv("UI_INGESTION_WORKER", "true").lower() == "true"  # Run the job worker inside the Streamlit app
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))  # Seconds between worker queue polls and UI progress refreshes
+    JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "10"))  # Seconds between a worker's heartbeats on its running job
+    JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "120"))  # Running jobs without a heartbeat for this long are queued again
+    
     # Chunking settings
     CHUNK_SIZE = 500
     CHUNK_OVERLAP = 50
     
     # Vector store settings
     VECTOR_STORE_COLLECTION = "knowledge_base"
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")  # Options: "chroma" (HNSW), "numpy" (exact, memory-mapped)
+    VECTOR_COMPRESSION = os.getenv("VECTOR_COMPRESSION", "none")  # numpy backend only. Options: "none", "int8", "pq", "pca", "pca-int8", "pca-pq"
+    COMPRESSION_PCA_DIM = int(os.getenv("COMPRESSION_PCA_DIM", "128"))  # Dimensions kept by the pca* modes
+    COMPRESSION_PQ_SUBVECTORS = int(os.getenv("COMPRESSION_PQ_SUBVECTORS", "48"))  # Bytes per vector for the *pq modes
+    COMPRESSION_RERANK = int(os.getenv("COMPRESSION_RERANK", "4"))  # Candidates per result re-scored with full vectors, 0 = approximate distances
+    COMPRESSION_MIN_VECTORS = int(os.getenv("COMPRESSION_MIN_VECTORS", "10000"))  # Smaller collections are searched uncompressed
+    COMPRESSION_TRAIN_SIZE = int(os.getenv("COMPRESSION_TRAIN_SIZE", "20000"))  # Vectors sampled to fit PCA and codebooks
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))  # Chunks embedded and written per batch
+    STORE_CHUNK_TEXT = os.getenv("STORE_CHUNK_TEXT", "false").lower() == "true"  # Also keep chunk text in Chroma, not only offsets
+    SHARD_ROUTING = os.getenv("SHARD_ROUTING", "none")  # Options: "none", "directory", "hash:<n>", "metadata:<key>"
+    SHARD_SEARCH_WORKERS = int(os.getenv("SHARD_SEARCH_WORKERS", "4"))  # Threads searching shards in parallel
+    CONTEXT_WINDOW_CHARS = int(os.getenv("CONTEXT_WINDOW_CHARS", "1000"))  # Characters added on each side by expand_context="window"
+    
+    # Search settings
+    SEARCH_MODE = os.getenv("SEARCH_MODE", "vector")  # Options: "vector", "lexical", "hybrid", "hierarchical"
+    HIERARCHICAL_FAN_OUT = int(os.getenv("HIERARCHICAL_FAN_OUT", "20"))  # Candidate pages/slides searched per query by "hierarchical"
+    HIERARCHICAL_PROBE = int(os.getenv("HIERARCHICAL_PROBE", "8"))  # Centroid clusters scanned per query (0 = scan every centroid)
+    HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))  # Candidates per retriever before fusion
+    RRF_K = int(os.getenv("RRF_K", "60"))  # Reciprocal rank fusion damping constant
+    LEXICAL_FILTER_OVERSAMPLE = int(os.getenv("LEXICAL_FILTER_OVERSAMPLE", "5"))  # BM25 candidates per hit when filtering
+    
+    # Result compaction settings (MCP search responses)
+    DEDUPE_THRESHOLD = float(os.getenv("DEDUPE_THRESHOLD", "0.8"))  # Word-trigram Jaccard above which hits are dropped, 0 = off
+    MERGE_ADJACENT_CHUNKS = os.getenv("MERGE_ADJACENT_CHUNKS", "true").lower() == "true"
+    MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.5"))  # 1.0 = pure relevance, 0.0 = pure diversity
+    COMPACTION_OVERSAMPLE = int(os.getenv("COMPACTION_OVERSAMPLE", "3"))  # Candidates fetched per result for dedupe/MMR
+    MAX_RESPONSE_TOKENS = int(os.getenv("MAX_RESPONSE_TOKENS", "0"))  # Default token budget per response, 0 = unlimited
+    
+    # MCP server settings
+    MCP_MAX_CONCURRENT_REQUESTS = int(os.getenv("MCP_MAX_CONCURRENT_REQUESTS", "4"))  # Worker threads for tool calls
+    MCP_MAX_QUEUED_REQUESTS = int(os.getenv("MCP_MAX_QUEUED_REQUESTS", "64"))  # Waiting calls before rejecting, 0 = unbounded
+    MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio")  # Options: "stdio", "http" (streamable HTTP), "sse"
+    MCP_HOST = os.getenv("MCP_HOST", "127.0.0.1")  # Bind address for the http/sse transports
+    MCP_PORT = int(os.getenv("MCP_PORT", "8765"))
+    MCP_RELOAD_INTERVAL = float(os.getenv("MCP_RELOAD_INTERVAL", "5"))  # Seconds between checks for ingestion by other processes, 0 = never reload
+    
+    # Search cache settings
+    QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))  # Cached query embeddings
+    RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "256"))  # Cached search results
+    SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "0"))  # Seconds, 0 = no expiry
+    
+    # Persistent document embedding cache (survives collection rebuilds and CHROMA_DB_PATH changes)
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", str(DATA_DIR / "embedding_cache"))  # One subdirectory per model
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+    EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float16")  # Options: "float16", "float32"
+    
+    # Per-stage timing metrics (see backend/metrics.py)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
     
     @classmethod
     def validate(cls):
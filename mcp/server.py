@@ -1,9 +1,20 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import argparse
+import asyncio
+import logging
 import os
 import ssl
 import sys
-from typing import List, Optional
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import JSONResponse
 
 # Ensure offline usage and relaxed SSL, matching the MCP server behavior
 os.environ['HF_HUB_OFFLINE'] = '1'
@@ -16,68 +27,431 @@ ssl._create_default_https_context = ssl._create_unverified_context
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.settings import settings
-from backend.vector_store import ChromaVectorStore
+from backend.metrics import metrics
+
+# langchain, chromadb and sentence-transformers are imported by the background
+# initializer, not at module load, so the MCP handshake is answered immediately
+if TYPE_CHECKING:
+    from backend.vector_store import ShardedVectorStore
+
+# stdout carries the stdio MCP protocol, so diagnostics go to stderr
+logging.basicConfig(stream=sys.stderr, level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+logger = logging.getLogger("local_rag_mcp")
 
 
 mcp = FastMCP("Local RAG Knowledge MCP Server")
 
-# Lazy-initialized shared vector store instance
-_vector_store: Optional[ChromaVectorStore] = None
+logger.info("Server module imported in %.2fs", time.perf_counter() - _IMPORT_STARTED)
+
+# Shared vector store, built once on a background thread
+_store_future: Optional[Future] = None
+_store_lock = threading.Lock()
+_first_result_logged = False
+_reload_count = 0
+# Seconds requests still running on a replaced store have to finish before its collections are closed
+_RETIRED_STORE_GRACE = 60
+
+
+def _build_store(future: Future):
+    """Import the heavy backend, open the collection and warm up the embedding model"""
+    try:
+        started = time.perf_counter()
+        from backend.vector_store import ShardedVectorStore
+        imported = time.perf_counter()
+        logger.info("Vector store backend imported in %.2fs", imported - started)
+
+        store = ShardedVectorStore()
+        opened = time.perf_counter()
+        logger.info("Embedding model and collection loaded in %.2fs", opened - imported)
+
+        store.embeddings.embed_query("warm-up")
+        logger.info("Embedding warm-up finished in %.2fs (ready %.2fs after start)",
+                    time.perf_counter() - opened, time.perf_counter() - _IMPORT_STARTED)
+        future.set_result(store)
+    except Exception as e:
+        logger.exception("Vector store initialization failed")
+        future.set_exception(e)
+
+
+def _start_store_init() -> Future:
+    """Start background initialization once; a failed attempt is retried on the next call"""
+    global _store_future
+    with _store_lock:
+        if _store_future is None or (_store_future.done() and _store_future.exception() is not None):
+            _store_future = Future()
+            threading.Thread(
+                target=_build_store, args=(_store_future,), name="vector-store-init", daemon=True
+            ).start()
+        return _store_future
+
+
+def _ensure_store() -> "ShardedVectorStore":
+    """Return the shared store, waiting for the in-flight initialization if needed"""
+    return _start_store_init().result()
+
+
+def _reload_if_changed():
+    """Swap in a freshly opened store if another process changed a collection
+
+    Only changed collections are reopened; the new store shares the rest, and the
+    loaded embedding model, with the old one and is warmed up before the swap. Calls
+    already running keep the old store; the collections it no longer shares are closed
+    _RETIRED_STORE_GRACE seconds later.
+    """
+    global _store_future, _reload_count
+    future = _store_future
+    if future is None or not future.done() or future.exception() is not None:
+        return
+    store = future.result()
+    if not store.is_stale():
+        return
+    started = time.perf_counter()
+    new_store = store.reopen()
+    # Not a user request, so kept out of the search metrics
+    with metrics.paused():
+        new_store.warm_up()
+    with _store_lock:
+        if _store_future is not future:
+            new_store.close_replaced(store)
+            return
+        _store_future = Future()
+        _store_future.set_result(new_store)
+        _reload_count += 1
+    retire = threading.Timer(_RETIRED_STORE_GRACE, store.close_replaced, args=(new_store,))
+    retire.daemon = True
+    retire.start()
+    metrics.increment("mcp.reloads")
+    metrics.observe("mcp.reload", time.perf_counter() - started)
+    changed = [name for name, version in new_store.loaded_versions.items() if store.loaded_versions.get(name) != version]
+    logger.info("Vector store reloaded in %.2fs after changes to %s", time.perf_counter() - started, sorted(changed))
+
+
+def _watch_store_changes(interval: float):
+    """Check for ingestion by other processes (UI, sync, job worker) every interval seconds"""
+    while True:
+        time.sleep(interval)
+        try:
+            _reload_if_changed()
+        except Exception:
+            logger.exception("Vector store reload failed; still serving the previous version")
+
+
+def _log_first_result():
+    global _first_result_logged
+    if not _first_result_logged:
+        _first_result_logged = True
+        logger.info("First search result served %.2fs after start", time.perf_counter() - _IMPORT_STARTED)
+
+
+class _RequestGate:
+    """Bounds concurrent tool work and tracks queueing for backpressure metrics
+
+    Counters are only touched from the event loop thread, so they need no lock.
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max_queued
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="rag-worker")
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self.in_flight = 0
+        self.queued = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+
+    async def run(self, fn, *args):
+        """Run a blocking function on the worker pool once a concurrency slot is free"""
+        if self.max_queued > 0 and self.queued >= self.max_queued:
+            self.rejected += 1
+            raise RuntimeError(f"Server busy: {self.queued} requests already queued, retry shortly")
+
+        self.queued += 1
+        self.peak_queued = max(self.peak_queued, self.queued)
+        enqueued = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        waited = time.perf_counter() - enqueued
+        self.total_wait_seconds += waited
+        metrics.observe("mcp.queue_wait", waited)
+
+        self.in_flight += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        started = self.completed + self.failed
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_queue_wait_ms": round(1000 * self.total_wait_seconds / started, 3) if started else 0.0,
+        }
+
+
+_gate = _RequestGate(settings.MCP_MAX_CONCURRENT_REQUESTS, settings.MCP_MAX_QUEUED_REQUESTS)
+
+
+# What the score of each search mode measures
+_SCORE_TYPES = {
+    "vector": "distance (lower is closer)",
+    "lexical": "bm25 (higher is better)",
+    "hybrid": "reciprocal rank fusion (higher is better)",
+    "hierarchical": "distance (lower is closer)",
+}
+
+
+def _document_payload(doc, score: float) -> dict:
+    metadata = doc.metadata
+    payload = {
+        "content": doc.page_content,
+        "source": metadata.get("source", "Unknown"),
+        "page": metadata.get("page_number", metadata.get("slide_number", 0)),
+        "score": round(float(score), 4),
+    }
+    if "collection" in metadata:
+        payload["collection"] = metadata["collection"]
+    if "chunk_index" in metadata:
+        payload["chunk_index"] = metadata["chunk_index"]
+    if "chunk_index_end" in metadata:
+        payload["chunk_index_end"] = metadata["chunk_index_end"]
+    if metadata.get("expanded"):
+        payload["expanded"] = metadata["expanded"]
+    if metadata.get("truncated"):
+        payload["truncated"] = True
+    return payload
+
 
-def _ensure_store() -> ChromaVectorStore:
-    global _vector_store
-    if _vector_store is None:
-        _vector_store = ChromaVectorStore()
-    return _vector_store
+@metrics.timed("mcp.local_knowledge_base_search")
+def _search(
+    query: str,
+    top_k: int,
+    mode: Optional[str],
+    filters: Optional[Dict[str, Any]],
+    mmr: bool,
+    max_tokens: Optional[int],
+    expand_context: Optional[str],
+    collections: Optional[List[str]],
+    fan_out: Optional[int],
+) -> dict:
+    store = _ensure_store()
+    mode = mode or settings.SEARCH_MODE
+    hits = store.search_compact(
+        query, k=top_k, mode=mode, filters=filters, mmr=mmr, max_tokens=max_tokens,
+        expand_context=expand_context, collections=collections, fan_out=fan_out
+    )
+
+    with metrics.timer("mcp.serialize"):
+        documents = [_document_payload(doc, score) for _, doc, score in hits]
+
+    _log_first_result()
+    return {
+        "success": True,
+        "query": query,
+        "mode": mode,
+        "score_type": _SCORE_TYPES[mode],
+        "results_count": len(documents),
+        "documents": documents,
+        "note": "Summarize based on the returned documents; avoid repeated searches if cross-references are present."
+    }
+
+
+@metrics.timed("mcp.local_knowledge_base_multi_search")
+def _multi_search(
+    queries: List[str],
+    top_k: int,
+    fuse: bool,
+    filters: Optional[Dict[str, Any]],
+    collections: Optional[List[str]],
+) -> dict:
+    store = _ensure_store()
+    response = store.search_many(queries, k=top_k, fuse=fuse, filters=filters, collections=collections)
+
+    with metrics.timer("mcp.serialize"):
+        payload = {
+            "success": True,
+            "score_type": _SCORE_TYPES["vector"],
+            "results": [
+                {"query": query, "documents": [_document_payload(doc, score) for _, doc, score in hits]}
+                for query, hits in zip(queries, response["results"])
+            ],
+        }
+        if fuse:
+            payload["fused"] = [_document_payload(doc, score) for _, doc, score in response["fused"]]
+            payload["fused_score_type"] = _SCORE_TYPES["hybrid"]
+    _log_first_result()
+    return payload
+
+
+@metrics.timed("mcp.list_knowledge_base_sources")
+def _list_sources(collections: Optional[List[str]]) -> dict:
+    sources = _ensure_store().list_sources(collections)
+    return {"success": True, "sources_count": len(sources), "sources": sources}
+
+
+def _store_info() -> dict:
+    store = _ensure_store()
+    info = store.get_collection_info()
+    return {
+        "success": True,
+        "document_count": info.get("document_count", 0),
+        "vector_store_path": settings.CHROMA_DB_PATH,
+        "embedding_model": info.get("embedding_model", settings.EMBEDDING_MODEL),
+        "embedding_backend": info.get("embedding_backend", settings.EMBEDDING_BACKEND),
+        "database": "chromadb",
+        "vector_backend": info.get("vector_backend", settings.VECTOR_BACKEND),
+        "collection_name": info.get("collection_name"),
+        "shard_routing": info.get("routing"),
+        "collections": info.get("collections", {}),
+        "cache": store.cache_stats(),
+    }
 
 
 @mcp.tool
-def local_knowledge_base_search(query: str, top_k: int = 10) -> dict:
+async def local_knowledge_base_search(
+    query: str,
+    top_k: int = 10,
+    mode: Optional[str] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    mmr: bool = False,
+    max_tokens: Optional[int] = None,
+    expand_context: Optional[str] = None,
+    collections: Optional[List[str]] = None,
+    fan_out: Optional[int] = None,
+) -> dict:
     """Answer questions using the local knowledge base.
 Use this when asked about tables, configs, docs, or concepts.
 Returns a direct answer from the most relevant document chunk, plus
 minimal source info. Works fully offline.
+mode: "vector" (semantic), "lexical" (exact terms such as table names,
+config keys or error codes), "hybrid" (both, fused) or "hierarchical" (semantic,
+searching only the fan_out most relevant pages/slides first; faster on large
+knowledge bases, raise fan_out for better recall). Defaults to server setting.
+filters: optional, e.g. {"source": "design_*.pdf", "file_type": ["pdf", "docx"],
+"page": [10, 20], "slide": 3}. source accepts names or globs; see
+list_knowledge_base_sources for valid values. Narrow filters give better results
+than a large top_k.
+Near-duplicate chunks are dropped and consecutive chunks of a page are merged,
+so fewer than top_k passages may come back. mmr: diversify results (useful for
+broad questions). max_tokens: cap the total size of returned content.
+expand_context: "window" (text around each hit) or "page" (the whole page or
+slide) to get more context without another search.
+collections: optional list of collection names (see get_vector_store_info) to
+search only those teams/projects; all collections are searched by default.
 """
     try:
-        store = _ensure_store()
-        results = store.search_documents(query, k=top_k)
-
-        documents = []
-        for doc in results:
-            documents.append({
-                "content": doc.page_content,
-                "source": doc.metadata.get("source", "Unknown"),
-                "page": doc.metadata.get("page", 0),
-                "score": doc.metadata.get("score", 0),
-            })
+        return await _gate.run(
+            _search, query, top_k, mode, filters, mmr, max_tokens, expand_context, collections, fan_out
+        )
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-        return {
-            "success": True,
-            "query": query,
-            "results_count": len(documents),
-            "documents": documents,
-            "note": "Summarize based on the returned documents; avoid repeated searches if cross-references are present."
-        }
+
+@mcp.tool
+async def local_knowledge_base_multi_search(
+    queries: List[str],
+    top_k: int = 5,
+    fuse: bool = True,
+    filters: Optional[Dict[str, Any]] = None,
+    collections: Optional[List[str]] = None,
+) -> dict:
+    """Search the local knowledge base for several sub-queries at once.
+Use this instead of repeated local_knowledge_base_search calls when a question
+splits into multiple sub-questions. All queries are embedded and searched in a
+single pass. With fuse, also returns one merged, deduplicated result list.
+filters and collections (same format as local_knowledge_base_search) apply to
+every query.
+"""
+    try:
+        return await _gate.run(_multi_search, queries, top_k, fuse, filters, collections)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
 @mcp.tool
-def get_vector_store_info() -> dict:
-    """Get information about the vector store (number of documents, etc)."""
+async def list_knowledge_base_sources(collections: Optional[List[str]] = None) -> dict:
+    """List the documents in the local knowledge base with their collection,
+file type, chunk count and page/slide count. Use the names as search filters."""
     try:
-        store = _ensure_store()
-        info = store.get_collection_info()
-        return {
-            "success": True,
-            "document_count": info.get("document_count", 0),
-            "vector_store_path": settings.CHROMA_DB_PATH,
-            "embedding_model": info.get("embedding_model", settings.EMBEDDING_MODEL),
-            "database": "chromadb",
-            "collection_name": info.get("collection_name"),
-        }
+        return await _gate.run(_list_sources, collections)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+
+@mcp.tool
+async def get_vector_store_info() -> dict:
+    """Get information about the vector store (number of documents, etc)."""
+    try:
+        info = await _gate.run(_store_info)
+        info["requests"] = _gate.stats()
+        return info
+    except Exception as e:
+        return {"success": False, "error": str(e), "requests": _gate.stats()}
+
+
+@mcp.tool
+async def get_performance_stats(format: str = "json") -> Any:
+    """Get per-stage latency percentiles (load, chunk, embed, write, query,
+serialize, queue wait) and event counters collected since the server started.
+format: "json" (default) or "prometheus" for the text exposition format."""
+    if format == "prometheus":
+        return metrics.to_prometheus()
+    if format != "json":
+        return {"success": False, "error": f"Unsupported format: {format}. Supported formats: json, prometheus"}
+    return {"success": True, "enabled": metrics.enabled, **metrics.snapshot(), "requests": _gate.stats()}
+
+
+@mcp.custom_route("/health", methods=["GET"])
+async def health(request: Request) -> JSONResponse:
+    """Liveness/readiness probe for the http and sse transports: 200 once the store is loaded, 503 before"""
+    future = _store_future
+    body = {
+        "uptime_seconds": round(time.perf_counter() - _IMPORT_STARTED, 1),
+        "reloads": _reload_count,
+        "requests": _gate.stats(),
+    }
+    if future is None or not future.done():
+        return JSONResponse({"status": "starting", **body}, status_code=503)
+    if future.exception() is not None:
+        return JSONResponse({"status": "error", "error": str(future.exception()), **body}, status_code=503)
+    return JSONResponse({"status": "ok", "collection_versions": future.result().loaded_versions, **body})
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Serve the local knowledge base over MCP")
+    parser.add_argument("--transport", choices=["stdio", "http", "sse"], default=settings.MCP_TRANSPORT)
+    parser.add_argument("--host", default=settings.MCP_HOST, help="Bind address for http/sse")
+    parser.add_argument("--port", type=int, default=settings.MCP_PORT, help="Port for http/sse")
+    args = parser.parse_args(argv)
+
+    _start_store_init()
+    if settings.MCP_RELOAD_INTERVAL > 0:
+        threading.Thread(
+            target=_watch_store_changes, args=(settings.MCP_RELOAD_INTERVAL,), name="vector-store-reload", daemon=True
+        ).start()
+    if args.transport == "stdio":
+        mcp.run()
+    else:
+        logger.info("Serving %s transport on %s:%d (health check at /health)", args.transport, args.host, args.port)
+        mcp.run(transport=args.transport, host=args.host, port=args.port)
+
+
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import settings
+from benchmarks.fake_embeddings import HashingEmbeddings
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Point every on-disk store at a fresh temporary directory"""
+    monkeypatch.setattr(settings, "CHROMA_DB_PATH", str(tmp_path / "chroma_db"))
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_PATH", str(tmp_path / "embedding_cache"))
+    monkeypatch.setattr(settings, "VECTOR_STORE_COLLECTION", "knowledge_base")
+    return tmp_path
+
+
+@pytest.fixture
+def embeddings():
+    return HashingEmbeddings(dim=32)
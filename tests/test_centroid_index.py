@@ -0,0 +1,36 @@
+import numpy as np
+
+from backend.vector_store.centroid_index import CentroidIndex
+
+
+def _index(tmp_path, name, vectors, probe):
+    index = CentroidIndex(str(tmp_path / f"{name}.sqlite3"), probe=probe)
+    index.add([{"doc_id": f"d{i:05d}", "source": f"s{i % 7}"} for i in range(len(vectors))], vectors)
+    return index
+
+
+def test_clustered_search_matches_full_scan(tmp_path):
+    rng = np.random.default_rng(0)
+    topics = rng.normal(size=(40, 32))
+    vectors = (topics[rng.integers(0, 40, 4000)] + 0.5 * rng.normal(size=(4000, 32))).astype(np.float32)
+    exact = _index(tmp_path, "exact", vectors, probe=0)
+    clustered = _index(tmp_path, "clustered", vectors, probe=4)
+
+    queries = vectors[rng.choice(len(vectors), 20, replace=False)]
+    recall = np.mean([
+        len({d for d, _ in clustered.search(q, 10)} & {d for d, _ in exact.search(q, 10)}) / 10 for q in queries
+    ])
+    assert recall >= 0.9
+    _, _, (centers, members) = clustered._load_locked()
+    assert len(centers) == int(np.sqrt(len(vectors)))
+    assert sum(len(rows) for rows in members) == len(vectors)
+
+
+def test_small_index_and_large_n_scan_every_centroid(tmp_path):
+    rng = np.random.default_rng(1)
+    small = _index(tmp_path, "small", rng.normal(size=(50, 8)).astype(np.float32), probe=4)
+    assert small._load_locked()[2] is None
+    assert len(small.search(rng.normal(size=8), 100)) == 50
+
+    large = _index(tmp_path, "large", rng.normal(size=(2000, 8)).astype(np.float32), probe=1)
+    assert len(large.search(rng.normal(size=8), 1500)) == 1500
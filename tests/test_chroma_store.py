@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+from langchain_core.documents import Document
+
+from backend.document_processor.processor import DocumentProcessor
+from backend.vector_store import ChromaVectorStore
+from config.settings import settings
+
+
+@pytest.mark.parametrize("mode", ["lexical", "vector"])
+def test_retriever_returns_text_not_stored_in_chroma(data_dir, embeddings, monkeypatch, mode):
+    monkeypatch.setattr(settings, "STORE_CHUNK_TEXT", False)
+    store = ChromaVectorStore(embeddings=embeddings, model_name="hashing")
+    processor = DocumentProcessor(chunk_size=200, chunk_overlap=20, document_store=store.document_store)
+    texts = {"a.txt": "alpha ledger invoice reconciliation " * 20, "b.txt": "beta payment gateway timeout " * 20}
+    chunks = processor.process_documents([
+        Document(page_content=text, metadata={"source": source, "file_type": "txt", "page_number": 1})
+        for source, text in texts.items()
+    ])
+    store.add_documents(chunks)
+    # Chroma holds only offsets into the document store
+    assert store.collection.get(include=["documents"])["documents"] == [None] * len(chunks)
+
+    docs = store.get_retriever(k=1, mode=mode).invoke("beta payment gateway timeout")
+    assert len(docs) == 1
+    metadata = docs[0].metadata
+    assert metadata["source"] == "b.txt"
+    assert docs[0].page_content == texts["b.txt"][metadata["start_offset"]:metadata["end_offset"]]
+
+
+def test_reopen_keeps_the_shared_chroma_system(data_dir, embeddings):
+    from chromadb.api.client import SharedSystemClient
+
+    store = ChromaVectorStore(embeddings=embeddings, model_name="hashing")
+    shared = SharedSystemClient._identifier_to_system[settings.CHROMA_DB_PATH]
+    reopened = store.reopen()
+    assert reopened._system is not shared
+    assert SharedSystemClient._identifier_to_system[settings.CHROMA_DB_PATH] is shared
+    reopened.close()
+
+
+def test_reopen_fails_loudly_on_unsupported_chromadb(data_dir, embeddings, monkeypatch):
+    from chromadb.api.client import SharedSystemClient
+
+    store = ChromaVectorStore(embeddings=embeddings, model_name="hashing")
+    monkeypatch.delattr(SharedSystemClient, "_identifier_to_system")
+    with pytest.raises(RuntimeError, match="requirements.txt"):
+        store.reopen()
+
+
+def test_concurrent_rebuilds_count_each_chunk_once(data_dir, embeddings):
+    stores = [ChromaVectorStore(embeddings=embeddings, model_name="hashing") for _ in range(4)]
+    stores[0].add_documents([
+        Document(
+            page_content=f"chunk {i} ledger invoice",
+            metadata={"source": f"{i % 3}.txt", "file_type": "txt", "page_number": 1, "doc_id": f"d{i % 5}"},
+        )
+        for i in range(60)
+    ])
+    stores[0].lexical_index.clear()
+    stores[0].source_registry.clear()
+    stores[0].centroid_index.clear()
+
+    barrier = threading.Barrier(len(stores))
+
+    def rebuild(store):
+        store.ID_LOOKUP_BATCH_SIZE = 7
+        barrier.wait()
+        store._ensure_source_registry()
+        store._ensure_lexical_index()
+        store._ensure_centroid_index()
+
+    threads = [threading.Thread(target=rebuild, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(source["chunk_count"] for source in stores[0].list_sources()) == 60
+    assert stores[0].lexical_index.count() == 60
+    assert stores[0].centroid_index.total_chunks() == 60
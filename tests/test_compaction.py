@@ -0,0 +1,68 @@
+import numpy as np
+from langchain_core.documents import Document
+
+from backend.vector_store import ChromaVectorStore
+from backend.vector_store.compaction import (
+    apply_token_budget,
+    estimate_tokens,
+    merge_adjacent_hits,
+    mmr_select,
+    suppress_near_duplicates,
+)
+
+
+def _hit(chunk_id, text, score=0.0, **metadata):
+    return (chunk_id, Document(page_content=text, metadata=metadata), score)
+
+
+def test_near_duplicates_are_suppressed_in_rank_order():
+    hits = [
+        _hit("a", "the payment gateway timed out after thirty seconds"),
+        _hit("b", "the payment gateway timed out after thirty seconds again"),
+        _hit("c", "invoices are reconciled every night"),
+    ]
+    assert [hit[0] for hit in suppress_near_duplicates(hits, 0.7)] == ["a", "c"]
+    assert len(suppress_near_duplicates(hits, 0)) == 3
+
+
+def test_mmr_prefers_diverse_hits():
+    hits = [_hit("a", "a"), _hit("b", "b"), _hit("c", "c"), _hit("d", "no embedding")]
+    embeddings = {"a": [1.0, 0.0], "b": [0.99, 0.05], "c": [0.7, 0.7]}
+    query = [1.0, 0.0]
+    assert [hit[0] for hit in mmr_select(query, hits, embeddings, k=2, lambda_mult=0.3)] == ["a", "c"]
+    assert [hit[0] for hit in mmr_select(query, hits, embeddings, k=2, lambda_mult=1.0)] == ["a", "b"]
+    assert [hit[0] for hit in mmr_select(query, hits, embeddings, k=4)][-1] == "d"
+
+
+def test_consecutive_chunks_are_merged_without_repeating_the_overlap():
+    hits = [
+        _hit("2", "second part of the page. Third", 0.2, source="a.txt", page_number=1, chunk_index=1, end_offset=60),
+        _hit("x", "other page", 0.3, source="a.txt", page_number=2, chunk_index=1),
+        _hit("1", "First part of the page, second part of the page.", 0.1, source="a.txt", page_number=1, chunk_index=0),
+    ]
+    merged = merge_adjacent_hits(hits, max_overlap=40)
+    assert [hit[0] for hit in merged] == ["2", "x"]
+    doc = merged[0][1]
+    assert doc.page_content == "First part of the page, second part of the page. Third"
+    assert doc.metadata["chunk_index"] == 0 and doc.metadata["chunk_index_end"] == 1
+    assert doc.metadata["end_offset"] == 60
+
+
+def test_token_budget_keeps_rank_order_and_cuts_the_last_passage():
+    hits = [_hit(str(i), " ".join(["word"] * 100), float(i)) for i in range(3)]
+    per_hit = estimate_tokens(hits[0][1].page_content)
+    trimmed = apply_token_budget(hits, per_hit + 60)
+    assert [hit[0] for hit in trimmed] == ["0", "1"]
+    assert trimmed[1][1].metadata["truncated"] and estimate_tokens(trimmed[1][1].page_content) <= 62
+    assert apply_token_budget(hits, None) == hits
+
+
+def test_search_compact_returns_real_scores(data_dir, embeddings):
+    store = ChromaVectorStore(embeddings=embeddings, model_name="hashing")
+    store.add_documents([
+        Document(page_content=text, metadata={"source": "a.txt", "file_type": "txt", "page_number": 1, "chunk_index": i})
+        for i, text in enumerate(["alpha ledger invoice", "alpha ledger invoice", "beta payment gateway"])
+    ])
+    hits = store.search_compact("alpha ledger", k=2, merge_adjacent=False)
+    assert [doc.page_content for _, doc, _ in hits] == ["alpha ledger invoice", "beta payment gateway"]
+    assert hits[0][2] < hits[1][2] and np.isfinite(hits[0][2])
@@ -0,0 +1,18 @@
+from langchain_core.documents import Document
+
+from backend.document_processor.processor import DocumentProcessor
+
+
+def test_chunk_offsets_slice_the_document_text():
+    text = " ".join(f"word{i}" for i in range(200))
+    processor = DocumentProcessor(chunk_size=100, chunk_overlap=20)
+    chunks = list(processor.iter_chunks([Document(page_content=text, metadata={"source": "a.txt"})]))
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert text[chunk.metadata["start_offset"]:chunk.metadata["end_offset"]] == chunk.page_content
+
+
+def test_chunk_missing_after_cursor_is_not_matched_earlier():
+    processor = DocumentProcessor(chunk_size=100, chunk_overlap=1)
+    # "abc" occurs only before the end of the previous chunk, so it has no offset
+    assert processor._offsets("abc XYZ abc", ["XYZ abc", "abc"]) == [4, None]
@@ -0,0 +1,93 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from backend.vector_store.embedding_cache import CachedEmbeddings, EmbeddingCache, model_cache_directory
+from benchmarks.fake_embeddings import HashingEmbeddings
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    def __init__(self, dim):
+        super().__init__(dim=dim)
+        self.embedded = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+def test_round_trip_survives_reopen(tmp_path):
+    vectors = np.random.default_rng(0).normal(size=(3, 8)).astype(np.float32)
+    cache = EmbeddingCache(str(tmp_path), dtype="float32")
+    cache.put_many("model", ["a", "b", "c"], vectors)
+
+    reopened = EmbeddingCache(str(tmp_path), dtype="float32")
+    results = reopened.get_many("model", ["b", "missing", "a"])
+    np.testing.assert_allclose(results[0], vectors[1])
+    assert results[1] is None
+    np.testing.assert_allclose(results[2], vectors[0])
+    assert reopened.get_many("other-model", ["a"]) == [None]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), max_entries=2)
+    cache.put_many("model", ["a", "b"], np.ones((2, 4)))
+    cache.get_many("model", ["a"])
+    cache.put_many("model", ["c"], np.ones((1, 4)))
+    assert [vector is not None for vector in cache.get_many("model", ["a", "b", "c"])] == [True, False, True]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_dimension_change_does_not_fail_embedding(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    CachedEmbeddings(HashingEmbeddings(dim=16), "model", cache).embed_documents(["a", "b"])
+
+    wider = CachedEmbeddings(HashingEmbeddings(dim=32), "model-32", cache)
+    vectors = wider.embed_documents(["c", "d"])
+    assert [len(vector) for vector in vectors] == [32, 32]
+    assert cache.stats()["dim"] == 16
+
+
+def test_models_get_separate_caches(tmp_path):
+    small = CountingEmbeddings(dim=16)
+    large = CountingEmbeddings(dim=32)
+    cached_small = CachedEmbeddings(small, "small", EmbeddingCache(str(model_cache_directory(str(tmp_path), "small"))))
+    cached_large = CachedEmbeddings(large, "org/large", EmbeddingCache(str(model_cache_directory(str(tmp_path), "org/large"))))
+
+    cached_small.embed_documents(["a", "b"])
+    assert [len(vector) for vector in cached_large.embed_documents(["a", "b"])] == [32, 32]
+    cached_small.embed_documents(["a", "b"])
+    cached_large.embed_documents(["a", "b"])
+    assert (small.embedded, large.embedded) == (2, 2)
+    assert model_cache_directory(str(tmp_path), "org/large").parent == tmp_path
+
+
+_WRITER = """
+import sys
+import numpy as np
+sys.path.insert(0, sys.argv[1])
+from backend.vector_store.embedding_cache import EmbeddingCache
+cache = EmbeddingCache(sys.argv[2], dtype="float32")
+worker = int(sys.argv[3])
+for batch in range(40):
+    texts = [f"{worker}-{batch}-{i}" for i in range(20)]
+    cache.put_many("model", texts, np.full((20, 8), worker, dtype=np.float32))
+"""
+
+
+def test_writer_processes_share_a_cache(tmp_path):
+    root = str(Path(__file__).resolve().parent.parent)
+    writers = [
+        subprocess.Popen([sys.executable, "-c", _WRITER, root, str(tmp_path), str(worker)], stderr=subprocess.PIPE)
+        for worker in range(4)
+    ]
+    for writer in writers:
+        assert writer.wait() == 0, writer.stderr.read().decode()
+
+    cache = EmbeddingCache(str(tmp_path), dtype="float32")
+    assert cache.stats()["entries"] == 3200
+    for worker in range(4):
+        vectors = cache.get_many("model", [f"{worker}-{batch}-{i}" for batch in range(40) for i in range(20)])
+        assert all(vector == [worker] * 8 for vector in vectors)
@@ -0,0 +1,57 @@
+from langchain_core.documents import Document
+
+from backend.vector_store import ChromaVectorStore
+from benchmarks.fake_embeddings import HashingEmbeddings
+from config.settings import settings
+
+
+class RecordingEmbeddings(HashingEmbeddings):
+    def __init__(self):
+        super().__init__(dim=32)
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(len(texts))
+        return super().embed_documents(texts)
+
+
+def _docs(source, count, prefix="chunk"):
+    return [
+        Document(page_content=f"{prefix} {i} of {source}", metadata={"source": source, "file_type": "txt", "page_number": 1, "chunk_index": i})
+        for i in range(count)
+    ]
+
+
+def test_documents_are_embedded_and_written_in_batches(data_dir, monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", False)
+    embeddings = RecordingEmbeddings()
+    store = ChromaVectorStore(embeddings=embeddings, model_name="hashing")
+    progress = []
+
+    ids = store.add_documents(iter(_docs("a.txt", 23)), batch_size=10, progress_callback=lambda done, total: progress.append((done, total)))
+
+    assert embeddings.batches == [10, 10, 3]
+    assert progress == [(10, None), (20, None), (23, None)]
+    assert len(ids) == 23 and store.collection.count() == 23
+
+
+def test_unchanged_chunks_are_not_embedded_again(data_dir, monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", False)
+    embeddings = RecordingEmbeddings()
+    store = ChromaVectorStore(embeddings=embeddings, model_name="hashing")
+    store.add_documents(_docs("a.txt", 5), batch_size=4)
+    embeddings.batches.clear()
+
+    progress = []
+    assert store.add_documents(_docs("a.txt", 5), batch_size=4, progress_callback=lambda *args: progress.append(args)) == []
+    assert embeddings.batches == []
+    assert progress == [(4, 5), (5, 5)]
+
+
+def test_replace_sources_removes_chunks_of_the_old_version(data_dir, embeddings):
+    store = ChromaVectorStore(embeddings=embeddings, model_name="hashing")
+    store.add_documents(_docs("a.txt", 6, prefix="old") + _docs("b.txt", 2))
+    store.add_documents(_docs("a.txt", 3, prefix="new"), replace_sources=True, batch_size=2)
+
+    assert len(store.collection.get(where={"source": "a.txt"}, include=[])["ids"]) == 3
+    assert store.collection.count() == 5
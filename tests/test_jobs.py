@@ -0,0 +1,74 @@
+import sqlite3
+import time
+
+import pytest
+
+from backend.ingestion.jobs import IngestionWorker, JobQueue
+from backend.vector_store import ShardedVectorStore
+
+
+@pytest.fixture
+def queue(data_dir):
+    return JobQueue()
+
+
+@pytest.fixture
+def store(data_dir, embeddings):
+    return ShardedVectorStore(embeddings=embeddings, model_name="hashing")
+
+
+def test_recover_leaves_jobs_of_live_workers_alone(queue):
+    job_id = queue.submit(["a.txt"])
+    assert queue.claim("worker-a") == job_id
+    assert queue.recover(stale_after=60) == 0
+    assert queue.get(job_id)["status"] == "running"
+    assert queue.get(job_id)["worker_id"] == "worker-a"
+
+
+def test_recover_requeues_jobs_with_stale_heartbeat(queue):
+    job_id = queue.submit(["a.txt"])
+    queue.claim("worker-a")
+    with queue._conn:
+        queue._conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (time.time() - 120, job_id))
+    assert queue.recover(stale_after=60) == 1
+    assert queue.claim("worker-b") == job_id
+    # The stalled worker cannot keep or finish a job it lost
+    assert not queue.heartbeat(job_id, "worker-a")
+    queue.finish(job_id, "done", worker_id="worker-a")
+    assert queue.get(job_id)["status"] == "running"
+    assert queue.heartbeat(job_id, "worker-b")
+
+
+def test_worker_stops_when_its_job_is_taken_over(queue, store, tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("alpha ledger invoice reconciliation " * 20)
+    job_id = queue.submit([str(path)])
+    worker = IngestionWorker(store, queue)
+    queue.claim(worker.worker_id)
+    with queue._conn:
+        queue._conn.execute("UPDATE jobs SET worker_id = 'other' WHERE id = ?", (job_id,))
+    assert worker.run_job(job_id) == "lost"
+    assert queue.get(job_id)["status"] == "running"
+
+
+def test_worker_runs_claimed_job(queue, store, tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("alpha ledger invoice reconciliation " * 20)
+    job_id = queue.submit([str(path)])
+    assert IngestionWorker(store, queue).run_pending() == 1
+    assert queue.get(job_id)["status"] == "done"
+
+
+def test_queue_without_owner_columns_is_migrated(data_dir):
+    db_path = data_dir / "old_jobs.sqlite3"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, status TEXT NOT NULL, created_at REAL NOT NULL, "
+        "started_at REAL, finished_at REAL, cancel_requested INTEGER NOT NULL DEFAULT 0, current_file TEXT, "
+        "current_chunks INTEGER NOT NULL DEFAULT 0, error TEXT)"
+    )
+    conn.execute("INSERT INTO jobs (status, created_at) VALUES ('running', ?)", (time.time(),))
+    conn.commit()
+    conn.close()
+    # A job left running before heartbeats existed has no owner and is recovered
+    assert JobQueue(str(db_path)).recover() == 1
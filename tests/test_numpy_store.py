@@ -0,0 +1,79 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from backend.vector_store import NumpyCollection, NumpyVectorStore
+from config.settings import settings
+
+
+def _vectors(n, dim=8, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def test_upsert_delete_and_reopen(tmp_path):
+    vectors = _vectors(4)
+    collection = NumpyCollection(str(tmp_path), "kbase", compression="none")
+    collection.upsert(ids=["a", "b", "c"], embeddings=vectors[:3], documents=["A", "B", "C"],
+                      metadatas=[{"source": "x"}, {"source": "y"}, {"source": "x"}])
+    collection.upsert(ids=["b"], embeddings=vectors[3:], documents=["B2"], metadatas=[{"source": "y"}])
+    collection.delete(ids=["a"])
+    # The freed slot is reused
+    collection.upsert(ids=["d"], embeddings=vectors[:1], documents=["D"], metadatas=[{"source": "z"}])
+    collection.close()
+
+    reopened = NumpyCollection(str(tmp_path), "kbase", compression="none")
+    assert reopened.count() == 3
+    assert reopened.get(ids=["b", "d"])["documents"] == ["B2", "D"]
+    assert reopened.get(where={"source": "x"})["ids"] == ["c"]
+    result = reopened.query(query_embeddings=vectors[3:], n_results=1)
+    assert result["ids"] == [["b"]]
+    assert result["distances"][0][0] == pytest.approx(0.0, abs=1e-4)
+    reopened.close()
+
+
+def test_dimension_mismatch_leaves_collection_unchanged(tmp_path):
+    collection = NumpyCollection(str(tmp_path), "kbase", compression="none")
+    collection.upsert(ids=["a"], embeddings=_vectors(1))
+    with pytest.raises(ValueError):
+        collection.upsert(ids=["b"], embeddings=_vectors(1, dim=4))
+    collection.upsert(ids=["c"], embeddings=_vectors(1, seed=1))
+    assert sorted(collection.get()["ids"]) == ["a", "c"]
+
+
+def _write(directory, worker):
+    collection = NumpyCollection(directory, "kbase", compression="none")
+    for batch in range(20):
+        ids = [f"{worker}-{batch}-{i}" for i in range(5)]
+        collection.upsert(ids=ids, embeddings=np.full((5, 8), worker, dtype=np.float32))
+        if batch % 4 == 0:
+            collection.delete(ids=ids[:2])
+    collection.close()
+
+
+def test_concurrent_writers_do_not_share_slots(tmp_path):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_write, args=(str(tmp_path), worker)) for worker in range(1, 5)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert all(worker.exitcode == 0 for worker in workers)
+
+    collection = NumpyCollection(str(tmp_path), "kbase", compression="none")
+    result = collection.get(include=["embeddings"])
+    assert len(result["ids"]) == 4 * (20 * 5 - 5 * 2)
+    for chunk_id, vector in zip(result["ids"], result["embeddings"]):
+        assert np.all(vector == int(chunk_id.split("-")[0]))
+
+
+def test_retriever(data_dir, embeddings, monkeypatch):
+    monkeypatch.setattr(settings, "STORE_CHUNK_TEXT", False)
+    store = NumpyVectorStore(embeddings=embeddings, model_name="hashing")
+    store.add_documents([
+        Document(page_content="alpha ledger invoice", metadata={"source": "a.txt", "file_type": "txt", "page_number": 1}),
+        Document(page_content="beta payment gateway", metadata={"source": "b.txt", "file_type": "txt", "page_number": 1}),
+    ])
+    docs = store.get_retriever(k=1, filters={"source": "b.txt"}).invoke("gateway")
+    assert [doc.page_content for doc in docs] == ["beta payment gateway"]
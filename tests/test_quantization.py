@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from backend.vector_store import NumpyCollection, VectorCodec
+from config.settings import settings
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    topics = rng.normal(size=(30, 64))
+    vectors = (topics[rng.integers(0, 30, 3000)] + 0.5 * rng.normal(size=(3000, 64))).astype(np.float32)
+    queries = vectors[rng.choice(len(vectors), 50, replace=False)] + 0.1 * rng.normal(size=(50, 64)).astype(np.float32)
+    exact = ((queries[:, None, :] - vectors[None, :, :]) ** 2).sum(axis=2)
+    return vectors, queries, exact
+
+
+def _recall(approx, exact, k=10, shortlist=40):
+    found = np.argsort(approx, axis=1)[:, :shortlist]
+    truth = np.argsort(exact, axis=1)[:, :k]
+    return np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+
+
+@pytest.mark.parametrize("mode, min_recall", [("int8", 0.99), ("pca", 0.9), ("pq", 0.9), ("pca-pq", 0.85)])
+def test_codes_keep_nearest_neighbours(data, mode, min_recall):
+    vectors, queries, exact = data
+    codec = VectorCodec(mode, pca_dim=32, pq_subvectors=16).fit(vectors)
+    codes = codec.encode(vectors)
+    assert codes.shape[0] == len(vectors) and codec.code_bytes < vectors.shape[1] * 4
+    approx = codec.distances(queries, codes, codec.code_norms(codes))
+    assert _recall(approx, exact) >= min_recall
+
+
+def test_int8_distances_match_decoded_vectors(data):
+    vectors, queries, _ = data
+    codec = VectorCodec("int8").fit(vectors)
+    codes = codec.encode(vectors[:100])
+    decoded = codec._decode(codes)
+    expected = ((queries[:, None, :] - decoded[None, :, :]) ** 2).sum(axis=2)
+    np.testing.assert_allclose(codec.distances(queries, codes, codec.code_norms(codes)), expected, rtol=1e-3, atol=1e-2)
+
+
+def test_codec_save_and_load(data, tmp_path):
+    vectors, queries, _ = data
+    codec = VectorCodec("pca-pq", pca_dim=32, pq_subvectors=16).fit(vectors[:1000])
+    codec.save(str(tmp_path / "codec.npz"))
+    loaded = VectorCodec.load(str(tmp_path / "codec.npz"))
+    assert loaded.matches("pca-pq", 32, 16) and not loaded.matches("pca-pq", 16, 16)
+    np.testing.assert_array_equal(loaded.encode(vectors), codec.encode(vectors))
+    np.testing.assert_allclose(loaded.distances(queries, codec.encode(vectors)), codec.distances(queries, codec.encode(vectors)))
+
+
+def test_compressed_collection_search_is_reranked_exactly(data, tmp_path, monkeypatch):
+    vectors, queries, exact = data
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_VECTORS", 0)
+    monkeypatch.setattr(settings, "COMPRESSION_PQ_SUBVECTORS", 16)
+    monkeypatch.setattr(settings, "COMPRESSION_RERANK", 4)
+    collection = NumpyCollection(str(tmp_path), "kbase", compression="pq")
+    collection.upsert(ids=[str(i) for i in range(len(vectors))], embeddings=vectors)
+
+    result = collection.query(query_embeddings=queries, n_results=10, include=[])
+    truth = np.argsort(exact, axis=1)[:, :10]
+    recall = np.mean([len({int(i) for i in ids} & set(t)) / 10 for ids, t in zip(result["ids"], truth)])
+    assert recall >= 0.95
+    # Re-ranked distances are exact
+    top = int(result["ids"][0][0])
+    assert result["distances"][0][0] == pytest.approx(exact[0, top], rel=1e-4)
+    assert collection.memory_stats()["code_bytes"] == 16 * len(vectors)
@@ -0,0 +1,116 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from langchain_core.documents import Document
+
+from backend.vector_store import ShardedVectorStore
+from config.settings import settings
+
+
+def _doc(text, source, file_type, team):
+    return Document(page_content=text, metadata={"source": source, "file_type": file_type, "team": team, "page_number": 1})
+
+
+@pytest.fixture
+def store(data_dir, embeddings):
+    store = ShardedVectorStore(embeddings=embeddings, model_name="hashing", routing="metadata:team")
+    store.add_documents([
+        _doc("alpha ledger invoice reconciliation", "a.txt", "txt", "red"),
+        _doc("alpha payment gateway timeout", "b.pdf", "pdf", "blue"),
+    ])
+    return store
+
+
+def test_documents_are_routed_to_shards(store):
+    assert set(store.shard_keys()) >= {"red", "blue"}
+    assert {source["source"]: source["collection"] for source in store.list_sources()} == {"a.txt": "red", "b.pdf": "blue"}
+
+
+@pytest.mark.parametrize("mode", ["vector", "lexical", "hybrid"])
+def test_exact_source_filter_held_by_one_shard(store, mode):
+    hits = store.search_hits("alpha", k=5, mode=mode, filters={"source": "a.txt"})
+    assert [doc.metadata["source"] for _, doc, _ in hits] == ["a.txt"]
+    assert hits[0][1].metadata["collection"] == "red"
+
+
+def test_file_type_filter_held_by_one_shard(store):
+    hits = store.search_hits("alpha", k=5, filters={"file_type": "pdf"})
+    assert [doc.metadata["source"] for _, doc, _ in hits] == ["b.pdf"]
+
+
+def test_source_list_spanning_shards(store):
+    hits = store.search_hits("alpha", k=5, filters={"source": ["a.txt", "b.pdf"]})
+    assert sorted(doc.metadata["source"] for _, doc, _ in hits) == ["a.txt", "b.pdf"]
+
+
+def test_search_many_with_exact_source_filter(store):
+    response = store.search_many(["alpha", "payment"], k=5, fuse=True, filters={"source": "b.pdf"})
+    assert all([doc.metadata["source"] for _, doc, _ in hits] == ["b.pdf"] for hits in response["results"])
+    assert [doc.metadata["source"] for _, doc, _ in response["fused"]] == ["b.pdf"]
+
+
+def test_search_with_scores_merges_shards(store):
+    results = store.search_with_scores("alpha", k=5, mode="lexical")
+    assert sorted(doc.metadata["source"] for doc, _ in results) == ["a.txt", "b.pdf"]
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+    assert [doc.metadata["source"] for doc, _ in store.search_with_scores("alpha", k=5, collections=["blue"])] == ["b.pdf"]
+
+
+def test_retriever_searches_selected_shards(store):
+    assert [doc.metadata["collection"] for doc in store.get_retriever(k=1, mode="lexical").invoke("ledger")] == ["red"]
+    docs = store.get_retriever(k=5, filters={"file_type": "pdf"}).invoke("alpha")
+    assert [doc.metadata["source"] for doc in docs] == ["b.pdf"]
+    assert store.get_retriever(k=5, collections=["blue"]).invoke("ledger")[0].metadata["source"] == "b.pdf"
+
+
+def test_unknown_filter_values_are_rejected(store):
+    with pytest.raises(ValueError, match="Unknown source"):
+        store.search_hits("alpha", filters={"source": "missing.txt"})
+    with pytest.raises(ValueError, match="Unknown file types"):
+        store.search_hits("alpha", filters={"file_type": "pptx"})
+
+
+def test_glob_matching_nothing_returns_no_hits(store):
+    assert store.search_hits("alpha", filters={"source": "*.docx"}) == []
+
+
+def test_source_outside_selected_collections_is_unknown(store):
+    with pytest.raises(ValueError, match="Unknown source"):
+        store.search_hits("alpha", filters={"source": "a.txt"}, collections=["blue"])
+
+
+_WRITER = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from langchain_core.documents import Document
+from backend.vector_store import ShardedVectorStore
+from benchmarks.fake_embeddings import HashingEmbeddings
+store = ShardedVectorStore(embeddings=HashingEmbeddings(dim=32), model_name="hashing", routing="metadata:team")
+store.add_documents([Document(page_content="omega ledger archive", metadata={
+    "source": "c.txt", "file_type": "txt", "team": "blue", "page_number": 1})])
+"""
+
+
+def test_reopen_picks_up_other_process_and_reopens_only_changed_shards(store, data_dir, embeddings, monkeypatch):
+    from chromadb.api.client import SharedSystemClient
+
+    reader = ShardedVectorStore(embeddings=embeddings, model_name="hashing", routing="metadata:team")
+    reader.search_hits("ledger", k=5)
+    shared_systems = dict(SharedSystemClient._identifier_to_system)
+    monkeypatch.setenv("CHROMA_DB_PATH", settings.CHROMA_DB_PATH)
+    monkeypatch.setenv("EMBEDDING_CACHE_PATH", settings.EMBEDDING_CACHE_PATH)
+    monkeypatch.setenv("VECTOR_STORE_COLLECTION", settings.VECTOR_STORE_COLLECTION)
+    subprocess.run([sys.executable, "-c", _WRITER, str(Path(__file__).resolve().parent.parent)], check=True)
+
+    assert reader.is_stale()
+    reopened = reader.reopen()
+    assert not reopened.is_stale()
+    assert reopened.shard("red") is reader.shard("red")
+    assert reopened.shard("blue") is not reader.shard("blue")
+    assert SharedSystemClient._identifier_to_system == shared_systems
+    assert "c.txt" in [doc.metadata["source"] for _, doc, _ in reopened.search_hits("omega archive", k=5)]
+
+    reader.close_replaced(reopened)
+    assert "c.txt" in [doc.metadata["source"] for _, doc, _ in reopened.search_hits("omega", k=5, mode="vector")]
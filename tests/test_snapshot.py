@@ -0,0 +1,42 @@
+from langchain_core.documents import Document
+
+from backend.vector_store import ChromaVectorStore
+from backend.vector_store.snapshot import export_snapshot, import_snapshot
+
+
+def _doc(text, source, doc_id):
+    return Document(page_content=text, metadata={"source": source, "file_type": "txt", "page_number": 1, "doc_id": doc_id})
+
+
+def test_merge_counts_only_chunks_not_yet_stored(data_dir, embeddings):
+    store = ChromaVectorStore(embeddings=embeddings, model_name="hashing")
+    store.add_documents([_doc("alpha ledger invoice", "a.txt", "a1"), _doc("beta payment gateway", "b.txt", "b1")])
+    path = data_dir / "kb.npz"
+    export_snapshot(store, str(path))
+    store.add_documents([_doc("gamma archive", "c.txt", "c1")])
+    before = store.list_sources()
+    centroids = store.centroid_index.total_chunks()
+
+    import_snapshot(store, str(path), replace=False)
+    assert store.list_sources() == before
+    assert store.centroid_index.total_chunks() == centroids
+
+    other = store.open_collection("other")
+    other.add_documents([_doc("gamma archive", "c.txt", "c1")])
+    import_snapshot(other, str(path), replace=False)
+    assert {source["source"]: source["chunk_count"] for source in other.list_sources()} == {
+        "a.txt": 1, "b.txt": 1, "c.txt": 1
+    }
+    assert other.centroid_index.total_chunks() == 3
+
+
+def test_replace_restores_snapshot(data_dir, embeddings):
+    store = ChromaVectorStore(embeddings=embeddings, model_name="hashing")
+    store.add_documents([_doc("alpha ledger invoice", "a.txt", "a1")])
+    path = data_dir / "kb.npz"
+    export_snapshot(store, str(path))
+    store.add_documents([_doc("gamma archive", "c.txt", "c1")])
+
+    import_snapshot(store, str(path))
+    assert [source["source"] for source in store.list_sources()] == ["a.txt"]
+    assert store.centroid_index.total_chunks() == 1
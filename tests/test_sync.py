@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from backend.ingestion.sync import DirectorySync
+from backend.vector_store import ShardedVectorStore
+
+
+@pytest.fixture
+def docs_dir(tmp_path):
+    directory = tmp_path / "docs"
+    directory.mkdir()
+    (directory / "a.txt").write_text("alpha ledger invoice reconciliation " * 20)
+    (directory / "b.txt").write_text("beta payment gateway timeout " * 20)
+    return directory
+
+
+@pytest.fixture
+def store(data_dir, embeddings):
+    return ShardedVectorStore(embeddings=embeddings, model_name="hashing")
+
+
+def test_second_sync_skips_unchanged_files(store, docs_dir):
+    assert sorted(DirectorySync(store).sync(str(docs_dir))["added"]) == ["a.txt", "b.txt"]
+    summary = DirectorySync(store).sync(str(docs_dir))
+    assert (summary["added"], summary["unchanged"], summary["chunks_added"]) == ([], 2, 0)
+
+
+def test_sync_after_clear_ingests_again(store, docs_dir):
+    DirectorySync(store).sync(str(docs_dir))
+    store.delete_collection()
+    assert store.get_collection_info()["document_count"] == 0
+
+    summary = DirectorySync(store).sync(str(docs_dir))
+    assert sorted(summary["added"]) == ["a.txt", "b.txt"]
+    assert store.get_collection_info()["document_count"] == summary["chunks_added"] > 0
+    assert sorted(source["source"] for source in store.list_sources()) == ["a.txt", "b.txt"]
+
+
+def test_empty_file_is_not_reingested_every_sync(store, docs_dir):
+    (docs_dir / "empty.txt").write_text("")
+    DirectorySync(store).sync(str(docs_dir))
+    assert DirectorySync(store).sync(str(docs_dir))["unchanged"] == 3
+
+
+def test_overlapping_runs_keep_each_others_entries(store, docs_dir):
+    first, second = DirectorySync(store), DirectorySync(store)
+    first.sync(str(docs_dir))
+    (docs_dir / "c.txt").write_text("gamma routing table " * 20)
+    second.ingest_file(str(docs_dir / "c.txt"))
+
+    summary = DirectorySync(store).sync(str(docs_dir))
+    assert (summary["added"], summary["updated"], summary["unchanged"]) == ([], [], 3)
+
+
+def test_json_manifest_is_imported(store, docs_dir, data_dir):
+    DirectorySync(store).sync(str(docs_dir))
+    entries = DirectorySync(store).manifest.entries()
+    legacy = data_dir / "chroma_db" / "knowledge_base_sync_manifest.json"
+    legacy.write_text(json.dumps({"/elsewhere/old.txt": dict(entries[str((docs_dir / "a.txt").resolve())], source="old.txt")}))
+
+    manifest = DirectorySync(store).manifest
+    assert not legacy.exists()
+    assert manifest.get("/elsewhere/old.txt")["source"] == "old.txt"
+    assert len(manifest.entries()) == 3
@@ -9,6 +9,7 @@ os.environ['REQUESTS_CA_BUNDLE'] = ''
 os.environ['CURL_CA_BUNDLE'] = ''
 ssl._create_default_https_context = ssl._create_unverified_context
 
+import time
 import streamlit as st
 from pathlib import Path
 from typing import List
@@ -18,7 +19,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config.settings import settings
 from backend.document_processor import DocumentLoader, DocumentProcessor
-from backend.vector_store import ChromaVectorStore
+from backend.vector_store import ShardedVectorStore
+from backend.ingestion import DirectorySync, IngestionWorker, JobQueue
+from backend.metrics import metrics
 
 # Configure Streamlit
 st.set_page_config(
@@ -46,10 +49,30 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# The vector store (and its embedding model) is loaded once per app process and shared
+# with the background ingestion worker, so jobs survive browser refreshes
+@st.cache_resource(show_spinner="Initializing vector store...")
+def load_vector_store() -> ShardedVectorStore:
+    return ShardedVectorStore()
+
+
+@st.cache_resource
+def load_job_queue() -> JobQueue:
+    return JobQueue()
+
+
+@st.cache_resource
+def start_ingestion_worker() -> IngestionWorker:
+    return IngestionWorker(load_vector_store(), load_job_queue()).start()
+
+
+job_queue = load_job_queue()
+if settings.UI_INGESTION_WORKER:
+    start_ingestion_worker()
+
 # Initialize session state
 if "vector_store" not in st.session_state:
-    with st.spinner("Initializing vector store..."):
-        st.session_state.vector_store = ChromaVectorStore()
+    st.session_state.vector_store = load_vector_store()
 
 if "vector_store_info" not in st.session_state:
     st.session_state.vector_store_info = None
@@ -67,6 +90,9 @@ with st.sidebar:
     if st.session_state.vector_store_info:
         st.metric("Documents in Store", st.session_state.vector_store_info.get("document_count", 0))
         st.caption(f"Model: {st.session_state.vector_store_info.get('embedding_model')}")
+        collections = st.session_state.vector_store_info.get("collections", {})
+        if len(collections) > 1:
+            st.caption("Collections: " + ", ".join(f"{name} ({count})" for name, count in collections.items()))
     
     # File upload section
     st.markdown("### ⬆️ Upload Documents")
@@ -78,43 +104,45 @@ with st.sidebar:
     
     if uploaded_files:
         if st.button("📥 Process & Add to Vector Store", use_container_width=True):
-            with st.spinner("Processing documents..."):
-                try:
-                    # Save uploaded files
-                    saved_files = []
-                    for uploaded_file in uploaded_files:
-                        file_path = Path(settings.UPLOAD_DOCS_PATH) / uploaded_file.name
-                        with open(file_path, "wb") as f:
-                            f.write(uploaded_file.getbuffer())
-                        saved_files.append(str(file_path))
-                    
-                    # Load and process documents
-                    all_documents = []
-                    for file_path in saved_files:
-                        docs = DocumentLoader.load_document(file_path)
-                        all_documents.extend(docs)
-                    
-                    # Process (chunk) documents
-                    processor = DocumentProcessor()
-                    processed_docs = processor.process_documents(all_documents)
-                    
-                    # Add to vector store
-                    doc_ids = st.session_state.vector_store.add_documents(processed_docs)
-                    
-                    st.success(f"✅ Added {len(doc_ids)} document chunks to the knowledge base!")
-                    
-                    # Refresh info
-                    st.session_state.vector_store_info = st.session_state.vector_store.get_collection_info()
-                    st.rerun()
-                    
-                except Exception as e:
-                    st.error(f"❌ Error processing documents: {str(e)}")
+            try:
+                # Save uploaded files; loading, chunking and embedding run as a background job
+                saved_files = []
+                for uploaded_file in uploaded_files:
+                    file_path = Path(settings.UPLOAD_DOCS_PATH) / uploaded_file.name
+                    with open(file_path, "wb") as f:
+                        f.write(uploaded_file.getbuffer())
+                    saved_files.append(str(file_path))
+                
+                job_id = job_queue.submit(saved_files)
+                st.success(f"✅ Queued ingestion job #{job_id} for {len(saved_files)} files")
+                
+            except Exception as e:
+                st.error(f"❌ Error queueing documents: {str(e)}")
     
-    # Clear vector store
+    # Incremental sync of the upload folder
+    if st.button("🔄 Sync Upload Folder", use_container_width=True):
+        with st.spinner("Syncing documents..."):
+            try:
+                summary = DirectorySync(st.session_state.vector_store).sync(settings.UPLOAD_DOCS_PATH)
+                st.success(
+                    f"✅ {len(summary['added'])} added, {len(summary['updated'])} updated, "
+                    f"{len(summary['removed'])} removed, {summary['unchanged']} unchanged"
+                )
+                st.session_state.vector_store_info = st.session_state.vector_store.get_collection_info()
+            except Exception as e:
+                st.error(f"❌ Error syncing documents: {str(e)}")
+    
+    # Clear vector store (one collection or all of them)
     st.markdown("### 🔥 Danger Zone")
-    if st.button("🗑️ Clear All Documents", use_container_width=True):
+    clear_scope = st.selectbox(
+        "Collection to clear",
+        ["All collections"] + st.session_state.vector_store.shard_keys()
+    )
+    if st.button("🗑️ Clear Documents", use_container_width=True):
         if st.session_state.get("confirm_clear"):
-            st.session_state.vector_store.delete_collection()
+            st.session_state.vector_store.delete_collection(
+                None if clear_scope == "All collections" else clear_scope
+            )
             # Refresh info to reflect empty collection
             st.session_state.vector_store_info = st.session_state.vector_store.get_collection_info()
             st.success("✅ Vector store cleared!")
@@ -152,6 +180,56 @@ if st.session_state.vector_store_info:
     with col3:
         st.metric("Model", st.session_state.vector_store_info.get("embedding_model", "N/A"))
 
+# Background ingestion jobs (refreshed every JOB_POLL_INTERVAL seconds while any is active)
+st.markdown("### 🧵 Ingestion Jobs")
+if not settings.UI_INGESTION_WORKER:
+    st.caption("Jobs are processed by a separate worker: `python -m backend.ingestion.jobs worker`")
+jobs = job_queue.list_jobs(limit=10)
+if jobs:
+    for job in jobs:
+        active = job["status"] in ("queued", "running")
+        with st.expander(f"Job #{job['id']} · {job['status']} · {job['files_done']}/{job['files_total']} files", expanded=active):
+            progress_text = f"{job['files_done']} done, {job['files_failed']} failed of {job['files_total']} files"
+            if job["current_file"]:
+                progress_text += f" · {job['current_file']} ({job['current_chunks']} chunks)"
+            st.progress(job["progress"], text=progress_text)
+            stats = [f"{job['chunks_added']} chunks added"]
+            if job["chunks_per_sec"]:
+                stats.append(f"{job['chunks_per_sec']:g} chunks/s")
+            if job["files_per_sec"]:
+                stats.append(f"{job['files_per_sec']:g} files/s")
+            st.caption(" · ".join(stats))
+            if job["error"]:
+                st.error(job["error"])
+            if job["files_failed"] or not active:
+                st.dataframe(job_queue.get(job["id"])["files"], use_container_width=True, hide_index=True)
+            if active and not job["cancel_requested"]:
+                if st.button("⏹️ Cancel", key=f"cancel_job_{job['id']}"):
+                    job_queue.cancel(job["id"])
+                    st.rerun()
+            elif job["status"] in ("cancelled", "failed") or job["files_failed"]:
+                if st.button("▶️ Resume", key=f"resume_job_{job['id']}"):
+                    job_queue.resume(job["id"])
+                    st.rerun()
+else:
+    st.caption("No ingestion jobs yet. Uploaded documents are processed in the background.")
+
+# Performance (stages timed in this Streamlit process: uploads, syncs, searches)
+st.markdown("### 📈 Performance")
+snapshot = metrics.snapshot()
+if snapshot["stages"]:
+    st.dataframe(
+        [{"stage": stage, **summary} for stage, summary in snapshot["stages"].items()],
+        use_container_width=True,
+        hide_index=True
+    )
+    if snapshot["counters"]:
+        st.caption(" · ".join(f"{name}: {value:g}" for name, value in snapshot["counters"].items()))
+    if st.checkbox("Show Prometheus format"):
+        st.code(metrics.to_prometheus(), language="text")
+else:
+    st.caption("No timings recorded yet. Upload or sync documents to collect stage latencies.")
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -160,3 +238,9 @@ st.markdown("""
     All data is stored locally and available via MCP protocol.
     </div>
 """, unsafe_allow_html=True)
+
+# Poll job progress while jobs are queued or running
+if job_queue.active_count():
+    time.sleep(settings.JOB_POLL_INTERVAL)
+    st.session_state.vector_store_info = st.session_state.vector_store.get_collection_info()
+    st.rerun()